@@ -124,6 +124,36 @@ class BenchMark(benchbase.TreeBenchMark):
         for event, element in self.etree.iterparse(f):
             element.clear()
 
+    @with_attributes(True, False)
+    @with_text(text=True, utext=True)
+    @serialized
+    @onlylib('lxe')
+    def bench_iterparse_bytesIO_batch(self, root_xml):
+        f = BytesIO(root_xml)
+        read_events_batch = self.etree.iterparse(f).read_events_batch
+        events = read_events_batch(1000)
+        while events:
+            for event, element in events:
+                pass
+            events = read_events_batch(1000)
+
+    @nochange
+    @onlylib('lxe')
+    def bench_iterwalk(self, root):
+        for event, element in self.etree.iterwalk(root, events=('start', 'end')):
+            pass
+
+    @nochange
+    @onlylib('lxe')
+    def bench_iterwalk_batch(self, root):
+        read_events_batch = self.etree.iterwalk(
+            root, events=('start', 'end')).read_events_batch
+        events = read_events_batch(1000)
+        while events:
+            for event, element in events:
+                pass
+            events = read_events_batch(1000)
+
     def bench_append_from_document(self, root1, root2):
         # == "1,2 2,3 1,3 3,1 3,2 2,1" # trees 1 and 2, or 2 and 3, or ...
         for el in root2:
@@ -391,6 +421,19 @@ class BenchMark(benchbase.TreeBenchMark):
         root.xpath(".//*[p:%s]/./p:%s/./*" % (tag,tag),
                    namespaces = {'p':ns})
 
+    @nochange
+    @onlylib('lxe')
+    def bench_findall_child_python(self, root):
+        # generic ElementPath implementation, for comparison
+        from lxml._elementpath import findall
+        findall(root, ".//*/" + self.SEARCH_TAG)
+
+    @nochange
+    @onlylib('lxe')
+    def bench_findall_tag_python(self, root):
+        from lxml._elementpath import findall
+        findall(root, ".//" + self.SEARCH_TAG)
+
     @nochange
     def bench_iterfind(self, root):
         list(root.iterfind(".//*"))
@@ -403,6 +446,12 @@ class BenchMark(benchbase.TreeBenchMark):
     def bench_iterfind_islice(self, root):
         list(islice(root.iterfind(".//*"), 10, 110))
 
+    @nochange
+    @onlylib('lxe')
+    def bench_iterfind_tag_python(self, root):
+        from lxml._elementpath import iterfind
+        list(iterfind(root, ".//" + self.SEARCH_TAG))
+
     _bench_xpath_single_xpath = None
 
     @nochange
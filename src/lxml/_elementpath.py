@@ -55,6 +55,11 @@
 
 import re
 
+try:
+    import threading
+except ImportError:
+    import dummy_threading as threading
+
 xpath_tokenizer_re = re.compile(
     "("
     "'[^']*'|\"[^\"]*\"|"
@@ -222,7 +227,114 @@ ops = {
     "[": prepare_predicate,
     }
 
-_cache = {}
+# --------------------------------------------------------------------
+
+##
+# Bounded LRU cache of compiled selectors.  Entries are kept in a
+# circular doubly linked list of [prev, next, key, value] lists, most
+# recently used at the end.
+
+_PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+class _SelectorCache(object):
+    def __init__(self, maxsize=100):
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self._reset()
+
+    def _reset(self):
+        self._map = {}
+        root = self._root = []
+        root[:] = [root, root, None, None]
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        self._lock.acquire()
+        try:
+            link = self._map.get(key)
+            if link is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # move to most recently used position
+            link_prev, link_next = link[_PREV], link[_NEXT]
+            link_prev[_NEXT] = link_next
+            link_next[_PREV] = link_prev
+            root = self._root
+            last = root[_PREV]
+            last[_NEXT] = root[_PREV] = link
+            link[_PREV], link[_NEXT] = last, root
+            return link[_VALUE]
+        finally:
+            self._lock.release()
+
+    def put(self, key, value):
+        self._lock.acquire()
+        try:
+            if self._maxsize <= 0 or key in self._map:
+                return
+            while len(self._map) >= self._maxsize:
+                self._evict_oldest()
+            root = self._root
+            last = root[_PREV]
+            link = [last, root, key, value]
+            last[_NEXT] = root[_PREV] = self._map[key] = link
+        finally:
+            self._lock.release()
+
+    def _evict_oldest(self):
+        root = self._root
+        oldest = root[_NEXT]
+        root[_NEXT] = oldest[_NEXT]
+        oldest[_NEXT][_PREV] = root
+        del self._map[oldest[_KEY]]
+        self.evictions += 1
+
+    def resize(self, maxsize):
+        self._lock.acquire()
+        try:
+            self._maxsize = maxsize
+            while self._map and len(self._map) > maxsize:
+                self._evict_oldest()
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._reset()
+        finally:
+            self._lock.release()
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self._map),
+                "maxsize": self._maxsize}
+
+_cache = _SelectorCache(100)
+
+##
+# Set the maximum number of compiled path expressions to keep.  A size
+# of 0 disables caching.
+
+def set_cache_size(size):
+    size = int(size)
+    if size < 0:
+        raise ValueError("cache size must not be negative")
+    _cache.resize(size)
+
+##
+# Return a dict with the current "hits", "misses", "evictions", "size"
+# and "maxsize" of the path cache.
+
+def cache_info():
+    return _cache.info()
+
+##
+# Discard all cached path expressions and reset the statistics.
+
+def clear_cache():
+    _cache.clear()
 
 # --------------------------------------------------------------------
 
@@ -230,12 +342,13 @@ def _build_path_iterator(path, namespaces):
     # compile selector pattern
     if path[-1:] == "/":
         path = path + "*" # implicit all (FIXME: keep this?)
-    try:
-        return _cache[(path, namespaces and tuple(sorted(namespaces.items())) or None)]
-    except KeyError:
-        pass
-    if len(_cache) > 100:
-        _cache.clear()
+    if namespaces:
+        cache_key = (path, tuple(sorted(namespaces.items())))
+    else:
+        cache_key = (path, None)
+    selector = _cache.get(cache_key)
+    if selector is not None:
+        return selector
 
     if path[:1] == "/":
         raise SyntaxError("cannot use absolute path on element")
@@ -261,7 +374,7 @@ def _build_path_iterator(path, namespaces):
                 token = _next()
         except StopIteration:
             break
-    _cache[path] = selector
+    _cache.put(cache_key, selector)
     return selector
 
 ##
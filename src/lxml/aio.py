@@ -0,0 +1,239 @@
+"""
+Asyncio front-ends for parsing and incremental serialisation.
+
+The functions and classes in this module read from and write to
+asynchronous streams, e.g. an ``asyncio.StreamReader`` or a file opened
+with ``aiofiles``, without blocking the event loop:
+
+- `aparse()` parses a document from an asynchronous reader.
+
+- `iterparse` is an asynchronous variant of ``etree.iterparse()``
+  that is used with ``async for``.
+
+- `xmlfile` is an asynchronous variant of ``etree.xmlfile()`` that
+  is used with ``async with``.
+
+Readers must provide a ``read(size)`` method and writers a ``write(data)``
+method.  Both may return awaitables.  Writers that provide a ``drain()``
+coroutine, such as ``asyncio.StreamWriter``, are drained after each write.
+
+Data is parsed in the calling thread by default.  Pass an ``executor``
+(e.g. a ``concurrent.futures.ThreadPoolExecutor``) to run the libxml2
+parser calls in it instead.  libxml2 releases the GIL while it parses.
+
+This module requires Python 3.5 or later.
+"""
+
+import asyncio
+import inspect
+
+from lxml import etree
+
+__all__ = ['aparse', 'iterparse', 'xmlfile']
+
+_CHUNK_SIZE = 32768
+
+
+async def _read(source, size):
+    data = source.read(size)
+    if inspect.isawaitable(data):
+        data = await data
+    return data
+
+async def _write(output, data):
+    result = output.write(data)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(output, 'drain', None)
+    if drain is not None:
+        await drain()
+
+async def _call(executor, function, *args):
+    if executor is None:
+        return function(*args)
+    return await asyncio.get_event_loop().run_in_executor(
+        executor, function, *args)
+
+
+async def aparse(source, parser=None, *, chunk_size=_CHUNK_SIZE,
+                 executor=None):
+    """aparse(source, parser=None, *, chunk_size=32768, executor=None)
+
+    Read a document from an asynchronous reader and return an ElementTree.
+
+    The data is passed into the feed interface of the parser in chunks of
+    up to ``chunk_size`` bytes.  If no parser is provided, a copy of the
+    default parser is used.  Note that a parser must not be used for more
+    than one document at a time.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if parser is None:
+        parser = etree.get_default_parser().copy()
+    while True:
+        data = await _read(source, chunk_size)
+        if not data:
+            break
+        await _call(executor, parser.feed, data)
+    root = await _call(executor, parser.close)
+    return etree.ElementTree(root)
+
+
+class iterparse(object):
+    """iterparse(self, source, events=("end",), *, tag=None, html=False, \
+                 chunk_size=32768, executor=None, **kwargs)
+
+    Asynchronous incremental parser.
+
+    Reads from an asynchronous reader and yields the same
+    ``(event, element)`` tuples as ``etree.iterparse()``::
+
+        async for event, element in iterparse(reader, tag='item'):
+            ...
+
+    Other keyword arguments are passed on to the ``XMLPullParser`` or,
+    if ``html`` is true, the ``HTMLPullParser``.  The root element is
+    available as the ``root`` attribute after the iteration has finished.
+    """
+    def __init__(self, source, events=("end",), *, tag=None, html=False,
+                 chunk_size=_CHUNK_SIZE, executor=None, **kwargs):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if html:
+            parser = etree.HTMLPullParser(events, tag=tag, **kwargs)
+        else:
+            parser = etree.XMLPullParser(events, tag=tag, **kwargs)
+        self.root = None
+        self._source = source
+        self._parser = parser
+        self._events = parser.read_events()
+        self._chunk_size = chunk_size
+        self._executor = executor
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            for event in self._events:
+                return event
+            parser = self._parser
+            if parser is None:
+                raise StopAsyncIteration
+            data = await _read(self._source, self._chunk_size)
+            if data:
+                await _call(self._executor, parser.feed, data)
+            else:
+                self._parser = None
+                self.root = await _call(self._executor, parser.close)
+
+
+class _OutputBuffer(object):
+    """Collects the serialised data until it is written asynchronously.
+    """
+    def __init__(self):
+        self._data = []
+
+    def write(self, data):
+        self._data.append(data)
+
+    def pop(self):
+        data = b''.join(self._data)
+        del self._data[:]
+        return data
+
+
+class _AsyncIncrementalFileWriter(object):
+    def __init__(self, writer, buffer, output):
+        self._writer = writer
+        self._buffer = buffer
+        self._output = output
+
+    def write_declaration(self, version=None, standalone=None, doctype=None):
+        """write_declaration(self, version=None, standalone=None, doctype=None)
+
+        Write an XML declaration and (optionally) a doctype into the file.
+        """
+        self._writer.write_declaration(version, standalone, doctype)
+
+    def write_doctype(self, doctype):
+        """write_doctype(self, doctype)
+
+        Writes the given doctype declaration verbatimly into the file.
+        """
+        self._writer.write_doctype(doctype)
+
+    def element(self, tag, attrib=None, nsmap=None, **_extra):
+        """element(self, tag, attrib=None, nsmap=None, **_extra)
+
+        Returns a context manager that writes an opening and closing tag.
+        """
+        return self._writer.element(tag, attrib, nsmap, **_extra)
+
+    def write(self, *args, **kwargs):
+        """write(self, *args, with_tail=True, pretty_print=False)
+
+        Write subtrees or strings into the file.  The data is buffered
+        in memory until ``flush()`` is awaited.
+        """
+        self._writer.write(*args, **kwargs)
+
+    async def flush(self):
+        """flush(self)
+
+        Write the buffered data to the output.
+        """
+        self._writer.flush()
+        data = self._buffer.pop()
+        if data:
+            await _write(self._output, data)
+
+
+class xmlfile(object):
+    """xmlfile(self, output_file, encoding=None, *, close=False)
+
+    Asynchronous incremental XML serialisation.
+
+    Usage example::
+
+         async with xmlfile(writer, encoding='utf-8') as xf:
+             xf.write_declaration()
+             with xf.element('root'):
+                 async for element in generate_some_elements():
+                     xf.write(element)
+                     await xf.flush()
+
+    Written data is buffered in memory until ``flush()`` is awaited or the
+    ``async with`` block is left.  If ``close`` is true, the output is
+    closed at the end.
+    """
+    def __init__(self, output_file, encoding=None, *, close=False):
+        if output_file is None:
+            raise TypeError("output_file must not be None")
+        self._output = output_file
+        self._encoding = encoding
+        self._close = close
+        self._xmlfile = None
+        self._writer = None
+
+    async def __aenter__(self):
+        buffer = _OutputBuffer()
+        self._xmlfile = etree.xmlfile(buffer, encoding=self._encoding)
+        self._writer = _AsyncIncrementalFileWriter(
+            self._xmlfile.__enter__(), buffer, self._output)
+        return self._writer
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        xf, self._xmlfile = self._xmlfile, None
+        writer, self._writer = self._writer, None
+        try:
+            xf.__exit__(exc_type, exc_val, exc_tb)
+            if exc_type is None:
+                data = writer._buffer.pop()
+                if data:
+                    await _write(self._output, data)
+        finally:
+            if self._close:
+                result = self._output.close()
+                if inspect.isawaitable(result):
+                    await result
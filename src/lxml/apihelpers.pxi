@@ -538,6 +538,7 @@ cdef int _delAttributeFromNsName(xmlNode* c_node, const_xmlChar* c_href, const_x
     if c_attr is NULL:
         # XXX free namespace that is not in use..?
         return -1
+    _noteRemovedNodes(c_node.doc, 0)
     tree.xmlRemoveProp(c_attr)
     return 0
 
@@ -635,6 +636,8 @@ cdef void _removeText(xmlNode* c_node):
     """
     cdef xmlNode* c_next
     c_node = _textNodeOrSkip(c_node)
+    if c_node is not NULL:
+        _noteRemovedNodes(c_node.doc, 0)
     while c_node is not NULL:
         c_next = _textNodeOrSkip(c_node.next)
         tree.xmlUnlinkNode(c_node)
@@ -1582,3 +1585,94 @@ cdef _getFilenameForFile(source):
         pass
     # can't determine filename
     return None
+
+################################################################################
+# bounded LRU cache, used for compiled XPath expressions and XSLT stylesheets
+
+@cython.final
+@cython.internal
+cdef class _LRUCacheEntry:
+    cdef object _key
+    cdef object _value
+    cdef _LRUCacheEntry _prev
+    cdef _LRUCacheEntry _next
+
+@cython.final
+@cython.internal
+cdef class _LRUCache:
+    u"""Bounded LRU cache that is shared by all threads.
+
+    Entries are kept in a circular doubly linked list, most recently used
+    at the end.  Keys must only contain strings, numbers and tuples, so
+    that none of the operations can call back into Python code and the
+    GIL protects them.
+    """
+    cdef dict _entries
+    cdef _LRUCacheEntry _root
+    cdef Py_ssize_t _max_size
+    cdef Py_ssize_t _hits
+    cdef Py_ssize_t _misses
+    cdef Py_ssize_t _evictions
+
+    def __cinit__(self, Py_ssize_t max_size):
+        self._max_size = max_size
+        self.clear()
+
+    cdef clear(self):
+        self._entries = {}
+        self._root = _LRUCacheEntry()
+        self._root._prev = self._root._next = self._root
+        self._hits = self._misses = self._evictions = 0
+
+    cdef dict info(self):
+        return {u"hits": self._hits,
+                u"misses": self._misses,
+                u"evictions": self._evictions,
+                u"size": len(self._entries),
+                u"maxsize": self._max_size}
+
+    cdef object get(self, key):
+        u"Return the cached value or None."
+        cdef _LRUCacheEntry entry
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        # move to most recently used position
+        entry._prev._next = entry._next
+        entry._next._prev = entry._prev
+        self._link(entry)
+        return entry._value
+
+    cdef put(self, key, value):
+        cdef _LRUCacheEntry entry
+        if self._max_size <= 0 or key in self._entries:
+            return
+        while len(self._entries) >= self._max_size:
+            self._evict_oldest()
+        entry = _LRUCacheEntry()
+        entry._key = key
+        entry._value = value
+        self._entries[key] = entry
+        self._link(entry)
+
+    cdef int resize(self, Py_ssize_t max_size) except -1:
+        self._max_size = max_size
+        while self._entries and len(self._entries) > max_size:
+            self._evict_oldest()
+        return 0
+
+    cdef void _link(self, _LRUCacheEntry entry):
+        entry._prev = self._root._prev
+        entry._next = self._root
+        self._root._prev._next = entry
+        self._root._prev = entry
+
+    cdef _evict_oldest(self):
+        cdef _LRUCacheEntry oldest = self._root._next
+        self._root._next = oldest._next
+        oldest._next._prev = self._root
+        oldest._prev = oldest._next = None
+        del self._entries[oldest._key]
+        self._evictions += 1
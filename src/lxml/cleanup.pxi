@@ -47,6 +47,7 @@ cdef _strip_attributes(xmlNode* c_node, _MultiTagMatcher matcher):
         while c_attr is not NULL:
             c_next_attr = c_attr.next
             if matcher.matchesAttribute(c_attr):
+                _noteRemovedNodes(c_node.doc, 0)
                 tree.xmlRemoveProp(c_attr)
             c_attr = c_next_attr
     tree.END_FOR_EACH_ELEMENT_FROM(c_node)
@@ -0,0 +1,207 @@
+# ElementPath evaluation in C
+#
+# Paths that only consist of child and descendant steps with name tests
+# ("a/b", ".//{ns}c", "x:*/y") are compiled into a list of tag matchers
+# and evaluated directly on the libxml2 tree.  Anything else (predicates,
+# parent steps, syntax errors) is left to the generic Python implementation
+# in _elementpath.py, which defines the semantics that we follow here.
+
+@cython.final
+@cython.internal
+cdef class _ElementPathStep:
+    u"""A compiled step of a path.  Steps are shared through the global
+    path cache, so they must not keep documents alive between matches.
+    """
+    cdef bint _descendant
+    cdef _MultiTagMatcher _matcher
+
+    def __cinit__(self, bint descendant, tag):
+        self._descendant = descendant
+        self._matcher = _MultiTagMatcher(tag)
+
+    cdef xmlNode* _nextMatch(self, _Element context, xmlNode* c_node) except? NULL:
+        u"""Return the first match after c_node, or the first match below
+        the context element if c_node is NULL.
+        """
+        self._matcher.cacheTags(context._doc)
+        c_node = self._findMatch(context._c_node, c_node)
+        # drop the reference to the document, the tags are mapped again
+        # for the next match
+        self._matcher._cached_doc = None
+        return c_node
+
+    cdef xmlNode* _findMatch(self, xmlNode* c_context, xmlNode* c_node):
+        if self._descendant:
+            if c_node is NULL:
+                c_node = c_context
+            tree.BEGIN_FOR_EACH_ELEMENT_FROM(c_context, c_node, 0)
+            if self._matcher.matches(c_node):
+                return c_node
+            tree.END_FOR_EACH_ELEMENT_FROM(c_node)
+            return NULL
+        if c_node is NULL:
+            c_node = _findChildForwards(c_context, 0)
+        elif c_node.parent is not c_context:
+            # the previous match was moved away, stop here
+            return NULL
+        else:
+            c_node = _nextElement(c_node)
+        while c_node is not NULL and not self._matcher.matches(c_node):
+            c_node = _nextElement(c_node)
+        return c_node
+
+
+cdef object _compileElementPath(path, namespaces):
+    u"""Look up or compile the list of steps for a path.  Returns False if
+    the path must be handled by the Python implementation.
+    """
+    if path[-1:] == '/':
+        path = path + '*'
+    if namespaces:
+        cache_key = (u'native', path, tuple(sorted(namespaces.items())))
+    else:
+        cache_key = (u'native', path, None)
+    steps = _elementpath._cache.get(cache_key)
+    if steps is None:
+        steps = _parseElementPath(path, namespaces)
+        _elementpath._cache.put(cache_key, steps)
+    return steps
+
+cdef object _parseElementPath(path, namespaces):
+    cdef list steps = []
+    cdef Py_ssize_t i, count
+    cdef bint descendant
+    if not path or path[:1] == '/':
+        return False
+    tokens = list(_elementpath.xpath_tokenizer(path, namespaces))
+    count = len(tokens)
+    i = 0
+    while i < count:
+        op, tag = tokens[i]
+        descendant = op == '//'
+        if descendant:
+            i += 1
+            if i == count:
+                return False
+            op, tag = tokens[i]
+        if op == '*':
+            tag = '*'
+        elif op == '.' and not descendant:
+            tag = None
+        elif op or not tag:
+            return False
+        if tag is not None:
+            try:
+                steps.append(_ElementPathStep(descendant, tag))
+            except (ValueError, TypeError):
+                # invalid tag name, let the Python implementation fail lazily
+                return False
+        i += 1
+        if i < count and tokens[i][0] == '/':
+            i += 1
+    return steps
+
+
+@cython.final
+@cython.internal
+cdef class _ElementPathIterator:
+    u"""Evaluates a compiled path depth first, in the same order as the
+    chained generators of the Python implementation.
+
+    The stack holds the context element followed by the current match
+    of each step.  Like the element iterators, each step looks ahead and
+    keeps a reference to its next match, so that the tree can be modified
+    during iteration.
+    """
+    cdef list _steps
+    cdef list _stack
+    cdef list _next_matches
+    cdef bint _descend
+
+    def __cinit__(self, _Element context not None, list steps not None):
+        self._steps = steps
+        self._stack = [context]
+        self._next_matches = []
+        self._descend = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        element = self._findNext()
+        if element is None:
+            raise StopIteration
+        return element
+
+    cdef _Element _findNext(self):
+        cdef _ElementPathStep step
+        cdef _Element context, element
+        cdef xmlNode* c_node
+        cdef list stack = self._stack
+        while stack:
+            if self._descend:
+                if len(stack) > len(self._steps):
+                    # all steps matched
+                    self._descend = False
+                    return stack[-1]
+                context = stack[-1]
+                step = self._steps[len(stack) - 1]
+                c_node = step._nextMatch(context, NULL)
+                if c_node is NULL:
+                    self._descend = False
+                    continue
+                element = _elementFactory(context._doc, c_node)
+            elif len(stack) == 1:
+                # the context node has no successor
+                del stack[:]
+                break
+            else:
+                # backtrack to the next match of the current step
+                del stack[-1]
+                element = self._next_matches.pop()
+                if element is None:
+                    continue
+                context = stack[-1]
+                step = self._steps[len(stack) - 1]
+            c_node = step._nextMatch(context, element._c_node)
+            self._next_matches.append(
+                _elementFactory(context._doc, c_node) if c_node is not NULL else None)
+            stack.append(element)
+            self._descend = True
+        return None
+
+
+cdef object _elementPathFind(_Element element, path, namespaces):
+    steps = _compileElementPath(path, namespaces)
+    if steps is False:
+        return _elementpath.find(element, path, namespaces)
+    return _ElementPathIterator(element, steps)._findNext()
+
+cdef object _elementPathFindText(_Element element, path, default, namespaces):
+    steps = _compileElementPath(path, namespaces)
+    if steps is False:
+        return _elementpath.findtext(element, path, default, namespaces)
+    result = _ElementPathIterator(element, steps)._findNext()
+    if result is None:
+        return default
+    return result.text or ''
+
+cdef list _elementPathFindAll(_Element element, path, namespaces):
+    cdef _ElementPathIterator iterator
+    cdef list result
+    steps = _compileElementPath(path, namespaces)
+    if steps is False:
+        return _elementpath.findall(element, path, namespaces)
+    result = []
+    iterator = _ElementPathIterator(element, steps)
+    match = iterator._findNext()
+    while match is not None:
+        result.append(match)
+        match = iterator._findNext()
+    return result
+
+cdef object _elementPathIterFind(_Element element, path, namespaces):
+    steps = _compileElementPath(path, namespaces)
+    if steps is False:
+        return _elementpath.iterfind(element, path, namespaces)
+    return _ElementPathIterator(element, steps)
@@ -327,6 +327,20 @@ cdef class _BaseContext:
         self._temp_refs.clear()
         self._temp_documents.clear()
 
+    @cython.final
+    cdef _BaseContext _copy_result_context(self):
+        u"""Create a context that takes over the temporarily referenced
+        objects of this context, for unpacking a result after the
+        evaluation has finished.
+        """
+        cdef _BaseContext context
+        context = _BaseContext(None, None, self._error_log, False,
+                               self._build_smart_strings)
+        context._temp_refs, self._temp_refs = self._temp_refs, context._temp_refs
+        context._temp_documents, self._temp_documents = \
+            self._temp_documents, context._temp_documents
+        return context
+
     @cython.final
     cdef _hold(self, obj):
         u"""A way to temporarily hold references to nodes in the evaluator.
@@ -655,6 +669,40 @@ cdef object _createNodeSetResult(xpath.xmlXPathObject* xpathObj, _Document doc,
                             xpathObj.type == xpath.XPATH_XSLT_TREE)
     return result
 
+cdef Py_ssize_t _countNodeSetResult(xpath.xmlXPathObject* xpathObj,
+                                    Py_ssize_t limit):
+    u"""Count the entries that _createNodeSetResult() would return without
+    creating them.  Stops counting at 'limit' if it is positive.
+    """
+    cdef xmlNode* c_node
+    cdef Py_ssize_t count = 0
+    cdef int i
+    if xpathObj.nodesetval is NULL:
+        return 0
+    for i in range(xpathObj.nodesetval.nodeNr):
+        c_node = xpathObj.nodesetval.nodeTab[i]
+        if c_node.type == tree.XML_DOCUMENT_NODE or \
+                c_node.type == tree.XML_HTML_DOCUMENT_NODE:
+            # ignored for everything but result tree fragments
+            if xpathObj.type == xpath.XPATH_XSLT_TREE:
+                c_node = c_node.children
+                while c_node is not NULL:
+                    if _isNodeSetResultEntry(c_node):
+                        count += 1
+                    c_node = c_node.next
+        elif _isNodeSetResultEntry(c_node):
+            count += 1
+        if 0 < limit <= count:
+            break
+    return count
+
+cdef inline bint _isNodeSetResultEntry(xmlNode* c_node):
+    return _isElement(c_node) or \
+        c_node.type == tree.XML_TEXT_NODE or \
+        c_node.type == tree.XML_CDATA_SECTION_NODE or \
+        c_node.type == tree.XML_ATTRIBUTE_NODE or \
+        c_node.type == tree.XML_NAMESPACE_DECL
+
 cdef _unpackNodeSetEntry(list results, xmlNode* c_node, _Document doc,
                          _BaseContext context, bint is_fragment):
     cdef xmlNode* c_child
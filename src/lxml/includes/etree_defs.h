@@ -74,6 +74,19 @@
 #endif
 /* we currently only use three parameters - MSVC can't compile (s, ...) */
 #  define PyUnicode_FromFormat(s, a, b)      (NULL)
+/* no new-style buffer protocol before Python 2.6 */
+#ifndef PyObject_CheckBuffer
+#  define PyObject_CheckBuffer(o)            (0)
+#  define PyObject_GetBuffer(o, view, flags) \
+       (PyErr_SetString(PyExc_TypeError, "buffer protocol not supported"), -1)
+#  define PyBuffer_Release(view)
+#endif
+/* no bytearray before Python 2.6 */
+#ifndef PyByteArray_FromStringAndSize
+#  define PyByteArray_FromStringAndSize(s, size) \
+       (PyErr_SetString(PyExc_NotImplementedError, "bytearray not supported"), (PyObject*)NULL)
+#  define PyByteArray_AS_STRING(o)           (NULL)
+#endif
 #endif
 #endif
 #endif
@@ -411,6 +411,8 @@ cdef extern from "libxml/xmlIO.h":
         xmlCharEncodingHandler* encoder) nogil
     cdef xmlOutputBuffer* xmlOutputBufferCreateFile(
         stdio.FILE* file, xmlCharEncodingHandler* encoder) nogil
+    cdef xmlOutputBuffer* xmlOutputBufferCreateFd(
+        int fd, xmlCharEncodingHandler* encoder) nogil
     cdef xmlOutputBuffer* xmlOutputBufferCreateFilename(
         char* URI, xmlCharEncodingHandler* encoder, int compression) nogil
 
@@ -84,6 +84,10 @@ cdef extern from "libxml/tree.h":
 
 cdef extern from "libxml/xmlIO.h":
     cdef xmlParserInputBuffer* xmlAllocParserInputBuffer(int enc) nogil
+    cdef xmlParserInputBuffer* xmlParserInputBufferCreateFilename(
+        char* URI, int enc) nogil
+    cdef xmlParserInputBuffer* xmlParserInputBufferCreateFd(
+        int fd, int enc) nogil
 
 cdef extern from "libxml/parser.h":
 
@@ -1,5 +1,5 @@
 from lxml.includes.tree cimport xmlDoc
-from lxml.includes.xmlparser cimport xmlSAXHandler
+from lxml.includes.xmlparser cimport xmlSAXHandler, xmlParserInputBuffer
 from lxml.includes.xmlerror cimport xmlStructuredErrorFunc
 
 cdef extern from "libxml/xmlschemas.h":
@@ -19,6 +19,9 @@ cdef extern from "libxml/xmlschemas.h":
         xmlStructuredErrorFunc serror, void *ctx)
 
     cdef int xmlSchemaValidateDoc(xmlSchemaValidCtxt* ctxt, xmlDoc* doc) nogil
+    cdef int xmlSchemaValidateStream(xmlSchemaValidCtxt* ctxt,
+                                     xmlParserInputBuffer* input, int enc,
+                                     xmlSAXHandler* sax, void* user_data) nogil
     cdef xmlSchema* xmlSchemaParse(xmlSchemaParserCtxt* ctxt) nogil
     cdef xmlSchemaParserCtxt* xmlSchemaNewParserCtxt(char* URL) nogil
     cdef xmlSchemaParserCtxt* xmlSchemaNewDocParserCtxt(xmlDoc* doc) nogil
@@ -117,6 +117,10 @@ cdef extern from "libxml/xpathInternals.h":
     cdef void xmlXPathRegisteredVariablesCleanup(xmlXPathContext *ctxt) nogil
     cdef void xmlXPathRegisteredNsCleanup(xmlXPathContext *ctxt) nogil
     cdef xmlXPathObject* valuePop (xmlXPathParserContext *ctxt) nogil
+    cdef double xmlXPathCastNodeToNumber(tree.xmlNode* node) nogil
+    cdef xmlChar* xmlXPathCastNodeToString(tree.xmlNode* node) nogil
+    cdef double xmlXPathCastToNumber(xmlXPathObject* val) nogil
+    cdef xmlChar* xmlXPathCastToString(xmlXPathObject* val) nogil
     cdef int valuePush(xmlXPathParserContext* ctxt, xmlXPathObject *value) nogil
     
     cdef xmlXPathObject* xmlXPathNewCString(const_char *val) nogil
@@ -1,7 +1,5 @@
 # iterparse -- event-driven parsing
 
-DEF __ITERPARSE_CHUNK_SIZE = 32768
-
 ctypedef enum _IterparseEventFilter:
     ITERPARSE_FILTER_START     =  1
     ITERPARSE_FILTER_END       =  2
@@ -53,6 +51,196 @@ cdef int _appendStartNsEvents(xmlNode* c_node, list event_list):
         c_ns = c_ns.next
     return count
 
+ctypedef enum _StreamPathEndFlags:
+    STREAM_PATH_MATCHED  =  1
+    STREAM_PATH_DISCARD  =  2
+
+ctypedef struct _StreamPathState:
+    unsigned long long active  # steps that the children are tested against
+    bint matched               # the element matches the path
+    bint keep                  # it matches or has a matching descendant
+
+cdef object _find_stream_path_step
+cdef object _find_stream_path_predicate
+_find_stream_path_step = re.compile(
+    u"(//|/)?\\s*((?:\\{[^}]*\\})?[^/\\[\\]{}\\s]+)\\s*((?:\\[[^\\]]*\\]\\s*)*)").match
+_find_stream_path_predicate = re.compile(
+    u"\\[\\s*@((?:\\{[^}]*\\})?[^\\]=!\\s]+)\\s*"
+    u"(?:(!?=)\\s*(?:'([^']*)'|\"([^\"]*)\"))?\\s*\\]\\s*").match
+
+@cython.final
+@cython.internal
+cdef class _StreamPathStep:
+    u"""A location step of a streaming path: a name test and attribute
+    predicates.
+    """
+    cdef _MultiTagMatcher _matcher
+    cdef list _predicates
+    cdef bint _descendant
+
+    def __cinit__(self, tag, bint descendant):
+        if u':' in tag.split(u'}')[-1] or tag in (u'.', u'..') or \
+                u'(' in tag or u'@' in tag:
+            raise XPathSyntaxError, \
+                u"unsupported name test in streaming path: '%s'" % tag
+        self._matcher = _MultiTagMatcher(tag)
+        self._predicates = []
+        self._descendant = descendant
+
+    cdef _addPredicate(self, name, op, value):
+        href, name_utf = _getNsTag(name)
+        if value is not None:
+            value = _utf8(value)
+        self._predicates.append((href, name_utf, op == u'!=', value))
+
+    cdef bint matches(self, xmlNode* c_node) except -1:
+        cdef xmlChar* c_value
+        cdef bint equal
+        if not self._matcher.matches(c_node):
+            return 0
+        for href, name, negate, value in self._predicates:
+            c_value = tree.xmlGetNsProp(
+                c_node, _xcstr(name), NULL if href is None else _xcstr(href))
+            if c_value is NULL:
+                return 0
+            if value is None:
+                tree.xmlFree(c_value)
+                continue
+            equal = tree.xmlStrcmp(c_value, _xcstr(value)) == 0
+            tree.xmlFree(c_value)
+            if equal == negate:
+                return 0
+        return 1
+
+
+@cython.final
+@cython.internal
+cdef class _StreamPathMatcher:
+    u"""Matches elements against a streamable XPath subset while they are
+    being parsed.  The path is run as a state machine over the SAX events.
+    Each open element holds the set of steps that its children can match.
+    """
+    cdef list _steps
+    cdef Py_ssize_t _last_step
+    cdef _StreamPathState* _stack
+    cdef size_t _stack_size
+    cdef size_t _depth
+    cdef size_t _open_matches
+
+    def __cinit__(self):
+        self._stack = NULL
+        self._stack_size = 0
+
+    def __init__(self, path):
+        cdef _StreamPathStep step
+        cdef Py_ssize_t pos = 0, end
+        if not python._isString(path):
+            raise TypeError, u"path must be a string"
+        if isinstance(path, bytes):
+            path = (<bytes>path).decode('UTF-8')
+        self._steps = []
+        end = len(path)
+        while pos < end:
+            match = _find_stream_path_step(path, pos)
+            if match is None or (self._steps and match.group(1) is None):
+                raise XPathSyntaxError, \
+                    u"invalid streaming path: '%s'" % path
+            step = _StreamPathStep(match.group(2), match.group(1) == u'//')
+            predicates = match.group(3)
+            while predicates:
+                predicate = _find_stream_path_predicate(predicates)
+                if predicate is None:
+                    raise XPathSyntaxError, \
+                        u"unsupported predicate in streaming path: '%s'" % path
+                name, op, value1, value2 = predicate.groups()
+                step._addPredicate(
+                    name, op, value1 if value2 is None else value2)
+                predicates = predicates[predicate.end():]
+            self._steps.append(step)
+            pos = match.end()
+        if not self._steps:
+            raise XPathSyntaxError, u"empty streaming path"
+        if len(self._steps) > 64:
+            raise XPathSyntaxError, u"streaming path has too many steps"
+        self._last_step = len(self._steps) - 1
+
+    def __dealloc__(self):
+        if self._stack is not NULL:
+            python.PyMem_Free(self._stack)
+
+    cdef int reset(self, _Document doc) except -1:
+        cdef _StreamPathStep step
+        for step in self._steps:
+            step._matcher.cacheTags(doc, True) # force entry in libxml2 dict
+        if self._stack is NULL:
+            self._stack = <_StreamPathState*>python.PyMem_Malloc(
+                16 * sizeof(_StreamPathState))
+            if self._stack is NULL:
+                raise MemoryError()
+            self._stack_size = 16
+        self._depth = 0
+        self._open_matches = 0
+        self._stack[0].active = 1
+        self._stack[0].matched = self._stack[0].keep = 0
+        return 0
+
+    cdef bint start(self, xmlNode* c_node) except -1:
+        u"""Push the state of a new element and return True if it matches.
+        """
+        cdef _StreamPathState* state
+        cdef _StreamPathStep step
+        cdef unsigned long long active, parent_active
+        cdef unsigned long long _ONE_STEP = 1
+        cdef Py_ssize_t i
+        cdef bint matched = 0
+        if self._depth + 1 >= self._stack_size:
+            state = <_StreamPathState*>python.PyMem_Realloc(
+                self._stack, 2 * self._stack_size * sizeof(_StreamPathState))
+            if state is NULL:
+                raise MemoryError()
+            self._stack = state
+            self._stack_size *= 2
+        parent_active = self._stack[self._depth].active
+        active = 0
+        if parent_active:
+            for i in range(self._last_step + 1):
+                if not parent_active & (_ONE_STEP << i):
+                    continue
+                step = <_StreamPathStep>self._steps[i]
+                if step._descendant:
+                    active |= _ONE_STEP << i
+                if step.matches(c_node):
+                    if i == self._last_step:
+                        matched = 1
+                    else:
+                        active |= _ONE_STEP << (i + 1)
+        self._depth += 1
+        state = &self._stack[self._depth]
+        state.active = active
+        state.matched = state.keep = matched
+        if matched:
+            self._open_matches += 1
+        return matched
+
+    cdef int end(self) except -1:
+        u"""Pop the state of the current element and return a combination of
+        STREAM_PATH_MATCHED and STREAM_PATH_DISCARD.  Elements are
+        discarded if they are complete, not the root element, and neither
+        match nor contain or lie within a match.
+        """
+        cdef _StreamPathState* state = &self._stack[self._depth]
+        cdef int flags = 0
+        self._depth -= 1
+        if state.matched:
+            flags |= STREAM_PATH_MATCHED
+            self._open_matches -= 1
+        if state.keep:
+            self._stack[self._depth].keep = 1
+        elif self._open_matches == 0 and self._depth > 0:
+            flags |= STREAM_PATH_DISCARD
+        return flags
+
+
 @cython.final
 @cython.internal
 cdef class _IterparseContext(_ParserContext):
@@ -72,8 +260,12 @@ cdef class _IterparseContext(_ParserContext):
     cdef list _node_stack
     cdef tuple _tag_tuple
     cdef _MultiTagMatcher _matcher
+    cdef _StreamPathMatcher _path_matcher
+    cdef xmlNode* _c_discard_pending
+    cdef _Element _discard_pending_proxy
 
     def __cinit__(self):
+        self._c_discard_pending = NULL
         self._ns_stack = []
         self._node_stack = []
         self._events = []
@@ -89,7 +281,7 @@ cdef class _IterparseContext(_ParserContext):
         self._origSaxStart = sax.startElementNs
         self._origSaxStartNoNs = sax.startElement
         # only override start event handler if needed
-        if self._event_filter == 0 or \
+        if self._event_filter == 0 or self._path_matcher is not None or \
                self._event_filter & (ITERPARSE_FILTER_START |
                                      ITERPARSE_FILTER_START_NS |
                                      ITERPARSE_FILTER_END_NS):
@@ -99,7 +291,7 @@ cdef class _IterparseContext(_ParserContext):
         self._origSaxEnd = sax.endElementNs
         self._origSaxEndNoNs = sax.endElement
         # only override end event handler if needed
-        if self._event_filter == 0 or \
+        if self._event_filter == 0 or self._path_matcher is not None or \
                self._event_filter & (ITERPARSE_FILTER_END |
                                      ITERPARSE_FILTER_END_NS):
             sax.endElementNs = <xmlparser.endElementNsSAX2Func>_iterparseSaxEnd
@@ -122,13 +314,22 @@ cdef class _IterparseContext(_ParserContext):
 
     cdef int startDocument(self, xmlDoc* c_doc) except -1:
         self._doc = _documentFactory(c_doc, None)
+        # pull parsers can be reused for more than one document
+        self._root = None
+        del self._ns_stack[:]
+        del self._node_stack[:]
         if self._matcher is not None:
             self._matcher.cacheTags(self._doc, True) # force entry in libxml2 dict
+        if self._path_matcher is not None:
+            self._path_matcher.reset(self._doc)
+        self._c_discard_pending = NULL
+        self._discard_pending_proxy = None
         return 0
 
     cdef int startNode(self, xmlNode* c_node) except -1:
         cdef xmlNs* c_ns
         cdef int ns_count = 0
+        cdef bint matches
         if self._event_filter & ITERPARSE_FILTER_START_NS:
             ns_count = _appendStartNsEvents(c_node, self._events)
         elif self._event_filter & ITERPARSE_FILTER_END_NS:
@@ -137,7 +338,12 @@ cdef class _IterparseContext(_ParserContext):
             self._ns_stack.append(ns_count)
         if self._root is None:
             self._root = self._doc.getroot()
-        if self._matcher is None or self._matcher.matches(c_node):
+        if self._path_matcher is not None:
+            self._discardPending()
+            matches = self._path_matcher.start(c_node)
+        else:
+            matches = self._matcher is None or self._matcher.matches(c_node)
+        if matches:
             node = _elementFactory(self._doc, c_node)
             if self._event_filter & ITERPARSE_FILTER_END:
                 self._node_stack.append(node)
@@ -148,8 +354,20 @@ cdef class _IterparseContext(_ParserContext):
     cdef int endNode(self, xmlNode* c_node) except -1:
         cdef xmlNs* c_ns
         cdef int ns_count
+        cdef int path_flags
+        cdef bint matches
+        if self._path_matcher is not None:
+            self._discardPending()
+            path_flags = self._path_matcher.end()
+            if path_flags & STREAM_PATH_DISCARD:
+                # the parser may still append text to its parent's last
+                # child, so it is removed at the next element event
+                self._c_discard_pending = c_node
+            matches = path_flags & STREAM_PATH_MATCHED
+        else:
+            matches = self._matcher is None or self._matcher.matches(c_node)
         if self._event_filter & ITERPARSE_FILTER_END:
-            if self._matcher is None or self._matcher.matches(c_node):
+            if matches:
                 if self._event_filter & (ITERPARSE_FILTER_START |
                                          ITERPARSE_FILTER_START_NS |
                                          ITERPARSE_FILTER_END_NS):
@@ -168,6 +386,37 @@ cdef class _IterparseContext(_ParserContext):
                     self._events.append(event)
         return 0
 
+    cdef int _discardPending(self) except -1:
+        u"""Remove the last complete element that did not match the path.
+        """
+        cdef xmlNode* c_node = self._c_discard_pending
+        cdef xmlNode* c_top
+        if c_node is NULL:
+            return 0
+        self._c_discard_pending = NULL
+        if self._discard_pending_proxy is not None:
+            element, self._discard_pending_proxy = \
+                self._discard_pending_proxy, None
+            c_top = c_node.parent
+            while c_top is not NULL and _isElement(c_top):
+                c_top = c_top.parent
+            if (<_Element>element)._doc is not self._doc or c_top is NULL:
+                # removed or moved from Python in the meantime, the
+                # proxy takes care of freeing it
+                return 0
+        _removeNode(self._doc, c_node)
+        return 0
+
+    cdef int _protectDiscardPending(self) except -1:
+        u"""Keep the pending element alive while Python code can access the
+        tree between two parser calls.
+        """
+        if self._c_discard_pending is not NULL and \
+                self._discard_pending_proxy is None:
+            self._discard_pending_proxy = _elementFactory(
+                self._doc, self._c_discard_pending)
+        return 0
+
     cdef int pushEvent(self, event, xmlNode* c_node) except -1:
         cdef _Element root
         if self._root is None:
@@ -183,6 +432,35 @@ cdef class _IterparseContext(_ParserContext):
             tree.xmlFreeDoc(self._c_ctxt.myDoc)
             self._c_ctxt.myDoc = NULL
 
+    cdef object _handleParseResult(self, _BaseParser parser,
+                                   xmlDoc* result, filename):
+        u"""The document is referenced by the collected events, so it must
+        not be freed here, not even if it turns out to be broken.
+        """
+        cdef xmlDoc* c_doc
+        cdef bint recover
+        if self._doc is None:
+            return _ParserContext._handleParseResult(
+                self, parser, result, filename)
+        c_doc = self._doc._c_doc
+        if self._c_ctxt.myDoc is c_doc:
+            self._c_ctxt.myDoc = NULL
+        if result is not NULL and result is c_doc:
+            recover = parser._parse_options & xmlparser.XML_PARSE_RECOVER
+            __GLOBAL_PARSER_CONTEXT.initDocDict(c_doc)
+            if self._has_raised():
+                self._raise_if_stored()
+            if not _isWellFormedResult(self, self._c_ctxt, recover):
+                _raiseParseError(self._c_ctxt, filename, self._error_log)
+            if c_doc.encoding is NULL:
+                c_doc.encoding = tree.xmlStrdup(<unsigned char*>"UTF-8")
+            if self._validator is not None and \
+                   self._validator._add_default_attributes:
+                self._validator.inject_default_attributes(c_doc)
+            return self._doc
+        # raises the parse error
+        return _ParserContext._handleParseResult(self, parser, NULL, filename)
+
 
 cdef inline void _pushSaxStartDocument(_IterparseContext context,
                                        xmlDoc* c_doc):
@@ -209,6 +487,8 @@ cdef inline void _pushSaxStartEvent(_IterparseContext context,
 cdef inline void _pushSaxEndEvent(_IterparseContext context,
                                   xmlNode* c_node):
     try:
+        if context._c_ctxt.html:
+            _fixHtmlDictNodeNames(context._c_ctxt.dict, c_node)
         context.endNode(c_node)
     except:
         if context._c_ctxt.errNo == xmlerror.XML_ERR_OK:
@@ -226,7 +506,7 @@ cdef inline void _pushSaxEvent(_IterparseContext context,
         context._c_ctxt.disableSAX = 1
         context._store_raised()
 
-cdef void _iterparseSaxStartDocument(void* ctxt):
+cdef void _iterparseSaxStartDocument(void* ctxt) with gil:
     cdef xmlparser.xmlParserCtxt* c_ctxt
     c_ctxt = <xmlparser.xmlParserCtxt*>ctxt
     context = <_IterparseContext>c_ctxt._private
@@ -240,7 +520,7 @@ cdef void _iterparseSaxStartDocument(void* ctxt):
 cdef void _iterparseSaxStart(void* ctxt, const_xmlChar* localname, const_xmlChar* prefix,
                              const_xmlChar* URI, int nb_namespaces, const_xmlChar** namespaces,
                              int nb_attributes, int nb_defaulted,
-                             const_xmlChar** attributes):
+                             const_xmlChar** attributes) with gil:
     cdef xmlparser.xmlParserCtxt* c_ctxt
     cdef _IterparseContext context
     c_ctxt = <xmlparser.xmlParserCtxt*>ctxt
@@ -252,7 +532,7 @@ cdef void _iterparseSaxStart(void* ctxt, const_xmlChar* localname, const_xmlChar
     _pushSaxStartEvent(context, c_ctxt.node)
 
 cdef void _iterparseSaxEnd(void* ctxt, const_xmlChar* localname, const_xmlChar* prefix,
-                           const_xmlChar* URI):
+                           const_xmlChar* URI) with gil:
     cdef xmlparser.xmlParserCtxt* c_ctxt
     cdef _IterparseContext context
     c_ctxt = <xmlparser.xmlParserCtxt*>ctxt
@@ -260,7 +540,7 @@ cdef void _iterparseSaxEnd(void* ctxt, const_xmlChar* localname, const_xmlChar*
     _pushSaxEndEvent(context, c_ctxt.node)
     context._origSaxEnd(ctxt, localname, prefix, URI)
 
-cdef void _iterparseSaxStartNoNs(void* ctxt, const_xmlChar* name, const_xmlChar** attributes):
+cdef void _iterparseSaxStartNoNs(void* ctxt, const_xmlChar* name, const_xmlChar** attributes) with gil:
     cdef xmlparser.xmlParserCtxt* c_ctxt
     cdef _IterparseContext context
     c_ctxt = <xmlparser.xmlParserCtxt*>ctxt
@@ -268,7 +548,7 @@ cdef void _iterparseSaxStartNoNs(void* ctxt, const_xmlChar* name, const_xmlChar*
     context._origSaxStartNoNs(ctxt, name, attributes)
     _pushSaxStartEvent(context, c_ctxt.node)
 
-cdef void _iterparseSaxEndNoNs(void* ctxt, const_xmlChar* name):
+cdef void _iterparseSaxEndNoNs(void* ctxt, const_xmlChar* name) with gil:
     cdef xmlparser.xmlParserCtxt* c_ctxt
     cdef _IterparseContext context
     c_ctxt = <xmlparser.xmlParserCtxt*>ctxt
@@ -276,7 +556,7 @@ cdef void _iterparseSaxEndNoNs(void* ctxt, const_xmlChar* name):
     _pushSaxEndEvent(context, c_ctxt.node)
     context._origSaxEndNoNs(ctxt, name)
 
-cdef void _iterparseSaxComment(void* ctxt, const_xmlChar* text):
+cdef void _iterparseSaxComment(void* ctxt, const_xmlChar* text) with gil:
     cdef xmlNode* c_node
     cdef xmlparser.xmlParserCtxt* c_ctxt
     cdef _IterparseContext context
@@ -287,7 +567,7 @@ cdef void _iterparseSaxComment(void* ctxt, const_xmlChar* text):
     if c_node is not NULL:
         _pushSaxEvent(context, u"comment", c_node)
 
-cdef void _iterparseSaxPI(void* ctxt, const_xmlChar* target, const_xmlChar* data):
+cdef void _iterparseSaxPI(void* ctxt, const_xmlChar* target, const_xmlChar* data) with gil:
     cdef xmlNode* c_node
     cdef xmlparser.xmlParserCtxt* c_ctxt
     cdef _IterparseContext context
@@ -312,7 +592,7 @@ cdef inline xmlNode* _iterparseFindLastNode(xmlparser.xmlParserCtxt* c_ctxt):
         return c_ctxt.node.next
 
 cdef class iterparse(_BaseParser):
-    u"""iterparse(self, source, events=("end",), tag=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, remove_blank_text=False, remove_comments=False, remove_pis=False, encoding=None, html=False, huge_tree=False, schema=None)
+    u"""iterparse(self, source, events=("end",), tag=None, path=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, remove_blank_text=False, remove_comments=False, remove_pis=False, encoding=None, html=False, huge_tree=False, schema=None, buffer_size=32768, discard=None)
 
     Incremental parser.
 
@@ -334,6 +614,24 @@ cdef class iterparse(_BaseParser):
     for all elements.  Note that the 'start-ns' and 'end-ns' events are not
     impacted by this restriction.
 
+    Alternatively, the ``path`` argument restricts the 'start' and 'end'
+    events to the elements that match a streamable subset of XPath, e.g.
+    ``/feed/entry[@type='x']/price``.  It supports the child ('/') and
+    descendant ('//') axes, name tests (``name``, ``*``, ``{ns}name``) and
+    attribute predicates (``[@name]``, ``[@name='value']`` and
+    ``[@name!='value']``).  The path is matched while parsing, and the
+    elements that neither match it nor contain or lie within a match are
+    removed from the tree as soon as they are complete.  The path cannot be
+    combined with ``tag`` or with DTD validation.
+
+    Passing ``discard='processed'`` keeps the memory usage constant for
+    large documents.  Once the iteration moves on from an 'end' event, the
+    preceding siblings of the element and of all its ancestors are removed
+    from the tree, so that the tree only holds the path from the root to
+    the current element.  Removed elements are freed unless they are still
+    referenced from Python.  The ``discarded_elements`` property counts the
+    removed elements.
+
     The other keyword arguments in the constructor are mainly based on the
     libxml2 parser configuration.  A DTD will also be loaded if validation or
     attribute default values are requested.
@@ -355,25 +653,48 @@ cdef class iterparse(_BaseParser):
     Other keyword arguments:
      - encoding: override the document encoding
      - schema: an XMLSchema to validate against
+     - buffer_size: size of the chunks read from the source
     """
     cdef object _tag
+    cdef _StreamPathMatcher _path_matcher
     cdef object _events
     cdef readonly object root
     cdef object _source
     cdef object _buffer
+    cdef object _readinto
+    cdef _Element _processed
+    cdef bint _discard_processed
+    cdef readonly Py_ssize_t discarded_elements
     cdef int (*_parse_chunk)(xmlparser.xmlParserCtxt* ctxt,
                              const_char* chunk, int size, int terminate) nogil
     cdef bint _close_source_after_read
 
-    def __init__(self, source, events=(u"end",), *, tag=None,
+    def __init__(self, source, events=(u"end",), *, tag=None, path=None,
                  attribute_defaults=False, dtd_validation=False,
                  load_dtd=False, no_network=True, remove_blank_text=False,
                  compact=True, resolve_entities=True, remove_comments=False,
                  remove_pis=False, strip_cdata=True, encoding=None,
-                 html=False, huge_tree=False, XMLSchema schema=None):
+                 html=False, huge_tree=False, XMLSchema schema=None,
+                 buffer_size=__READ_BUFFER_SIZE, discard=None):
         cdef _IterparseContext context
         cdef char* c_encoding
         cdef int parse_options
+        if discard is None:
+            self._discard_processed = False
+        elif discard == u'processed':
+            if u'end' not in events:
+                raise ValueError, \
+                    u"discard='processed' requires 'end' events"
+            self._discard_processed = True
+        else:
+            raise ValueError, u"invalid discard mode '%s'" % discard
+        if path is not None:
+            if tag is not None:
+                raise ValueError, u"'tag' and 'path' cannot be used together"
+            if dtd_validation:
+                raise ValueError, \
+                    u"'path' cannot be used with DTD validation"
+            self._path_matcher = _StreamPathMatcher(path)
         if not hasattr(source, 'read'):
             filename = _encodeFilename(source)
             if not python.IS_PYTHON3:
@@ -417,7 +738,7 @@ cdef class iterparse(_BaseParser):
 
         _BaseParser.__init__(self, parse_options, html, schema,
                              remove_comments, remove_pis, strip_cdata,
-                             None, filename, encoding)
+                             None, filename, encoding, buffer_size)
 
         if self._for_html:
             self._parse_chunk = htmlparser.htmlParseChunk
@@ -454,10 +775,14 @@ cdef class iterparse(_BaseParser):
         cdef _IterparseContext context
         context = _IterparseContext()
         context._setEventFilter(self._events, self._tag)
+        context._path_matcher = self._path_matcher
         return context
 
     cdef _close_source(self):
-        if self._source is None or not self._close_source_after_read:
+        if self._source is None:
+            return
+        if not self._close_source_after_read:
+            self._source = None
             return
         try:
             close = self._source.close
@@ -476,6 +801,47 @@ cdef class iterparse(_BaseParser):
 
     def __next__(self):
         cdef _IterparseContext context = <_IterparseContext>self._push_parser_context
+        if not self._prepare_events(context):
+            raise StopIteration
+        item = context._events[context._event_index]
+        context._event_index += 1
+        if self._discard_processed and item[0] == u'end':
+            self._processed = item[1]
+        return item
+
+    def read_events_batch(self, Py_ssize_t max_events=1000):
+        u"""read_events_batch(self, max_events=1000)
+
+        Return a list of up to ``max_events`` (event, element) tuples.
+        This avoids the per-event overhead of the iterator protocol in
+        tight loops.  The list can be shorter than requested if the parser
+        needs to read more data.  An empty list is returned at the end.
+        """
+        cdef _IterparseContext context = <_IterparseContext>self._push_parser_context
+        cdef Py_ssize_t start, end, i
+        if max_events < 1:
+            raise ValueError, u"max_events must be positive"
+        if not self._prepare_events(context):
+            return []
+        start = context._event_index
+        end = len(context._events)
+        if end - start > max_events:
+            end = start + max_events
+        batch = context._events[start:end]
+        context._event_index = end
+        if self._discard_processed:
+            for i from end - start > i >= 0:
+                if batch[i][0] == u'end':
+                    self._processed = batch[i][1]
+                    break
+        return batch
+
+    cdef bint _prepare_events(self, _IterparseContext context) except -1:
+        u"""Discard processed elements and read events if none are left.
+        Returns False at the end of the input.
+        """
+        if self._processed is not None:
+            self._discard_preceding(context._doc)
         events = context._events
         if len(events) <= context._event_index:
             del events[:]
@@ -484,10 +850,37 @@ cdef class iterparse(_BaseParser):
                 self._read_more_events(context)
             if not events:
                 self.root = context._root
-                raise StopIteration
-        item = events[context._event_index]
-        context._event_index += 1
-        return item
+                return 0
+        return 1
+
+    cdef int _discard_preceding(self, _Document doc) except -1:
+        u"""Remove the preceding siblings of the last processed element and
+        of its ancestors.  Text content is kept.
+        """
+        cdef xmlNode* c_node
+        cdef xmlNode* c_sibling
+        cdef xmlNode* c_prev
+        cdef xmlNode* c_child
+        element, self._processed = self._processed, None
+        if (<_Element>element)._doc is not doc:
+            # moved to a different document
+            return 0
+        c_node = (<_Element>element)._c_node
+        # only remove preceding nodes, the parser may still append text
+        # to the last child of each ancestor
+        while c_node.parent is not NULL and _isElement(c_node.parent):
+            c_sibling = c_node.prev
+            while c_sibling is not NULL:
+                c_prev = c_sibling.prev
+                if _isElement(c_sibling):
+                    c_child = c_sibling
+                    tree.BEGIN_FOR_EACH_ELEMENT_FROM(c_sibling, c_child, 1)
+                    self.discarded_elements += 1
+                    tree.END_FOR_EACH_ELEMENT_FROM(c_child)
+                    _removeNode(doc, c_sibling)
+                c_sibling = c_prev
+            c_node = c_node.parent
+        return 0
 
     cdef _read_more_events(self, _IterparseContext context):
         cdef stdio.FILE* c_stream
@@ -498,25 +891,43 @@ cdef class iterparse(_BaseParser):
 
         events = context._events
         c_stream = python.PyFile_AsFile(self._source)
+        if c_stream is NULL and self._buffer is None:
+            # read into one reusable buffer if the source supports it
+            try:
+                self._readinto = self._source.readinto
+                self._buffer = python.PyByteArray_FromStringAndSize(
+                    NULL, self._buffer_size)
+            except (AttributeError, NotImplementedError):
+                self._readinto = None
         while not events:
             if c_stream is NULL:
-                data = self._source.read(__ITERPARSE_CHUNK_SIZE)
-                if not isinstance(data, bytes):
-                    self._close_source()
-                    raise TypeError("reading file objects must return bytes objects")
-                c_data_len = python.PyBytes_GET_SIZE(data)
-                c_data = _cstr(data)
+                if self._readinto is not None:
+                    length = self._readinto(self._buffer)
+                    if length is None:
+                        # non-blocking stream without data, let read()
+                        # deal with it
+                        self._readinto = None
+                        continue
+                    c_data_len = length
+                    c_data = python.PyByteArray_AS_STRING(self._buffer)
+                else:
+                    data = self._source.read(self._buffer_size)
+                    if not isinstance(data, bytes):
+                        self._close_source()
+                        raise TypeError("reading file objects must return bytes objects")
+                    c_data_len = python.PyBytes_GET_SIZE(data)
+                    c_data = _cstr(data)
                 done = (c_data_len == 0)
                 error = self._parse_chunk(pctxt, c_data, c_data_len, done)
             else:
                 if self._buffer is None:
                     self._buffer = python.PyBytes_FromStringAndSize(
-                        NULL, __ITERPARSE_CHUNK_SIZE)
+                        NULL, self._buffer_size)
                 c_data = _cstr(self._buffer)
                 with nogil:
                     c_data_len = stdio.fread(
-                        c_data, 1, __ITERPARSE_CHUNK_SIZE, c_stream)
-                    if c_data_len < __ITERPARSE_CHUNK_SIZE:
+                        c_data, 1, self._buffer_size, c_stream)
+                    if c_data_len < self._buffer_size:
                         if stdio.ferror(c_stream):
                             error = 1
                         elif stdio.feof(c_stream):
@@ -526,8 +937,9 @@ cdef class iterparse(_BaseParser):
                         pctxt, c_data, c_data_len, done)
             if error or done:
                 self._close_source()
-                self._buffer = None
+                self._buffer = self._readinto = None
                 break
+        context._protectDiscardPending()
 
         if not error and context._validator is not None:
             error = not context._validator.isvalid()
@@ -537,6 +949,87 @@ cdef class iterparse(_BaseParser):
             _raiseParseError(pctxt, self._filename, context._error_log)
 
 
+@cython.final
+@cython.internal
+cdef class _PullParserEventIterator:
+    u"""Consumes the events collected by a pull parser.  New events that
+    are fed in while iterating are also returned.
+    """
+    cdef _IterparseContext _context
+
+    def __cinit__(self, _IterparseContext context not None):
+        self._context = context
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        cdef _IterparseContext context = self._context
+        events = context._events
+        if len(events) <= context._event_index:
+            del events[:]
+            context._event_index = 0
+            raise StopIteration
+        item = events[context._event_index]
+        context._event_index += 1
+        return item
+
+
+cdef _ParserContext _newPullParserContext(tuple events, tag):
+    cdef _IterparseContext context = _IterparseContext()
+    context._setEventFilter(events, tag)
+    return context
+
+
+cdef class XMLPullParser(XMLParser):
+    u"""XMLPullParser(self, events=None, *, tag=None, **kwargs)
+
+    XML parser that collects parse events instead of returning them
+    from an iterator.  Data is passed in through the ``feed()`` method
+    and the events that it produced can be read with ``read_events()``.
+    This allows event driven parsing from sources that are not file-like,
+    e.g. network sockets or chunks received from another library.
+
+    The ``events`` and ``tag`` arguments work as for ``iterparse()``,
+    all other keyword arguments are passed on to the ``XMLParser``.
+    Parser targets are not supported.
+    """
+    def __init__(self, events=None, *, tag=None, **kwargs):
+        XMLParser.__init__(self, **kwargs)
+        self._initPullParser(events, tag)
+
+    def read_events(self):
+        u"""read_events(self)
+
+        Returns an iterator over the (event, element) tuples that were
+        collected since the last call.  Events that are read from the
+        iterator are removed from the parser.
+        """
+        return _PullParserEventIterator(
+            <_IterparseContext>self._getPushParserContext())
+
+
+cdef class HTMLPullParser(HTMLParser):
+    u"""HTMLPullParser(self, events=None, *, tag=None, **kwargs)
+
+    HTML parser that collects parse events instead of returning them
+    from an iterator.  See ``XMLPullParser`` for details.  Namespace
+    events are not reported for HTML.
+    """
+    def __init__(self, events=None, *, tag=None, **kwargs):
+        HTMLParser.__init__(self, **kwargs)
+        self._initPullParser(events, tag)
+
+    def read_events(self):
+        u"""read_events(self)
+
+        Returns an iterator over the collected (event, element) tuples,
+        see ``XMLPullParser.read_events()``.
+        """
+        return _PullParserEventIterator(
+            <_IterparseContext>self._getPushParserContext())
+
+
 cdef class iterwalk:
     u"""iterwalk(self, element_or_tree, events=("end",), tag=None)
 
@@ -574,12 +1067,41 @@ cdef class iterwalk:
         return self
 
     def __next__(self):
+        event = self._next_event()
+        if event is None:
+            raise StopIteration
+        return event
+
+    def read_events_batch(self, Py_ssize_t max_events=1000):
+        u"""read_events_batch(self, max_events=1000)
+
+        Return a list of up to ``max_events`` (event, element) tuples.
+        An empty list is returned at the end of the tree.
+        """
+        if max_events < 1:
+            raise ValueError, u"max_events must be positive"
+        self._walk(max_events)
+        batch = self._events[:max_events]
+        del self._events[:max_events]
+        return batch
+
+    cdef object _next_event(self):
+        if not self._events:
+            self._walk(1)
+            if not self._events:
+                return None
+        return self._pop_event(0)
+
+    cdef int _walk(self, Py_ssize_t min_events) except -1:
+        u"""Walk the tree until at least min_events events are collected
+        or the end is reached.
+        """
         cdef xmlNode* c_child
         cdef _Element node
         cdef _Element next_node
         cdef int ns_count = 0
-        if self._events:
-            return self._pop_event(0)
+        if len(self._events) >= min_events:
+            return 0
         if self._matcher is not None and self._index >= 0:
             node = self._node_stack[self._index][0]
             self._matcher.cacheTags(node._doc)
@@ -610,9 +1132,9 @@ cdef class iterwalk:
                     ns_count = _countNsDefs(next_node._c_node)
                 self._node_stack.append( (next_node, ns_count) )
                 self._index += 1
-            if self._events:
-                return self._pop_event(0)
-        raise StopIteration
+            if len(self._events) >= min_events:
+                break
+        return 0
 
     cdef int _start_node(self, _Element node):
         cdef int ns_count
@@ -639,3 +1161,385 @@ cdef class iterwalk:
             for i from 0 <= i < ns_count:
                 self._events.append(event)
         return node
+
+
+############################################################
+## parallel parsing of record-oriented documents
+############################################################
+
+DEF __SHARD_SIZE = 4194304
+
+cdef Py_ssize_t _skipMarkup(const_char* c_data, Py_ssize_t pos,
+                            Py_ssize_t length):
+    u"""Return the position after the markup construct that starts with the
+    '<' at c_data[pos], or -1 if it is not complete in the data.  Handles
+    comments, PIs, the DOCTYPE with its internal subset and start tags.
+    """
+    cdef char c, quote = 0
+    cdef int depth = 0
+    if pos + 4 <= length and cstring_h.strncmp(c_data + pos, "<!--", 4) == 0:
+        pos += 4
+        while pos + 3 <= length:
+            if cstring_h.strncmp(c_data + pos, "-->", 3) == 0:
+                return pos + 3
+            pos += 1
+        return -1
+    if pos + 2 <= length and c_data[pos+1] == c'?':
+        pos += 2
+        while pos + 2 <= length:
+            if c_data[pos] == c'?' and c_data[pos+1] == c'>':
+                return pos + 2
+            pos += 1
+        return -1
+    pos += 1
+    while pos < length:
+        c = c_data[pos]
+        if quote:
+            if c == quote:
+                quote = 0
+        elif c == c'"' or c == c"'":
+            quote = c
+        elif c == c'[':
+            depth += 1
+        elif c == c']':
+            depth -= 1
+        elif c == c'>' and depth <= 0:
+            return pos + 1
+        pos += 1
+    return -1
+
+cdef inline bint _isNameEnd(char c):
+    return c == c'>' or c == c'/' or c == c' ' or c == c'\t' or \
+        c == c'\r' or c == c'\n'
+
+
+@cython.final
+@cython.internal
+cdef class _ShardWorker:
+    u"""Parses shards from a task queue with its own copy of the parser and
+    passes the documents (or the exception) on to a result queue.  Each
+    task gets exactly one result, so the consumer never waits forever.
+
+    The worker keeps no reference to the iterator, so that an abandoned
+    iterator can be collected and stop its workers.
+    """
+    cdef _BaseParser _parser
+    cdef object _tasks
+    cdef object _results
+    cdef object _url
+
+    def __cinit__(self, _BaseParser parser not None, tasks, results, url):
+        self._parser = parser
+        self._tasks = tasks
+        self._results = results
+        self._url = url
+
+    def run(self):
+        cdef _BaseParser parser = None
+        cdef _ExceptionContext copy_error = None
+        cdef _ExceptionContext exc_context
+        cdef _Document doc
+        try:
+            parser = self._parser._copy()
+        except:
+            # report the failure for each task that this worker takes
+            copy_error = _ExceptionContext()
+            copy_error._store_raised()
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            index, data = task
+            doc, exc_context = None, copy_error
+            try:
+                if exc_context is None:
+                    doc = _parseMemoryDocument(data, self._url, parser)
+            except:
+                exc_context = _ExceptionContext()
+                exc_context._store_raised()
+            finally:
+                self._results.put( (index, doc, exc_context) )
+
+
+@cython.final
+@cython.internal
+cdef class _ShardWorkerShutdown:
+    u"""Sends the stop signal to the workers of an iterparse_records
+    iterator once.  Also used as weak reference callback to stop the
+    workers of an abandoned iterator.
+    """
+    cdef object _tasks
+    cdef Py_ssize_t _workers
+
+    def __cinit__(self, tasks, Py_ssize_t workers):
+        self._tasks = tasks
+        self._workers = workers
+
+    def __call__(self, ref=None):
+        tasks, self._tasks = self._tasks, None
+        if tasks is not None:
+            for _ in range(self._workers):
+                tasks.put(None)
+
+
+cdef class iterparse_records:
+    u"""iterparse_records(self, source, tag, parser=None, workers=None, ordered=True, shard_size=4194304)
+
+    Parses a record-oriented document in parallel and generates the record
+    elements, i.e. the children of the root element with the given ``tag``.
+
+    The byte stream is split into shards of about ``shard_size`` bytes in
+    front of a record start tag.  Each shard is parsed as a separate
+    document, which starts with the prologue and the root start tag of the
+    input, by a pool of ``workers`` threads (one per CPU by default) that
+    run libxml2 without holding the GIL.
+
+    The ``tag`` is the qualified name as it appears in the document, e.g.
+    ``record`` or ``db:record``, not the ``{namespace}name`` notation.  It
+    is used to find the split points on the byte level, so the records must
+    not nest and the data must use an ASCII compatible encoding.  A record
+    start tag in a comment or CDATA section would cut the surrounding text.
+
+    By default, the records are generated in document order.  Passing
+    ``ordered=False`` generates the records of each shard as soon as it is
+    parsed.  All records of a shard share one document, which is freed
+    when none of them is referenced any more.
+    """
+    cdef object _source
+    cdef bint _close_source_after_read
+    cdef bint _ordered
+    cdef bint _eof
+    cdef bytes _marker
+    cdef bytes _c_name
+    cdef bytes _c_prefix
+    cdef bytes _head
+    cdef bytes _closing
+    cdef bytes _pending
+    cdef Py_ssize_t _shard_size
+    cdef Py_ssize_t _workers
+    cdef Py_ssize_t _max_in_flight
+    cdef Py_ssize_t _in_flight
+    cdef Py_ssize_t _next_index
+    cdef Py_ssize_t _yield_index
+    cdef dict _done
+    cdef list _records
+    cdef object _tasks
+    cdef object _results
+    cdef _ShardWorkerShutdown _shutdown
+    cdef object _shutdown_ref
+    cdef object __weakref__
+
+    def __init__(self, source, tag, _BaseParser parser=None, *, workers=None,
+                 bint ordered=True, shard_size=__SHARD_SIZE):
+        cdef _ShardWorker worker
+        try:
+            from queue import Queue
+        except ImportError:
+            from Queue import Queue
+        from threading import Thread
+        tag = _utf8(tag)
+        if tag[:1] == b'{':
+            raise ValueError, \
+                u"tag must be given as in the document ('prefix:name')"
+        if b':' in tag:
+            self._c_prefix, self._c_name = tag.split(b':', 1)
+        else:
+            self._c_prefix, self._c_name = None, tag
+        self._marker = b'<' + tag
+        if parser is None:
+            parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
+        if parser.target is not None:
+            raise TypeError, u"parser targets are not supported"
+        self._shard_size = shard_size
+        if self._shard_size < 1:
+            raise ValueError, u"shard size must be positive"
+        if workers is None:
+            self._workers = _defaultParseWorkers()
+        else:
+            self._workers = workers
+            if self._workers < 1:
+                raise ValueError, u"number of workers must be at least 1"
+        self._ordered = ordered
+
+        if not hasattr(source, 'read'):
+            url = _encodeFilenameUTF8(source)
+            source = open(_encodeFilename(source), 'rb')
+            self._close_source_after_read = True
+        else:
+            url = _encodeFilenameUTF8(_getFilenameForFile(source))
+            self._close_source_after_read = False
+        self._source = source
+        self._eof = False
+        self._pending = b''
+
+        self._max_in_flight = self._workers * 2
+        self._in_flight = self._next_index = self._yield_index = 0
+        self._done = {}
+        self._records = []
+        self._tasks = Queue()
+        self._results = Queue()
+        self._shutdown = _ShardWorkerShutdown(self._tasks, self._workers)
+        # stop the workers when an unfinished iterator gets collected
+        self._shutdown_ref = weakref_ref(self, self._shutdown)
+        for _ in range(self._workers):
+            worker = _ShardWorker(parser, self._tasks, self._results, url)
+            thread = Thread(target=worker.run)
+            thread.daemon = True
+            thread.start()
+
+    def __iter__(self):
+        return self
+
+    def close(self):
+        u"""close(self)
+
+        Stops the worker threads and closes the source if it was opened
+        from a filename.  This happens automatically when the iterator is
+        exhausted or raises an exception.
+        """
+        self._eof = True
+        self._in_flight = 0
+        self._done = {}
+        self._records = []
+        self._close_source()
+        if self._shutdown is not None:
+            self._shutdown()
+
+    def __next__(self):
+        cdef _ExceptionContext exc_context
+        cdef _Document doc
+        while not self._records:
+            while not self._eof and self._in_flight < self._max_in_flight:
+                data = self._read_shard()
+                if data is None:
+                    break
+                self._tasks.put( (self._next_index, data) )
+                self._next_index += 1
+                self._in_flight += 1
+            if self._in_flight == 0:
+                self.close()
+                raise StopIteration
+            if self._ordered:
+                while self._yield_index not in self._done:
+                    index, doc, exc_context = self._results.get()
+                    self._done[index] = (doc, exc_context)
+                doc, exc_context = self._done.pop(self._yield_index)
+                self._yield_index += 1
+            else:
+                index, doc, exc_context = self._results.get()
+            self._in_flight -= 1
+            if exc_context is not None:
+                self.close()
+                exc_context._raise_if_stored()
+            self._collect_records(doc)
+        return self._records.pop()
+
+    cdef _collect_records(self, _Document doc):
+        u"Collect the matching root children in reverse order."
+        cdef xmlNode* c_node
+        cdef const_char* c_name = _cstr(self._c_name)
+        c_node = doc._c_doc.children
+        while c_node is not NULL and c_node.type != tree.XML_ELEMENT_NODE:
+            c_node = c_node.next
+        if c_node is NULL:
+            return
+        c_node = c_node.last
+        while c_node is not NULL:
+            if c_node.type == tree.XML_ELEMENT_NODE and \
+                    cstring_h.strcmp(<const_char*>c_node.name, c_name) == 0:
+                if self._c_prefix is None:
+                    if c_node.ns is NULL or c_node.ns.prefix is NULL:
+                        self._records.append(_elementFactory(doc, c_node))
+                elif c_node.ns is not NULL and c_node.ns.prefix is not NULL and \
+                        cstring_h.strcmp(<const_char*>c_node.ns.prefix,
+                                         _cstr(self._c_prefix)) == 0:
+                    self._records.append(_elementFactory(doc, c_node))
+            c_node = c_node.prev
+
+    cdef object _read_shard(self):
+        u"""Read the next shard from the source.  Returns None at the end.
+        """
+        cdef Py_ssize_t pos
+        while True:
+            if self._head is None:
+                pos = self._find_head()
+                if pos >= 0:
+                    continue
+            else:
+                pos = self._find_split()
+                if pos > 0:
+                    data = self._head + self._pending[:pos] + self._closing
+                    self._pending = self._pending[pos:]
+                    return data
+            if not self._read_more():
+                # the last shard keeps the original end of the document
+                self._eof = True
+                self._close_source()
+                if self._head is None:
+                    data, self._pending = self._pending, b''
+                    return data or None
+                data, self._pending = self._head + self._pending, b''
+                return data
+
+    cdef bint _read_more(self) except -1:
+        if self._source is None:
+            return 0
+        data = self._source.read(self._shard_size)
+        if not isinstance(data, bytes):
+            self._close_source()
+            raise TypeError("reading file objects must return bytes objects")
+        if not data:
+            return 0
+        self._pending += data
+        return 1
+
+    cdef Py_ssize_t _find_head(self) except -2:
+        u"""Split the prologue and the root start tag off the pending data.
+        """
+        cdef const_char* c_data = _cstr(self._pending)
+        cdef Py_ssize_t length = len(self._pending)
+        cdef Py_ssize_t pos = 0, start, end
+        while True:
+            while pos < length and c_data[pos] != c'<':
+                pos += 1
+            if pos + 1 >= length:
+                return -1
+            end = _skipMarkup(c_data, pos, length)
+            if end < 0:
+                return -1
+            if c_data[pos+1] != c'?' and c_data[pos+1] != c'!':
+                break
+            pos = end
+        start = pos + 1
+        pos = start
+        while pos < end and not _isNameEnd(c_data[pos]):
+            pos += 1
+        self._closing = b'</' + self._pending[start:pos] + b'>'
+        self._head = self._pending[:end]
+        self._pending = self._pending[end:]
+        return end
+
+    cdef Py_ssize_t _find_split(self):
+        u"""Find the last record start tag once the pending data holds a
+        complete shard.  Returns 0 if the shard cannot be split yet.
+        """
+        cdef Py_ssize_t pos, end = len(self._pending)
+        cdef Py_ssize_t marker_len = len(self._marker)
+        cdef const_char* c_data = _cstr(self._pending)
+        if end < self._shard_size:
+            return 0
+        while True:
+            pos = self._pending.rfind(self._marker, 0, end)
+            if pos <= 0:
+                return 0
+            if pos + marker_len < len(self._pending) and \
+                    _isNameEnd(c_data[pos + marker_len]):
+                return pos
+            end = pos
+
+    cdef _close_source(self):
+        if self._source is None:
+            return
+        source, self._source = self._source, None
+        if self._close_source_after_read:
+            source.close()
@@ -15,7 +15,7 @@ __all__ = [
     'ElementNamespaceClassLookup', 'ElementTree', 'Entity', 'EntityBase',
     'Error', 'ErrorDomains', 'ErrorLevels', 'ErrorTypes', 'Extension',
     'FallbackElementClassLookup', 'FunctionNamespace', 'HTML',
-    'HTMLParser', 'LIBXML_COMPILED_VERSION', 'LIBXML_VERSION',
+    'HTMLParser', 'HTMLPullParser', 'LIBXML_COMPILED_VERSION', 'LIBXML_VERSION',
     'LIBXSLT_COMPILED_VERSION', 'LIBXSLT_VERSION', 'LXML_VERSION',
     'LxmlError', 'LxmlRegistryError', 'LxmlSyntaxError',
     'NamespaceRegistryError', 'PI', 'PIBase', 'ParseError',
@@ -24,19 +24,24 @@ __all__ = [
     'RelaxNGError', 'RelaxNGErrorTypes', 'RelaxNGParseError',
     'RelaxNGValidateError', 'Resolver', 'Schematron', 'SchematronError',
     'SchematronParseError', 'SchematronValidateError', 'SerialisationError',
-    'SubElement', 'TreeBuilder', 'XInclude', 'XIncludeError', 'XML',
-    'XMLDTDID', 'XMLID', 'XMLParser', 'XMLSchema', 'XMLSchemaError',
-    'XMLSchemaParseError', 'XMLSchemaValidateError', 'XMLSyntaxError',
+    'Serializer', 'SubElement', 'TreeBuilder', 'XInclude', 'XIncludeError', 'XML',
+    'XMLDTDID', 'XMLID', 'XMLParser', 'XMLPullParser', 'XMLSchema',
+    'XMLSchemaError', 'XMLSchemaParseError', 'XMLSchemaValidateError',
+    'XMLSyntaxError',
     'XMLTreeBuilder', 'XPath', 'XPathDocumentEvaluator', 'XPathError',
     'XPathEvalError', 'XPathEvaluator', 'XPathFunctionError', 'XPathResultError',
     'XPathSyntaxError', 'XSLT', 'XSLTAccessControl', 'XSLTApplyError',
     'XSLTError', 'XSLTExtension', 'XSLTExtensionError', 'XSLTParseError',
-    'XSLTSaveError', 'cleanup_namespaces', 'clear_error_log', 'dump',
+    'XSLTSaveError', 'c14n_digest', 'cleanup_namespaces', 'clear_error_log',
+    'clear_xpath_cache', 'clear_xslt_cache', 'dump',
     'fromstring', 'fromstringlist', 'get_default_parser', 'iselement',
-    'iterparse', 'iterwalk', 'parse', 'parseid', 'register_namespace',
-    'set_default_parser', 'set_element_class_lookup', 'strip_attributes',
-    'strip_elements', 'strip_tags', 'tostring', 'tostringlist', 'tounicode',
-    'use_global_python_log'
+    'iterparse', 'iterparse_records', 'iterwalk', 'parse', 'parse_all',
+    'parse_mmap', 'parseid', 'parser_context_pool_info', 'register_namespace',
+    'set_default_parser', 'set_element_class_lookup',
+    'set_parser_context_pool_size', 'set_xpath_cache_size',
+    'set_xslt_cache_size', 'strip_attributes',
+    'strip_elements', 'strip_tags', 'tostring', 'tostring_many', 'tostringlist', 'tounicode',
+    'use_global_python_log', 'xpath_cache_info', 'xslt_cache_info'
     ]
 
 cimport cython
@@ -69,17 +74,37 @@ except AttributeError:
     # Python 3
     _unicode = __builtin__.str
 
+# file types that serialisation writes through their OS file descriptor
+cdef tuple _OS_FILE_TYPES
+try:
+    _OS_FILE_TYPES = (__builtin__.file,)
+except AttributeError:
+    # Python 3
+    _OS_FILE_TYPES = ()
+
 del __builtin__
 
 cdef object os_path_abspath
 from os.path import abspath as os_path_abspath
 
+cdef object os_stat
+from os import stat as os_stat
+
+cdef object weakref_ref
+from weakref import ref as weakref_ref
+
 cdef object BytesIO, StringIO
 try:
     from io import BytesIO, StringIO
 except (ImportError, AttributeError):
     from StringIO import StringIO, StringIO as BytesIO
 
+try:
+    from io import FileIO, BufferedWriter, BufferedRandom
+    _OS_FILE_TYPES += (FileIO, BufferedWriter, BufferedRandom)
+except ImportError:
+    pass
+
 cdef object _elementpath
 from lxml import _elementpath
 
@@ -92,6 +117,12 @@ import re
 cdef object gzip
 import gzip
 
+cdef object hashlib
+import hashlib
+
+cdef object array
+import array
+
 cdef object ITER_EMPTY = iter(())
 
 cdef object EMPTY_READ_ONLY_DICT = python.PyDictProxy_New({})
@@ -789,6 +820,8 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
         _removeText(c_node.next)
         # remove all attributes
         c_attr = c_node.properties
+        if c_attr is not NULL:
+            _noteRemovedNodes(c_node.doc, 0)
         while c_attr is not NULL:
             c_attr_next = c_attr.next
             tree.xmlRemoveProp(c_attr)
@@ -1424,7 +1457,7 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
         """
         if isinstance(path, QName):
             path = (<QName>path).text
-        return _elementpath.find(self, path, namespaces)
+        return _elementPathFind(self, path, namespaces)
 
     def findtext(self, path, default=None, namespaces=None):
         u"""findtext(self, path, default=None, namespaces=None)
@@ -1437,7 +1470,7 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
         """
         if isinstance(path, QName):
             path = (<QName>path).text
-        return _elementpath.findtext(self, path, default, namespaces)
+        return _elementPathFindText(self, path, default, namespaces)
 
     def findall(self, path, namespaces=None):
         u"""findall(self, path, namespaces=None)
@@ -1450,7 +1483,7 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
         """
         if isinstance(path, QName):
             path = (<QName>path).text
-        return _elementpath.findall(self, path, namespaces)
+        return _elementPathFindAll(self, path, namespaces)
 
     def iterfind(self, path, namespaces=None):
         u"""iterfind(self, path, namespaces=None)
@@ -1463,7 +1496,7 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
         """
         if isinstance(path, QName):
             path = (<QName>path).text
-        return _elementpath.iterfind(self, path, namespaces)
+        return _elementPathIterFind(self, path, namespaces)
 
     def xpath(self, _path, *, namespaces=None, extensions=None,
               smart_strings=True, **_variables):
@@ -1476,6 +1509,20 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
                                           smart_strings=smart_strings)
         return evaluator(_path, **_variables)
 
+    def xpath_iter(self, _path, *, namespaces=None, extensions=None,
+                   smart_strings=True, **_variables):
+        u"""xpath_iter(self, _path, namespaces=None, extensions=None, smart_strings=True, **_variables)
+
+        Evaluate an xpath expression using the element as context node and
+        return an iterator over the resulting node-set.  See
+        ``XPath.iter()``.
+        """
+        cdef XPathElementEvaluator evaluator
+        evaluator = XPathElementEvaluator(self, namespaces=namespaces,
+                                          extensions=extensions,
+                                          smart_strings=smart_strings)
+        return evaluator._iter(_path, _variables)
+
 
 cdef extern from "etree_defs.h":
     # macro call to 't->tp_new()' for fast instantiation
@@ -1917,6 +1964,32 @@ cdef public class _ElementTree [ type LxmlElementTreeType,
                     write_declaration, 1, pretty_print, with_tail,
                     is_standalone, compression)
 
+    def write_into(self, buffer, *, encoding=None, method=u"xml",
+                   pretty_print=False, xml_declaration=None, with_tail=True,
+                   standalone=None, doctype=None):
+        u"""write_into(self, buffer, encoding=None, method="xml",
+                       pretty_print=False, xml_declaration=None, with_tail=True,
+                       standalone=None, doctype=None)
+
+        Write the tree directly into a writable buffer, starting at its
+        first byte, and return the number of bytes written.
+
+        A ``bytearray`` is resized in place when it is too small, other
+        buffers (e.g. a ``memoryview`` or ``mmap``) raise a ValueError if
+        the data does not fit.  The options have the same meaning as for
+        ``tostring()``.  C14N and unicode serialisation are not supported.
+        """
+        cdef bint write_declaration
+        cdef int is_standalone
+        self._assertHasRoot()
+        if method == 'c14n':
+            raise ValueError("Cannot write C14N output into a buffer")
+        encoding, write_declaration, is_standalone = _serialisationOptions(
+            encoding, xml_declaration, standalone)
+        return _tobuffer(buffer, self._context_node, encoding, doctype,
+                         method, write_declaration, 1, pretty_print,
+                         with_tail, is_standalone)
+
     def getpath(self, _Element element not None):
         u"""getpath(self, element)
 
@@ -2093,6 +2166,21 @@ cdef public class _ElementTree [ type LxmlElementTreeType,
                                            smart_strings=smart_strings)
         return evaluator(_path, **_variables)
 
+    def xpath_iter(self, _path, *, namespaces=None, extensions=None,
+                   smart_strings=True, **_variables):
+        u"""xpath_iter(self, _path, namespaces=None, extensions=None, smart_strings=True, **_variables)
+
+        Evaluate an xpath expression in context of the document, like
+        ``xpath()``, and return an iterator over the resulting node-set.
+        See ``XPath.iter()``.
+        """
+        cdef XPathDocumentEvaluator evaluator
+        self._assertHasRoot()
+        evaluator = XPathDocumentEvaluator(self, namespaces=namespaces,
+                                           extensions=extensions,
+                                           smart_strings=smart_strings)
+        return evaluator._iter(_path, _variables)
+
     def xslt(self, _xslt, extensions=None, access_control=None, **_kw):
         u"""xslt(self, _xslt, extensions=None, access_control=None, **_kw)
 
@@ -2170,6 +2258,11 @@ cdef public class _ElementTree [ type LxmlElementTreeType,
 
         C14N write of document. Always writes UTF-8.
 
+        The output is streamed to a filename, file descriptor or file-like
+        object, without building the canonical document in memory.  The
+        target can also be a ``hashlib`` style object with an ``update()``
+        method, e.g. to compute a digest of the canonical form.
+
         The ``compression`` option enables GZip compression level 1-9.
 
         The ``inclusive_ns_prefixes`` should be a list of namespace strings
@@ -2249,6 +2342,8 @@ cdef class _Attrib:
     def clear(self):
         _assertValidNode(self._element)
         cdef xmlNode* c_node = self._element._c_node
+        if c_node.properties is not NULL:
+            _noteRemovedNodes(c_node.doc, 0)
         while c_node.properties is not NULL:
             tree.xmlRemoveProp(c_node.properties)
 
@@ -2979,7 +3074,9 @@ def fromstring(text, _BaseParser parser=None, *, base_url=None):
     u"""fromstring(text, parser=None, base_url=None)
 
     Parses an XML document or fragment from a string.  Returns the
-    root node (or the result returned by a parser target).
+    root node (or the result returned by a parser target).  Objects that
+    support the buffer protocol, such as ``bytearray`` or ``memoryview``,
+    are parsed in place without copying them.
 
     To override the default parser with a different parser you can pass it to
     the ``parser`` keyword argument.
@@ -3034,11 +3131,13 @@ def dump(_Element elem not None, *, bint pretty_print=True, with_tail=True):
 def tostring(element_or_tree, *, encoding=None, method=u"xml",
              xml_declaration=None, bint pretty_print=False, bint with_tail=True,
              standalone=None, doctype=None,
-             bint exclusive=False, bint with_comments=True, inclusive_ns_prefixes=None):
+             bint exclusive=False, bint with_comments=True, inclusive_ns_prefixes=None,
+             into=None):
     u"""tostring(element_or_tree, encoding=None, method="xml",
                  xml_declaration=None, pretty_print=False, with_tail=True,
                  standalone=None, doctype=None,
-                 exclusive=False, with_comments=True, inclusive_ns_prefixes=None)
+                 exclusive=False, with_comments=True, inclusive_ns_prefixes=None,
+                 into=None)
 
     Serialize an element to an encoded string representation of its XML
     tree.
@@ -3076,11 +3175,19 @@ def tostring(element_or_tree, *, encoding=None, method=u"xml",
     You can prevent the tail text of the element from being serialised
     by passing the boolean ``with_tail`` option.  This has no impact
     on the tail text of children, which will always be serialised.
+
+    The ``into`` option takes a writable buffer, e.g. a ``bytearray``,
+    and writes the serialised data directly into it, starting at its
+    first byte, instead of building a new byte string.  A bytearray is
+    resized in place to the length of the output, other buffers must be
+    large enough.  The number of bytes written is returned in this case.
     """
     cdef bint write_declaration
     cdef int is_standalone
     # C14N serialisation
     if method == 'c14n':
+        if into is not None:
+            raise ValueError("Cannot write C14N output into a buffer")
         if encoding is not None:
             raise ValueError("Cannot specify encoding with C14N")
         if xml_declaration:
@@ -3088,6 +3195,38 @@ def tostring(element_or_tree, *, encoding=None, method=u"xml",
         return _tostringC14N(element_or_tree, exclusive, with_comments, inclusive_ns_prefixes)
     if not with_comments:
         raise ValueError("Can only discard comments in C14N serialisation")
+    encoding, write_declaration, is_standalone = _serialisationOptions(
+        encoding, xml_declaration, standalone)
+
+    if into is not None:
+        if isinstance(element_or_tree, _Element):
+            return _tobuffer(into, <_Element>element_or_tree, encoding,
+                             doctype, method, write_declaration, 0,
+                             pretty_print, with_tail, is_standalone)
+        elif isinstance(element_or_tree, _ElementTree):
+            return _tobuffer(into, (<_ElementTree>element_or_tree)._context_node,
+                             encoding, doctype, method, write_declaration, 1,
+                             pretty_print, with_tail, is_standalone)
+        raise TypeError, u"Type '%s' cannot be serialized." % \
+            python._fqtypename(element_or_tree)
+    if isinstance(element_or_tree, _Element):
+        return _tostring(<_Element>element_or_tree, encoding, doctype, method,
+                         write_declaration, 0, pretty_print, with_tail,
+                         is_standalone)
+    elif isinstance(element_or_tree, _ElementTree):
+        return _tostring((<_ElementTree>element_or_tree)._context_node,
+                         encoding, doctype, method, write_declaration, 1,
+                         pretty_print, with_tail, is_standalone)
+    else:
+        raise TypeError, u"Type '%s' cannot be serialized." % \
+            python._fqtypename(element_or_tree)
+
+cdef tuple _serialisationOptions(encoding, xml_declaration, standalone):
+    u"""Return the effective (encoding, write_declaration, is_standalone)
+    for the serialisation options of tostring().
+    """
+    cdef bint write_declaration
+    cdef int is_standalone
     if encoding is _unicode or (encoding is not None and encoding.upper() == 'UNICODE'):
         if xml_declaration:
             raise ValueError, \
@@ -3110,18 +3249,62 @@ def tostring(element_or_tree, *, encoding=None, method=u"xml",
     else:
         write_declaration = 1
         is_standalone = 0
+    return encoding, write_declaration, is_standalone
 
-    if isinstance(element_or_tree, _Element):
-        return _tostring(<_Element>element_or_tree, encoding, doctype, method,
-                         write_declaration, 0, pretty_print, with_tail,
-                         is_standalone)
-    elif isinstance(element_or_tree, _ElementTree):
-        return _tostring((<_ElementTree>element_or_tree)._context_node,
-                         encoding, doctype, method, write_declaration, 1,
-                         pretty_print, with_tail, is_standalone)
-    else:
-        raise TypeError, u"Type '%s' cannot be serialized." % \
-            python._fqtypename(element_or_tree)
+def tostring_many(elements, *, encoding=None, method=u"xml",
+                  xml_declaration=None, bint pretty_print=False,
+                  bint with_tail=True, standalone=None, doctype=None,
+                  bint join=False):
+    u"""tostring_many(elements, encoding=None, method="xml",
+                      xml_declaration=None, pretty_print=False, with_tail=True,
+                      standalone=None, doctype=None, join=False)
+
+    Serialize each element or ElementTree in an iterable like
+    ``tostring()`` and return a list of the results.
+
+    If ``join`` is true, a tuple ``(data, offsets)`` is returned instead,
+    where ``data`` is the concatenation of the results and the result for
+    the i-th element is ``data[offsets[i]:offsets[i+1]]``.
+
+    See ``Serializer`` for serialising many elements with the same options
+    repeatedly.
+    """
+    return Serializer(
+        encoding=encoding, method=method, xml_declaration=xml_declaration,
+        pretty_print=pretty_print, with_tail=with_tail,
+        standalone=standalone, doctype=doctype).tostring_many(
+            elements, join=join)
+
+def c14n_digest(elements, algorithm='sha256', *, bint exclusive=True,
+                bint with_comments=False, inclusive_ns_prefixes=None):
+    u"""c14n_digest(elements, algorithm='sha256', exclusive=True,
+                    with_comments=False, inclusive_ns_prefixes=None)
+
+    Compute the digest of the C14N serialisation of each element or
+    ElementTree in an iterable and return a list of the raw digests.
+
+    The canonical output is passed into the hash in chunks while it is
+    generated, so the serialised data is never held in memory completely.
+    The GIL is released during the canonicalisation.
+
+    ``algorithm`` is a name that ``hashlib.new()`` accepts or a
+    constructor of ``hashlib`` style objects.  The other options have the
+    same meaning as for ``tostring(method="c14n")``, but the defaults
+    follow the usual XML-DSig reference transform, i.e. exclusive C14N
+    without comments.
+    """
+    cdef _DigestWriter writer = _DigestWriter()
+    cdef list digests = []
+    # copying a prototype is faster than looking up the algorithm each time
+    prototype = hashlib.new(algorithm) if _isString(algorithm) else None
+    for element_or_tree in elements:
+        if prototype is not None:
+            digest = prototype.copy()
+        else:
+            digest = algorithm()
+        digests.append(_c14nDigest(element_or_tree, writer, digest, exclusive,
+                                   with_comments, inclusive_ns_prefixes))
+    return digests
 
 def tostringlist(element_or_tree, *args, **kwargs):
     u"""tostringlist(element_or_tree, *args, **kwargs)
@@ -3168,8 +3351,9 @@ def tounicode(element_or_tree, *, method=u"xml", bint pretty_print=False,
         raise TypeError, u"Type '%s' cannot be serialized." % \
             type(element_or_tree)
 
-def parse(source, _BaseParser parser=None, *, base_url=None):
-    u"""parse(source, parser=None, base_url=None)
+def parse(source, _BaseParser parser=None, *, base_url=None,
+          buffer_size=None):
+    u"""parse(source, parser=None, base_url=None, buffer_size=None)
 
     Return an ElementTree object loaded with source elements.  If no parser
     is provided as second argument, the default parser is used.
@@ -3180,6 +3364,8 @@ def parse(source, _BaseParser parser=None, *, base_url=None):
     - a file object
     - a file-like object
     - a URL using the HTTP or FTP protocol
+    - an object that supports the buffer protocol, e.g. a ``bytearray``,
+      ``memoryview`` or ``mmap``, which is parsed in place
 
     To parse from a string, use the ``fromstring()`` function instead.
 
@@ -3191,14 +3377,92 @@ def parse(source, _BaseParser parser=None, *, base_url=None):
     The ``base_url`` keyword allows setting a URL for the document
     when parsing from a file-like object.  This is needed when looking
     up external entities (DTD, XInclude, ...) with relative paths.
+
+    The ``buffer_size`` keyword overrides the size of the chunks that the
+    parser reads from a file-like object.
     """
     cdef _Document doc
+    cdef Py_ssize_t c_buffer_size = 0
+    if buffer_size is not None:
+        if buffer_size < 1 or buffer_size > limits.INT_MAX:
+            raise ValueError, u"buffer size must be between 1 and %d" % \
+                limits.INT_MAX
+        c_buffer_size = buffer_size
     try:
-        doc = _parseDocument(source, parser, base_url)
+        doc = _parseDocument(source, parser, base_url, c_buffer_size)
         return _elementTreeFactory(doc, None)
     except _TargetParserResult, result_container:
         return result_container.result
 
+def parse_all(sources, _BaseParser parser=None, *, workers=None):
+    u"""parse_all(sources, parser=None, workers=None)
+
+    Parse a sequence of sources concurrently and return a list of
+    ElementTree objects in the same order.  The sources can be anything
+    that ``parse()`` accepts.
+
+    The ``workers`` argument sets the number of threads that are used.
+    It defaults to the number of CPUs.  Each thread parses with its own
+    copy of the parser, so parsing from file names and URLs can run in
+    parallel.  Parsing from file-like objects calls back into Python and
+    therefore scales less well.
+
+    If parsing fails for any of the sources, the exception of the first
+    failing source is raised after all sources were processed.  Parsers
+    that use a parser target are run sequentially in the calling thread,
+    as the target object cannot be shared between threads.
+    """
+    cdef Py_ssize_t c_workers
+    sources = list(sources)
+    if parser is None:
+        parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
+    if workers is None:
+        c_workers = _defaultParseWorkers()
+    else:
+        c_workers = workers
+        if c_workers < 1:
+            raise ValueError, u"number of workers must be at least 1"
+    if len(sources) < c_workers:
+        c_workers = len(sources)
+    if c_workers <= 1 or parser.target is not None or \
+            not config.ENABLE_THREADING:
+        return [ parse(source, parser) for source in sources ]
+    return _ParallelParseContext(sources, parser).run(c_workers)
+
+def parse_mmap(path, _BaseParser parser=None, *, base_url=None):
+    u"""parse_mmap(path, parser=None, base_url=None)
+
+    Return an ElementTree object loaded from a file that is mapped into
+    memory.  The parser reads the mapped pages directly, so no Python
+    level copy of the file content is made.
+
+    The ``base_url`` defaults to the file path, so that external entities
+    with relative paths are resolved as with ``parse()``.
+    """
+    cdef _Document doc
+    import mmap
+    if base_url is None:
+        base_url = path
+    f = open(path, 'rb')
+    try:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped, let the parser report the error
+            mapping = None
+        try:
+            doc = _parseMemoryDocument(
+                mapping if mapping is not None else b'',
+                _encodeFilenameUTF8(base_url), parser)
+            return _elementTreeFactory(doc, None)
+        except _TargetParserResult, result_container:
+            return result_container.result
+        finally:
+            if mapping is not None:
+                mapping.close()
+    finally:
+        f.close()
+
 
 ################################################################################
 # Include submodules
@@ -3215,6 +3479,7 @@ include "iterparse.pxi"    # incremental XML parsing
 include "xmlid.pxi"        # XMLID and IDDict
 include "xinclude.pxi"     # XInclude
 include "cleanup.pxi"      # Cleanup and recursive element removal functions
+include "elementpath.pxi"  # ElementPath evaluation
 
 
 ################################################################################
@@ -250,6 +250,9 @@ _setupPythonUnicode()
 ## support for file-like objects
 ############################################################
 
+# default size of the chunks that are read from file-like objects
+DEF __READ_BUFFER_SIZE = 32768
+
 @cython.final
 @cython.internal
 cdef class _FileReaderContext:
@@ -257,12 +260,18 @@ cdef class _FileReaderContext:
     cdef object _encoding
     cdef object _url
     cdef object _bytes
+    cdef object _readinto
     cdef _ExceptionContext _exc_context
+    cdef char* _c_bytes
+    cdef Py_ssize_t _bytes_len
     cdef Py_ssize_t _bytes_read
+    cdef Py_ssize_t _buffer_size
     cdef char* _c_url
     cdef bint _close_file_after_read
 
-    def __cinit__(self, filelike, exc_context, url, encoding=None, bint close_file=False):
+    def __cinit__(self, filelike, exc_context, url, encoding=None,
+                  bint close_file=False,
+                  Py_ssize_t buffer_size=__READ_BUFFER_SIZE):
         self._exc_context = exc_context
         self._filelike = filelike
         self._close_file_after_read = close_file
@@ -274,7 +283,17 @@ cdef class _FileReaderContext:
             self._c_url = _cstr(url)
         self._url = url
         self._bytes  = b''
+        self._c_bytes = _cstr(self._bytes)
+        self._bytes_len = 0
         self._bytes_read = 0
+        self._buffer_size = buffer_size
+        # read into one reusable buffer instead of a new string per chunk
+        try:
+            self._readinto = filelike.readinto
+            self._bytes = python.PyByteArray_FromStringAndSize(
+                NULL, buffer_size)
+        except (AttributeError, NotImplementedError):
+            self._readinto = None
 
     cdef _close_file(self):
         if self._filelike is None or not self._close_file_after_read:
@@ -352,37 +371,49 @@ cdef class _FileReaderContext:
         self._close_file()
         return result
 
+    cdef Py_ssize_t _readChunk(self) except -1:
+        u"Read the next chunk from the file and return its length."
+        if self._readinto is not None:
+            length = self._readinto(self._bytes)
+            if length is not None:
+                self._bytes_len = length
+                self._c_bytes = python.PyByteArray_AS_STRING(self._bytes)
+                return self._bytes_len
+            # non-blocking stream without data, let read() deal with it
+            self._readinto = None
+
+        self._bytes = self._filelike.read(self._buffer_size)
+        if not isinstance(self._bytes, bytes):
+            if isinstance(self._bytes, unicode):
+                if self._encoding is None:
+                    self._bytes = (<unicode>self._bytes).encode('utf8')
+                else:
+                    self._bytes = python.PyUnicode_AsEncodedString(
+                        self._bytes, _cstr(self._encoding), NULL)
+            else:
+                self._close_file()
+                raise TypeError, \
+                    u"reading from file-like objects must return byte strings or unicode strings"
+        self._c_bytes = _cstr(self._bytes)
+        self._bytes_len = python.PyBytes_GET_SIZE(self._bytes)
+        return self._bytes_len
+
     cdef int copyToBuffer(self, char* c_buffer, int c_requested):
         cdef int c_byte_count
-        cdef char* c_start
-        cdef Py_ssize_t byte_count, remaining
+        cdef Py_ssize_t remaining
         if self._bytes_read < 0:
             return 0
         try:
             c_byte_count = 0
-            byte_count = python.PyBytes_GET_SIZE(self._bytes)
-            remaining  = byte_count - self._bytes_read
+            remaining  = self._bytes_len - self._bytes_read
             while c_requested > remaining:
-                c_start = _cstr(self._bytes) + self._bytes_read
-                cstring_h.memcpy(c_buffer, c_start, remaining)
+                cstring_h.memcpy(c_buffer, self._c_bytes + self._bytes_read,
+                                 remaining)
                 c_byte_count += remaining
                 c_buffer += remaining
                 c_requested -= remaining
 
-                self._bytes = self._filelike.read(c_requested)
-                if not isinstance(self._bytes, bytes):
-                    if isinstance(self._bytes, unicode):
-                        if self._encoding is None:
-                            self._bytes = (<unicode>self._bytes).encode('utf8')
-                        else:
-                            self._bytes = python.PyUnicode_AsEncodedString(
-                                self._bytes, _cstr(self._encoding), NULL)
-                    else:
-                        self._close_file()
-                        raise TypeError, \
-                            u"reading from file-like objects must return byte strings or unicode strings"
-
-                remaining = python.PyBytes_GET_SIZE(self._bytes)
+                remaining = self._readChunk()
                 if remaining == 0:
                     self._bytes_read = -1
                     self._close_file()
@@ -390,8 +421,8 @@ cdef class _FileReaderContext:
                 self._bytes_read = 0
 
             if c_requested > 0:
-                c_start = _cstr(self._bytes) + self._bytes_read
-                cstring_h.memcpy(c_buffer, c_start, c_requested)
+                cstring_h.memcpy(c_buffer, self._c_bytes + self._bytes_read,
+                                 c_requested)
                 c_byte_count += c_requested
                 self._bytes_read += c_requested
             return c_byte_count
@@ -501,8 +532,11 @@ cdef class _ParserContext(_ResolverContext):
     cdef _ParserSchemaValidationContext _validator
     cdef xmlparser.xmlParserCtxt* _c_ctxt
     cdef python.PyThread_type_lock _lock
+    cdef int _pool_options
+    cdef int _pool_flags
     def __cinit__(self):
         self._c_ctxt = NULL
+        self._pool_flags = -1  # not reusable
         if not config.ENABLE_THREADING:
             self._lock = NULL
         else:
@@ -515,7 +549,10 @@ cdef class _ParserContext(_ResolverContext):
         if config.ENABLE_THREADING and self._lock is not NULL:
             python.PyThread_free_lock(self._lock)
         if self._c_ctxt is not NULL:
-            xmlparser.xmlFreeParserCtxt(self._c_ctxt)
+            if self._pool_flags < 0 or __PARSER_CONTEXT_POOL is None or \
+                    not __PARSER_CONTEXT_POOL.release(
+                        self._c_ctxt, self._pool_options, self._pool_flags):
+                xmlparser.xmlFreeParserCtxt(self._c_ctxt)
 
     cdef _ParserContext _copy(self):
         cdef _ParserContext context
@@ -626,11 +663,29 @@ cdef int _raiseParseError(xmlparser.xmlParserCtxt* ctxt, filename,
     else:
         raise XMLSyntaxError(None, xmlerror.XML_ERR_INTERNAL_ERROR, 0, 0)
 
+cdef bint _isWellFormedResult(_ParserContext context,
+                              xmlparser.xmlParserCtxt* c_ctxt,
+                              bint recover) except -1:
+    if context._validator is not None and \
+            not context._validator.isvalid():
+        return 0 # actually not 'valid', but anyway ...
+    elif recover or (c_ctxt.wellFormed and
+                     c_ctxt.lastError.level < xmlerror.XML_ERR_ERROR):
+        return 1
+    elif not c_ctxt.replaceEntities and not c_ctxt.validate \
+             and context is not None:
+        # in this mode, we ignore errors about undefined entities
+        for error in context._error_log.filter_from_errors():
+            if error.type != ErrorTypes.WAR_UNDECLARED_ENTITY and \
+                   error.type != ErrorTypes.ERR_UNDECLARED_ENTITY:
+                return 0
+        return 1
+    return 0
+
 cdef xmlDoc* _handleParseResult(_ParserContext context,
                                 xmlparser.xmlParserCtxt* c_ctxt,
                                 xmlDoc* result, filename,
                                 bint recover) except NULL:
-    cdef bint well_formed
     if result is not NULL:
         __GLOBAL_PARSER_CONTEXT.initDocDict(result)
 
@@ -641,26 +696,7 @@ cdef xmlDoc* _handleParseResult(_ParserContext context,
         c_ctxt.myDoc = NULL
 
     if result is not NULL:
-        if context._validator is not None and \
-                not context._validator.isvalid():
-            well_formed = 0 # actually not 'valid', but anyway ...
-        elif recover or (c_ctxt.wellFormed and
-                         c_ctxt.lastError.level < xmlerror.XML_ERR_ERROR):
-            well_formed = 1
-        elif not c_ctxt.replaceEntities and not c_ctxt.validate \
-                 and context is not None:
-            # in this mode, we ignore errors about undefined entities
-            for error in context._error_log.filter_from_errors():
-                if error.type != ErrorTypes.WAR_UNDECLARED_ENTITY and \
-                       error.type != ErrorTypes.ERR_UNDECLARED_ENTITY:
-                    well_formed = 0
-                    break
-            else:
-                well_formed = 1
-        else:
-            well_formed = 0
-
-        if not well_formed:
+        if not _isWellFormedResult(context, c_ctxt, recover):
             # free broken document
             tree.xmlFreeDoc(result)
             result = NULL
@@ -723,6 +759,83 @@ cdef inline int _fixHtmlDictNodeNames(tree.xmlDict* c_dict,
         c_attr = c_attr.next
     return 0
 
+cdef struct _PooledParserCtxt:
+    xmlparser.xmlParserCtxt* c_ctxt
+    int parse_options
+    int flags
+
+@cython.final
+@cython.internal
+cdef class _ParserContextPool:
+    u"""Keeps the libxml2 parser contexts of discarded parsers so that new
+    parsers with the same configuration can reuse them instead of creating
+    and setting up a new one.
+
+    Contexts are matched by their parse options and the SAX handler
+    changes that the parser configuration applies to them.  They were
+    already reset by the last cleanup() of their _ParserContext.
+    """
+    cdef _PooledParserCtxt* _entries
+    cdef Py_ssize_t _count
+    cdef Py_ssize_t _max_size
+    cdef Py_ssize_t _hits
+    cdef Py_ssize_t _misses
+
+    def __cinit__(self, Py_ssize_t max_size):
+        self._entries = NULL
+        self._count = 0
+        self._max_size = 0
+        self._hits = self._misses = 0
+        self.resize(max_size)
+
+    def __dealloc__(self):
+        self.resize(0)
+        cpython.mem.PyMem_Free(self._entries)
+
+    cdef xmlparser.xmlParserCtxt* take(self, int parse_options, int flags):
+        cdef Py_ssize_t i
+        cdef xmlparser.xmlParserCtxt* c_ctxt
+        if not self._max_size:
+            return NULL
+        for i in range(self._count - 1, -1, -1):
+            if self._entries[i].parse_options == parse_options and \
+                    self._entries[i].flags == flags:
+                c_ctxt = self._entries[i].c_ctxt
+                self._count -= 1
+                self._entries[i] = self._entries[self._count]
+                self._hits += 1
+                return c_ctxt
+        self._misses += 1
+        return NULL
+
+    cdef bint release(self, xmlparser.xmlParserCtxt* c_ctxt,
+                      int parse_options, int flags):
+        if self._count >= self._max_size:
+            return False
+        c_ctxt._private = NULL
+        self._entries[self._count].c_ctxt = c_ctxt
+        self._entries[self._count].parse_options = parse_options
+        self._entries[self._count].flags = flags
+        self._count += 1
+        return True
+
+    cdef int resize(self, Py_ssize_t max_size) except -1:
+        cdef _PooledParserCtxt* entries
+        while self._count > max_size:
+            self._count -= 1
+            xmlparser.xmlFreeParserCtxt(self._entries[self._count].c_ctxt)
+        if max_size:
+            entries = <_PooledParserCtxt*> cpython.mem.PyMem_Realloc(
+                self._entries, max_size * sizeof(_PooledParserCtxt))
+            if entries is NULL:
+                raise MemoryError()
+            self._entries = entries
+        self._max_size = max_size
+        return 0
+
+cdef _ParserContextPool __PARSER_CONTEXT_POOL
+__PARSER_CONTEXT_POOL = _ParserContextPool(16)
+
 @cython.internal
 cdef class _BaseParser:
     cdef ElementClassLookup _class_lookup
@@ -738,14 +851,18 @@ cdef class _BaseParser:
     cdef object _filename
     cdef readonly object target
     cdef object _default_encoding
+    cdef Py_ssize_t _buffer_size
 
     def __init__(self, int parse_options, bint for_html, XMLSchema schema,
                  remove_comments, remove_pis, strip_cdata, target,
-                 filename, encoding):
+                 filename, encoding, Py_ssize_t buffer_size=__READ_BUFFER_SIZE):
         cdef tree.xmlCharEncodingHandler* enchandler
         cdef int c_encoding
         if not isinstance(self, (XMLParser, HTMLParser, iterparse)):
             raise TypeError, u"This class cannot be instantiated"
+        if buffer_size < 1 or buffer_size > limits.INT_MAX:
+            raise ValueError, u"buffer size must be between 1 and %d" % \
+                limits.INT_MAX
 
         self._parse_options = parse_options
         self._filename = filename
@@ -755,6 +872,7 @@ cdef class _BaseParser:
         self._remove_pis = remove_pis
         self._strip_cdata = strip_cdata
         self._schema = schema
+        self._buffer_size = buffer_size
 
         self._resolvers = _ResolverRegistry()
 
@@ -769,16 +887,26 @@ cdef class _BaseParser:
             self._default_encoding = encoding
 
     cdef _ParserContext _getParserContext(self):
-        cdef xmlparser.xmlParserCtxt* pctxt
+        cdef xmlparser.xmlParserCtxt* pctxt = NULL
+        cdef int pool_flags = -1
         if self._parser_context is None:
             self._parser_context = self._createContext(self.target)
             if self._schema is not None:
                 self._parser_context._validator = \
                     self._schema._newSaxValidator(
                         self._parse_options & xmlparser.XML_PARSE_DTDATTR)
-            pctxt = self._newParserCtxt()
+            if type(self._parser_context) is _ParserContext:
+                # plain contexts can be reused by parsers of the same setup
+                pool_flags = (self._for_html | self._remove_comments << 1 |
+                              self._remove_pis << 2 | self._strip_cdata << 3)
+                pctxt = __PARSER_CONTEXT_POOL.take(
+                    self._parse_options, pool_flags)
             if pctxt is NULL:
-                raise MemoryError()
+                pctxt = self._newParserCtxt()
+                if pctxt is NULL:
+                    raise MemoryError()
+            self._parser_context._pool_options = self._parse_options
+            self._parser_context._pool_flags = pool_flags
             _initParserContext(self._parser_context, self._resolvers, pctxt)
             if self._remove_comments:
                 pctxt.sax.comment = NULL
@@ -790,27 +918,29 @@ cdef class _BaseParser:
         return self._parser_context
 
     cdef _ParserContext _getPushParserContext(self):
-        cdef xmlparser.xmlParserCtxt* pctxt
         if self._push_parser_context is None:
-            self._push_parser_context = self._createContext(self.target)
-            if self._schema is not None:
-                self._push_parser_context._validator = \
-                    self._schema._newSaxValidator(
-                        self._parse_options & xmlparser.XML_PARSE_DTDATTR)
-            pctxt = self._newPushParserCtxt()
-            if pctxt is NULL:
-                raise MemoryError()
-            _initParserContext(
-                self._push_parser_context, self._resolvers, pctxt)
-            if self._remove_comments:
-                pctxt.sax.comment = NULL
-            if self._remove_pis:
-                pctxt.sax.processingInstruction = NULL
-            if self._strip_cdata:
-                # hard switch-off for CDATA nodes => makes them plain text
-                pctxt.sax.cdataBlock = NULL
+            self._push_parser_context = self._initPushParserContext(
+                self._createPushContext(self.target))
         return self._push_parser_context
 
+    cdef _ParserContext _initPushParserContext(self, _ParserContext context):
+        cdef xmlparser.xmlParserCtxt* pctxt
+        if self._schema is not None:
+            context._validator = self._schema._newSaxValidator(
+                self._parse_options & xmlparser.XML_PARSE_DTDATTR)
+        pctxt = self._newPushParserCtxt()
+        if pctxt is NULL:
+            raise MemoryError()
+        _initParserContext(context, self._resolvers, pctxt)
+        if self._remove_comments:
+            pctxt.sax.comment = NULL
+        if self._remove_pis:
+            pctxt.sax.processingInstruction = NULL
+        if self._strip_cdata:
+            # hard switch-off for CDATA nodes => makes them plain text
+            pctxt.sax.cdataBlock = NULL
+        return context
+
     cdef _ParserContext _createContext(self, target):
         cdef _TargetParserContext context
         if target is None:
@@ -819,6 +949,9 @@ cdef class _BaseParser:
         context._setTarget(target)
         return context
 
+    cdef _ParserContext _createPushContext(self, target):
+        return self._createContext(target)
+
     cdef int _registerHtmlErrorHandler(self, xmlparser.xmlParserCtxt* c_ctxt) except -1:
         cdef xmlparser.xmlSAXHandler* sax = c_ctxt.sax
         if sax is not NULL and sax.initialized and sax.initialized != xmlparser.XML_SAX2_MAGIC:
@@ -908,6 +1041,7 @@ cdef class _BaseParser:
         parser._class_lookup  = self._class_lookup
         parser._default_encoding = self._default_encoding
         parser._schema = self._schema
+        parser._buffer_size = self._buffer_size
         return parser
 
     def copy(self):
@@ -1012,6 +1146,73 @@ cdef class _BaseParser:
         finally:
             context.cleanup()
 
+    cdef xmlDoc* _parseDocInChunks(self, const_char* c_data, Py_ssize_t c_len,
+                                   char* c_filename) except NULL:
+        u"""Parse a document from memory that is too large for a single
+        libxml2 call by pushing it into a new push parser in slices.
+        """
+        cdef _ParserContext context
+        cdef xmlparser.xmlParserCtxt* pctxt
+        cdef const_char* c_encoding
+        cdef int buffer_len
+        cdef int error
+        cdef bint recover = self._parse_options & xmlparser.XML_PARSE_RECOVER
+        # a separate context keeps a running feed parser untouched
+        context = self._initPushParserContext(self._createContext(self.target))
+        context.prepare()
+        try:
+            pctxt = context._c_ctxt
+            __GLOBAL_PARSER_CONTEXT.initParserDict(pctxt)
+            if self._default_encoding is None:
+                c_encoding = NULL
+            else:
+                c_encoding = _cstr(self._default_encoding)
+            if self._for_html:
+                error = _htmlCtxtResetPush(
+                    pctxt, NULL, 0, c_encoding, self._parse_options)
+            else:
+                xmlparser.xmlCtxtUseOptions(pctxt, self._parse_options)
+                error = xmlparser.xmlCtxtResetPush(
+                    pctxt, NULL, 0, c_filename, c_encoding)
+
+            while c_len > 0 and (error == 0 or recover):
+                with nogil:
+                    # libxml2 copies pushed data into its input buffer,
+                    # small slices keep that copy small
+                    if c_len > _PUSH_PARSER_SLICE_SIZE:
+                        buffer_len = _PUSH_PARSER_SLICE_SIZE
+                    else:
+                        buffer_len = <int>c_len
+                    if self._for_html:
+                        error = htmlparser.htmlParseChunk(
+                            pctxt, c_data, buffer_len, 0)
+                    else:
+                        error = xmlparser.xmlParseChunk(
+                            pctxt, c_data, buffer_len, 0)
+                    c_len -= buffer_len
+                    c_data += buffer_len
+
+                if error and not pctxt.replaceEntities and not pctxt.validate:
+                    # in this mode, we ignore errors about undefined entities
+                    for entry in context._error_log.filter_from_errors():
+                        if entry.type != ErrorTypes.WAR_UNDECLARED_ENTITY and \
+                               entry.type != ErrorTypes.ERR_UNDECLARED_ENTITY:
+                            break
+                    else:
+                        error = 0
+
+            with nogil:
+                if self._for_html:
+                    htmlparser.htmlParseChunk(pctxt, NULL, 0, 1)
+                else:
+                    xmlparser.xmlParseChunk(pctxt, NULL, 0, 1)
+            if self._for_html and pctxt.myDoc is not NULL:
+                if _fixHtmlDictNames(pctxt.dict, pctxt.myDoc) < 0:
+                    raise MemoryError()
+            return context._handleParseResultDoc(self, pctxt.myDoc, None)
+        finally:
+            context.cleanup()
+
     cdef xmlDoc* _parseDocFromFile(self, char* c_filename) except NULL:
         cdef _ParserContext context
         cdef xmlDoc* result
@@ -1048,7 +1249,8 @@ cdef class _BaseParser:
         finally:
             context.cleanup()
 
-    cdef xmlDoc* _parseDocFromFilelike(self, filelike, filename) except NULL:
+    cdef xmlDoc* _parseDocFromFilelike(self, filelike, filename,
+                                       Py_ssize_t buffer_size=0) except NULL:
         cdef _ParserContext context
         cdef _FileReaderContext file_context
         cdef xmlDoc* result
@@ -1062,8 +1264,11 @@ cdef class _BaseParser:
         try:
             pctxt = context._c_ctxt
             __GLOBAL_PARSER_CONTEXT.initParserDict(pctxt)
+            if buffer_size <= 0:
+                buffer_size = self._buffer_size
             file_context = _FileReaderContext(
-                filelike, context, filename, self._default_encoding)
+                filelike, context, filename, self._default_encoding,
+                buffer_size=buffer_size)
             result = file_context._readDoc(pctxt, self._parse_options)
 
             return context._handleParseResultDoc(
@@ -1077,6 +1282,34 @@ cdef class _BaseParser:
 
 cdef class _FeedParser(_BaseParser):
     cdef bint _feed_parser_running
+    # set by the pull parsers to collect parse events while feeding
+    cdef tuple _pull_events
+    cdef object _pull_tag
+
+    cdef int _initPullParser(self, events, tag) except -1:
+        if self.target is not None:
+            raise TypeError, u"pull parsers do not support parser targets"
+        if events is None:
+            events = (u'end',)
+        _buildIterparseEventFilter(events)
+        if self._for_html:
+            # make sure we're not looking for namespaces
+            events = [ event for event in events
+                       if event != u'start-ns' and event != u'end-ns' ]
+        self._pull_events = tuple(events)
+        self._pull_tag = tag
+        return 0
+
+    cdef _ParserContext _createPushContext(self, target):
+        if self._pull_events is None:
+            return _BaseParser._createPushContext(self, target)
+        return _newPullParserContext(self._pull_events, self._pull_tag)
+
+    cdef _BaseParser _copy(self):
+        cdef _FeedParser parser = <_FeedParser>_BaseParser._copy(self)
+        parser._pull_events = self._pull_events
+        parser._pull_tag = self._pull_tag
+        return parser
 
     property feed_error_log:
         u"""The error log of the last (or current) run of the feed parser.
@@ -1094,7 +1327,9 @@ cdef class _FeedParser(_BaseParser):
 
         Feeds data to the parser.  The argument should be an 8-bit string
         buffer containing encoded data, although Unicode is supported as long
-        as both string types are not mixed.
+        as both string types are not mixed.  Other objects that support the
+        buffer protocol, such as ``bytearray`` or ``memoryview``, are parsed
+        in place without copying them.
 
         This is the main entry point to the consumer interface of a
         parser.  The parser will parse as much of the XML stream as it
@@ -1107,14 +1342,11 @@ cdef class _FeedParser(_BaseParser):
         usage.  You can use the same parser as a feed parser and in
         the ``parse()`` function concurrently.
         """
-        cdef _ParserContext context
-        cdef xmlparser.xmlParserCtxt* pctxt
         cdef Py_ssize_t py_buffer_len
         cdef const_char* c_data
         cdef const_char* c_encoding
-        cdef int buffer_len
-        cdef int error
-        cdef bint recover = self._parse_options & xmlparser.XML_PARSE_RECOVER
+        cdef Py_buffer view
+        cdef bint release_buffer = False
         if isinstance(data, bytes):
             if self._default_encoding is None:
                 c_encoding = NULL
@@ -1129,9 +1361,31 @@ cdef class _FeedParser(_BaseParser):
             c_encoding = _UNICODE_ENCODING
             c_data = python.PyUnicode_AS_DATA(data)
             py_buffer_len = python.PyUnicode_GET_DATA_SIZE(data)
+        elif python.PyObject_CheckBuffer(data):
+            if self._default_encoding is None:
+                c_encoding = NULL
+            else:
+                c_encoding = self._default_encoding
+            python.PyObject_GetBuffer(data, &view, python.PyBUF_SIMPLE)
+            release_buffer = True
+            c_data = <const_char*>view.buf
+            py_buffer_len = view.len
         else:
             raise TypeError, u"Parsing requires string data"
 
+        try:
+            self._feedData(c_data, py_buffer_len, c_encoding)
+        finally:
+            if release_buffer:
+                python.PyBuffer_Release(&view)
+
+    cdef _feedData(self, const_char* c_data, Py_ssize_t py_buffer_len,
+                   const_char* c_encoding):
+        cdef _ParserContext context
+        cdef xmlparser.xmlParserCtxt* pctxt
+        cdef int buffer_len
+        cdef int error
+        cdef bint recover = self._parse_options & xmlparser.XML_PARSE_RECOVER
         context = self._getPushParserContext()
         pctxt = context._c_ctxt
         error = 0
@@ -1206,6 +1460,9 @@ cdef class _FeedParser(_BaseParser):
         else:
             xmlparser.xmlParseChunk(pctxt, NULL, 0, 1)
         try:
+            if self._for_html and pctxt.myDoc is not NULL:
+                if _fixHtmlDictNames(pctxt.dict, pctxt.myDoc) < 0:
+                    raise MemoryError()
             result = context._handleParseResult(self, pctxt.myDoc, None)
         finally:
             context.cleanup()
@@ -1251,7 +1508,7 @@ _XML_DEFAULT_PARSE_OPTIONS = (
     )
 
 cdef class XMLParser(_FeedParser):
-    u"""XMLParser(self, encoding=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, ns_clean=False, recover=False, XMLSchema schema=None, remove_blank_text=False, resolve_entities=True, remove_comments=False, remove_pis=False, strip_cdata=True, target=None, compact=True)
+    u"""XMLParser(self, encoding=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, ns_clean=False, recover=False, XMLSchema schema=None, remove_blank_text=False, resolve_entities=True, remove_comments=False, remove_pis=False, strip_cdata=True, target=None, compact=True, buffer_size=32768)
 
     The XML parser.
 
@@ -1286,9 +1543,10 @@ cdef class XMLParser(_FeedParser):
 
     Other keyword arguments:
 
-    - encoding - override the document encoding
-    - target   - a parser target object that will receive the parse events
-    - schema   - an XMLSchema to validate against
+    - encoding    - override the document encoding
+    - target      - a parser target object that will receive the parse events
+    - schema      - an XMLSchema to validate against
+    - buffer_size - size of the chunks read from file-like objects
 
     Note that you should avoid sharing parsers between threads.  While this is
     not harmful, it is more efficient to use separate parsers.  This does not
@@ -1299,7 +1557,7 @@ cdef class XMLParser(_FeedParser):
                  ns_clean=False, recover=False, XMLSchema schema=None,
                  huge_tree=False, remove_blank_text=False, resolve_entities=True,
                  remove_comments=False, remove_pis=False, strip_cdata=True,
-                 target=None, compact=True):
+                 target=None, compact=True, buffer_size=__READ_BUFFER_SIZE):
         cdef int parse_options
         parse_options = _XML_DEFAULT_PARSE_OPTIONS
         if load_dtd:
@@ -1330,7 +1588,7 @@ cdef class XMLParser(_FeedParser):
 
         _BaseParser.__init__(self, parse_options, 0, schema,
                              remove_comments, remove_pis, strip_cdata,
-                             target, None, encoding)
+                             target, None, encoding, buffer_size)
 
 cdef class ETCompatXMLParser(XMLParser):
     u"""ETCompatXMLParser(self, encoding=None, attribute_defaults=False, \
@@ -1338,7 +1596,7 @@ cdef class ETCompatXMLParser(XMLParser):
                  ns_clean=False, recover=False, schema=None, \
                  huge_tree=False, remove_blank_text=False, resolve_entities=True, \
                  remove_comments=True, remove_pis=True, strip_cdata=True, \
-                 target=None, compact=True)
+                 target=None, compact=True, buffer_size=32768)
 
     An XML parser with an ElementTree compatible default setup.
 
@@ -1352,7 +1610,7 @@ cdef class ETCompatXMLParser(XMLParser):
                  ns_clean=False, recover=False, schema=None,
                  huge_tree=False, remove_blank_text=False, resolve_entities=True,
                  remove_comments=True, remove_pis=True, strip_cdata=True,
-                 target=None, compact=True):
+                 target=None, compact=True, buffer_size=__READ_BUFFER_SIZE):
         XMLParser.__init__(self,
                            attribute_defaults=attribute_defaults,
                            dtd_validation=dtd_validation,
@@ -1369,7 +1627,8 @@ cdef class ETCompatXMLParser(XMLParser):
                            strip_cdata=strip_cdata,
                            target=target,
                            encoding=encoding,
-                           schema=schema)
+                           schema=schema,
+                           buffer_size=buffer_size)
 
 # ET 1.2 compatible name
 XMLTreeBuilder = ETCompatXMLParser
@@ -1400,6 +1659,30 @@ def get_default_parser():
     u"get_default_parser()"
     return __GLOBAL_PARSER_CONTEXT.getDefaultParser()
 
+def set_parser_context_pool_size(size):
+    u"""set_parser_context_pool_size(size)
+
+    Set the maximum number of libxml2 parser contexts that are kept for
+    reuse after their parser was discarded.  A new parser takes a context
+    with the same configuration from this pool instead of setting up a new
+    one, which speeds up code that creates a parser for each small
+    document.  Passing 0 disables the pool.
+    """
+    if size < 0:
+        raise ValueError, u"pool size must not be negative"
+    __PARSER_CONTEXT_POOL.resize(size)
+
+def parser_context_pool_info():
+    u"""parser_context_pool_info()
+
+    Return a dict with the number of "hits" and "misses" of the parser
+    context pool, as well as its current "size" and "maxsize".
+    """
+    return {u"hits": __PARSER_CONTEXT_POOL._hits,
+            u"misses": __PARSER_CONTEXT_POOL._misses,
+            u"size": __PARSER_CONTEXT_POOL._count,
+            u"maxsize": __PARSER_CONTEXT_POOL._max_size}
+
 ############################################################
 ## HTML parser
 ############################################################
@@ -1415,7 +1698,7 @@ cdef class HTMLParser(_FeedParser):
     u"""HTMLParser(self, encoding=None, remove_blank_text=False, \
                    remove_comments=False, remove_pis=False, strip_cdata=True, \
                    no_network=True, target=None, XMLSchema schema=None, \
-                   recover=True, compact=True)
+                   recover=True, compact=True, buffer_size=32768)
 
     The HTML parser.
 
@@ -1436,9 +1719,10 @@ cdef class HTMLParser(_FeedParser):
 
     Other keyword arguments:
 
-    - encoding - override the document encoding
-    - target   - a parser target object that will receive the parse events
-    - schema   - an XMLSchema to validate against
+    - encoding    - override the document encoding
+    - target      - a parser target object that will receive the parse events
+    - schema      - an XMLSchema to validate against
+    - buffer_size - size of the chunks read from file-like objects
 
     Note that you should avoid sharing parsers between threads for performance
     reasons.
@@ -1446,7 +1730,7 @@ cdef class HTMLParser(_FeedParser):
     def __init__(self, *, encoding=None, remove_blank_text=False,
                  remove_comments=False, remove_pis=False, strip_cdata=True,
                  no_network=True, target=None, XMLSchema schema=None,
-                 recover=True, compact=True):
+                 recover=True, compact=True, buffer_size=__READ_BUFFER_SIZE):
         cdef int parse_options
         parse_options = _HTML_DEFAULT_PARSE_OPTIONS
         if remove_blank_text:
@@ -1460,7 +1744,7 @@ cdef class HTMLParser(_FeedParser):
 
         _BaseParser.__init__(self, parse_options, 1, schema,
                              remove_comments, remove_pis, strip_cdata,
-                             target, None, encoding)
+                             target, None, encoding, buffer_size)
 
 cdef HTMLParser __DEFAULT_HTML_PARSER
 __DEFAULT_HTML_PARSER = HTMLParser()
@@ -1494,16 +1778,44 @@ cdef xmlDoc* _parseDoc(text, filename, _BaseParser parser) except NULL:
         c_text = _cstr(text)
         return (<_BaseParser>parser)._parseDoc(c_text, c_len, c_filename)
 
+# slice size for parsing memory buffers beyond the limits of libxml2's API
+cdef int _PUSH_PARSER_SLICE_SIZE = 1024 * 1024
+
+cdef xmlDoc* _parseDocFromBuffer(source, filename, _BaseParser parser) except NULL:
+    u"""Parse from an object that supports the buffer protocol, e.g. a
+    bytearray, memoryview or mmap, without copying it to a bytes object.
+    """
+    cdef char* c_filename
+    cdef Py_buffer view
+    if parser is None:
+        parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
+    if not filename:
+        c_filename = NULL
+    else:
+        filename_utf = _encodeFilenameUTF8(filename)
+        c_filename = _cstr(filename_utf)
+    python.PyObject_GetBuffer(source, &view, python.PyBUF_SIMPLE)
+    try:
+        # keep the buffer locked while libxml2 reads it without the GIL
+        if view.len > limits.INT_MAX:
+            return (<_BaseParser>parser)._parseDocInChunks(
+                <const_char*>view.buf, view.len, c_filename)
+        return (<_BaseParser>parser)._parseDoc(
+            <char*>view.buf, view.len, c_filename)
+    finally:
+        python.PyBuffer_Release(&view)
+
 cdef xmlDoc* _parseDocFromFile(filename8, _BaseParser parser) except NULL:
     if parser is None:
         parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
     return (<_BaseParser>parser)._parseDocFromFile(_cstr(filename8))
 
-cdef xmlDoc* _parseDocFromFilelike(source, filename,
-                                   _BaseParser parser) except NULL:
+cdef xmlDoc* _parseDocFromFilelike(source, filename, _BaseParser parser,
+                                   Py_ssize_t buffer_size=0) except NULL:
     if parser is None:
         parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
-    return (<_BaseParser>parser)._parseDocFromFilelike(source, filename)
+    return (<_BaseParser>parser)._parseDocFromFilelike(
+        source, filename, buffer_size)
 
 cdef xmlDoc* _newXMLDoc() except NULL:
     cdef xmlDoc* result
@@ -1564,7 +1876,11 @@ cdef xmlNode* _copyNodeToDoc(xmlNode* c_node, xmlDoc* c_doc) except NULL:
 ## (here we convert to UTF-8)
 ############################################################
 
-cdef _Document _parseDocument(source, _BaseParser parser, base_url):
+cdef _Document _parseDocument(source, _BaseParser parser, base_url,
+                              Py_ssize_t buffer_size=0):
+    u"""Parse a document from a file name, URL, buffer or file-like object.
+    A positive buffer_size overrides the chunk size of the parser.
+    """
     cdef _Document doc
     if _isString(source):
         # parse the file directly from the filesystem
@@ -1588,10 +1904,17 @@ cdef _Document _parseDocument(source, _BaseParser parser, base_url):
             return _parseMemoryDocument(
                 source.getvalue(), _encodeFilenameUTF8(url), parser)
 
+    if python.PyObject_CheckBuffer(source):
+        # bytearray, memoryview, mmap - parse the memory in place
+        if not hasattr(source, u'read') or (
+                hasattr(source, u'tell') and source.tell() == 0):
+            return _parseMemoryDocument(
+                source, _encodeFilenameUTF8(url), parser)
+
     # Support for file-like objects (urlgrabber.urlopen, ...)
     if hasattr(source, u'read'):
         return _parseFilelikeDocument(
-            source, _encodeFilenameUTF8(url), parser)
+            source, _encodeFilenameUTF8(url), parser, buffer_size)
 
     raise TypeError, u"cannot parse from '%s'" % python._fqtypename(source).decode('UTF-8')
 
@@ -1611,15 +1934,95 @@ cdef _Document _parseMemoryDocument(text, url, _BaseParser parser):
         if _UNICODE_ENCODING is NULL:
             text = (<unicode>text).encode('utf8')
     elif not isinstance(text, bytes):
-        raise ValueError, u"can only parse strings"
+        if not python.PyObject_CheckBuffer(text):
+            raise ValueError, u"can only parse strings"
+        if isinstance(url, unicode):
+            url = (<unicode>url).encode('utf8')
+        c_doc = _parseDocFromBuffer(text, url, parser)
+        return _documentFactory(c_doc, parser)
     if isinstance(url, unicode):
         url = (<unicode>url).encode('utf8')
     c_doc = _parseDoc(text, url, parser)
     return _documentFactory(c_doc, parser)
 
-cdef _Document _parseFilelikeDocument(source, url, _BaseParser parser):
+cdef _Document _parseFilelikeDocument(source, url, _BaseParser parser,
+                                      Py_ssize_t buffer_size=0):
     cdef xmlDoc* c_doc
     if isinstance(url, unicode):
         url = (<unicode>url).encode('utf8')
-    c_doc = _parseDocFromFilelike(source, url, parser)
+    c_doc = _parseDocFromFilelike(source, url, parser, buffer_size)
     return _documentFactory(c_doc, parser)
+
+
+############################################################
+## parallel parsing of multiple documents
+############################################################
+
+@cython.final
+@cython.internal
+cdef class _ParallelParseContext:
+    u"""Parses a list of sources in a set of worker threads.
+
+    Each worker uses its own copy of the parser and thus its own parser
+    context and the string dictionary of its thread, so that the parsers
+    never need to wait for each other while libxml2 runs without the GIL.
+    """
+    cdef _BaseParser _parser
+    cdef list _sources
+    cdef list _results
+    cdef list _errors
+    cdef _ExceptionContext _copy_error
+    cdef object _indices
+
+    def __cinit__(self, list sources not None, _BaseParser parser not None):
+        self._parser = parser
+        self._sources = sources
+        self._results = [None] * len(sources)
+        self._errors = [None] * len(sources)
+        # iterating over a range is atomic under the GIL
+        self._indices = iter(range(len(sources)))
+
+    def _run_worker(self):
+        cdef _BaseParser parser
+        cdef _ExceptionContext exc_context
+        cdef _Document doc
+        try:
+            parser = self._parser._copy()
+        except:
+            # leave the sources to the other workers, but report the error
+            exc_context = _ExceptionContext()
+            exc_context._store_raised()
+            if self._copy_error is None:
+                self._copy_error = exc_context
+            return
+        for i in self._indices:
+            try:
+                doc = _parseDocument(self._sources[i], parser, None)
+                self._results[i] = _elementTreeFactory(doc, None)
+            except:
+                exc_context = _ExceptionContext()
+                exc_context._store_raised()
+                self._errors[i] = exc_context
+
+    cdef list run(self, Py_ssize_t workers):
+        cdef _ExceptionContext exc_context
+        from threading import Thread
+        threads = [ Thread(target=self._run_worker)
+                    for _ in range(workers) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._copy_error is not None:
+            self._copy_error._raise_if_stored()
+        for exc_context in self._errors:
+            if exc_context is not None:
+                exc_context._raise_if_stored()
+        return self._results
+
+cdef Py_ssize_t _defaultParseWorkers():
+    try:
+        from multiprocessing import cpu_count
+        return cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
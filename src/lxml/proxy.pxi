@@ -176,6 +176,7 @@ cdef int attemptDeallocation(xmlNode* c_node):
     c_top = getDeallocationTop(c_node)
     if c_top is not NULL:
         #print "freeing:", c_top.name
+        _noteRemovedNodes(c_top.doc, 1)
         _removeText(c_top.next) # tail
         tree.xmlFreeNode(c_top)
         return 1
@@ -219,6 +220,52 @@ cdef int canDeallocateChildNodes(xmlNode* c_parent):
     tree.END_FOR_EACH_ELEMENT_FROM(c_node)
     return 1
 
+################################################################################
+# count removed nodes while iterators hold plain node pointers into a document
+
+@cython.final
+@cython.internal
+cdef class _RemovedNodesCounter:
+    u"""Counts the nodes that were freed in a document, or moved out of
+    it, while it is being tracked.
+    """
+    cdef Py_ssize_t _elements   # subtrees, including their text and attributes
+    cdef Py_ssize_t _other      # text and attribute nodes
+    cdef Py_ssize_t _users
+
+# maps the address of a tracked xmlDoc to its counter
+cdef dict __REMOVED_NODES_COUNTERS = {}
+
+cdef _RemovedNodesCounter _trackRemovedNodes(_Document doc):
+    cdef _RemovedNodesCounter counter
+    key = <size_t>doc._c_doc
+    counter = __REMOVED_NODES_COUNTERS.get(key)
+    if counter is None:
+        counter = _RemovedNodesCounter()
+        __REMOVED_NODES_COUNTERS[key] = counter
+    counter._users += 1
+    return counter
+
+cdef void _untrackRemovedNodes(size_t c_doc_address,
+                               _RemovedNodesCounter counter):
+    counter._users -= 1
+    if counter._users == 0:
+        del __REMOVED_NODES_COUNTERS[c_doc_address]
+
+cdef inline void _noteRemovedNodes(xmlDoc* c_doc, bint elements):
+    # cheap as long as no document is tracked
+    if __REMOVED_NODES_COUNTERS:
+        _countRemovedNodes(c_doc, elements)
+
+cdef void _countRemovedNodes(xmlDoc* c_doc, bint elements):
+    cdef _RemovedNodesCounter counter
+    counter = __REMOVED_NODES_COUNTERS.get(<size_t>c_doc)
+    if counter is not None:
+        if elements:
+            counter._elements += 1
+        else:
+            counter._other += 1
+
 ################################################################################
 # fix _Document references and namespaces when a node changes documents
 
@@ -342,6 +389,10 @@ cdef int moveNodeToDocument(_Document doc, xmlDoc* c_source_doc,
     cdef xmlNs* c_del_ns_list
     cdef size_t i, proxy_count = 0
 
+    if c_source_doc is not doc._c_doc:
+        # the subtree can now get freed through the other document
+        _noteRemovedNodes(c_source_doc, 1)
+
     if not tree._isElementOrXInclude(c_element):
         return 0
 
@@ -29,6 +29,9 @@ cdef extern from "Python.h":
     cdef bytes PyBytes_FromStringAndSize(char* s, Py_ssize_t size)
     cdef bytes PyBytes_FromFormat(char* format, ...)
     cdef Py_ssize_t PyBytes_GET_SIZE(object s)
+    cdef object PyByteArray_FromStringAndSize(char* s, Py_ssize_t size)
+    cdef char* PyByteArray_AS_STRING(object s)
+    cdef int PyByteArray_Resize(object s, Py_ssize_t size) except -1
 
     cdef object PyNumber_Int(object value)
     cdef Py_ssize_t PyInt_AsSsize_t(object value)
@@ -106,6 +109,10 @@ cdef extern from "Python.h":
     cdef int PyBUF_ANY_CONTIGUOUS
     cdef int PyBUF_INDIRECT
 
+    cdef bint PyObject_CheckBuffer(object obj)
+    cdef int PyObject_GetBuffer(object obj, Py_buffer* view, int flags) except -1
+    cdef void PyBuffer_Release(Py_buffer* view)
+
 cdef extern from "pythread.h":
     ctypedef void* PyThread_type_lock
     cdef PyThread_type_lock PyThread_allocate_lock()
@@ -183,6 +183,336 @@ cdef bytes _tostringC14N(element_or_tree, bint exclusive, bint with_comments, in
         tree.xmlFree(c_buffer)
     return result
 
+DEF _DIGEST_CHUNK_SIZE = 65536
+
+cdef struct _DigestBuffer:
+    char* c_data
+    int used
+    void* writer
+
+@cython.final
+@cython.internal
+cdef class _DigestWriter:
+    u"""Collects the output of a libxml2 output buffer in a C buffer and
+    passes it into the update() method of a hashlib style object in large
+    chunks.  Only the update calls need the GIL.
+    """
+    cdef _DigestBuffer _c_state
+    cdef bytearray _buffer
+    cdef object _view
+    cdef object _update
+    cdef _ExceptionContext _exc_context
+    def __cinit__(self):
+        self._buffer = bytearray(_DIGEST_CHUNK_SIZE)
+        self._view = memoryview(self._buffer)
+        self._c_state.c_data = python.PyByteArray_AS_STRING(self._buffer)
+        self._c_state.used = 0
+        self._c_state.writer = <void*>self
+        self._exc_context = _ExceptionContext()
+
+    cdef tree.xmlOutputBuffer* _createOutputBuffer(self, digest) except NULL:
+        cdef tree.xmlOutputBuffer* c_buffer
+        self._update = digest.update
+        self._c_state.used = 0
+        c_buffer = tree.xmlOutputBufferCreateIO(
+            <tree.xmlOutputWriteCallback>_writeDigestBuffer, NULL,
+            &self._c_state, NULL)
+        if c_buffer is NULL:
+            raise MemoryError()
+        return c_buffer
+
+    cdef int _flush(self):
+        cdef int used = self._c_state.used
+        self._c_state.used = 0
+        try:
+            if used:
+                self._update(self._view[:used])
+            return 0
+        except:
+            self._exc_context._store_raised()
+            return -1
+
+    cdef int _write(self, const_char* c_data, int size):
+        try:
+            self._update(<bytes>c_data[:size])
+            return size
+        except:
+            self._exc_context._store_raised()
+            return -1
+
+cdef int _flushDigestWriter(void* writer) with gil:
+    return (<_DigestWriter>writer)._flush()
+
+cdef int _writeDigestWriter(void* writer, const_char* c_data, int size) with gil:
+    return (<_DigestWriter>writer)._write(c_data, size)
+
+cdef int _writeDigestBuffer(void* ctxt, const_char* c_data, int size) nogil:
+    cdef _DigestBuffer* c_state = <_DigestBuffer*>ctxt
+    if c_state.used + size > _DIGEST_CHUNK_SIZE:
+        if _flushDigestWriter(c_state.writer) < 0:
+            return -1
+        if size > _DIGEST_CHUNK_SIZE:
+            return _writeDigestWriter(c_state.writer, c_data, size)
+    cstring_h.memcpy(c_state.c_data + c_state.used, c_data, size)
+    c_state.used += size
+    return size
+
+cdef bytes _c14nDigest(element_or_tree, _DigestWriter writer, digest,
+                       bint exclusive, bint with_comments, inclusive_ns_prefixes):
+    u"""Pass the C14N serialisation of an element or tree into the digest
+    object and return its raw digest.
+    """
+    cdef xmlDoc* c_doc
+    cdef tree.xmlOutputBuffer* c_buffer
+    cdef _Document doc
+    cdef xmlChar **c_inclusive_ns_prefixes = NULL
+    cdef int bytes_count, error
+
+    if isinstance(element_or_tree, _Element):
+        _assertValidNode(<_Element>element_or_tree)
+        if (<_Element>element_or_tree)._c_node.type != tree.XML_ELEMENT_NODE:
+            raise TypeError, u"C14N can only serialise elements and trees"
+        doc = (<_Element>element_or_tree)._doc
+        c_doc = _plainFakeRootDoc(doc._c_doc, (<_Element>element_or_tree)._c_node, 0)
+    elif isinstance(element_or_tree, _ElementTree):
+        doc = _documentOrRaise(element_or_tree)
+        _assertValidDoc(doc)
+        c_doc = doc._c_doc
+    else:
+        raise TypeError, u"Type '%s' cannot be serialized." % \
+            python._fqtypename(element_or_tree)
+
+    try:
+        if inclusive_ns_prefixes:
+            c_inclusive_ns_prefixes = _convert_ns_prefixes(
+                c_doc.dict, inclusive_ns_prefixes)
+        c_buffer = writer._createOutputBuffer(digest)
+        with nogil:
+            bytes_count = c14n.xmlC14NDocSaveTo(
+                c_doc, NULL, exclusive, c_inclusive_ns_prefixes,
+                with_comments, c_buffer)
+            error = tree.xmlOutputBufferClose(c_buffer)
+    finally:
+        _destroyFakeDoc(doc._c_doc, c_doc)
+        if c_inclusive_ns_prefixes is not NULL:
+            python.PyMem_Free(c_inclusive_ns_prefixes)
+
+    writer._exc_context._raise_if_stored()
+    if bytes_count < 0 or error < 0:
+        raise C14NError, u"C14N failed"
+    if writer._flush() < 0:
+        writer._exc_context._raise_if_stored()
+    return digest.digest()
+
+cdef struct _SerialisationTarget:
+    xmlNode* c_node
+    bint write_complete_document
+    size_t end
+
+
+cdef class Serializer:
+    u"""Serializer(self, encoding=None, method="xml", xml_declaration=None, pretty_print=False, with_tail=True, standalone=None, doctype=None)
+
+    A serialiser for many elements with the same options.  The options
+    have the same meaning as for ``tostring()`` and are only checked once.
+
+    ``tostring_many()`` writes all elements into a single output buffer,
+    so that the encoder and the buffer are set up only once per call.
+    """
+    cdef object _encoding
+    cdef object _method
+    cdef object _doctype
+    cdef bint _write_declaration
+    cdef bint _pretty_print
+    cdef bint _with_tail
+    cdef int _standalone
+    def __init__(self, *, encoding=None, method=u"xml",
+                 xml_declaration=None, bint pretty_print=False,
+                 bint with_tail=True, standalone=None, doctype=None):
+        cdef tree.xmlCharEncodingHandler* enchandler
+        if method == 'c14n':
+            raise ValueError, u"C14N serialisation is not supported"
+        _findOutputMethod(method)
+        self._encoding, self._write_declaration, self._standalone = \
+            _serialisationOptions(encoding, xml_declaration, standalone)
+        if self._encoding is not _unicode:
+            enchandler = tree.xmlFindCharEncodingHandler(
+                _cstr(_utf8(self._encoding)))
+            if enchandler is NULL:
+                raise LookupError, u"unknown encoding: '%s'" % self._encoding
+            tree.xmlCharEncCloseFunc(enchandler)
+        self._method = method
+        self._doctype = doctype
+        self._pretty_print = pretty_print
+        self._with_tail = with_tail
+
+    def tostring(self, element_or_tree):
+        u"""tostring(self, element_or_tree)
+
+        Serialize an element or ElementTree.
+        """
+        if isinstance(element_or_tree, _Element):
+            return _tostring(<_Element>element_or_tree, self._encoding,
+                             self._doctype, self._method,
+                             self._write_declaration, 0, self._pretty_print,
+                             self._with_tail, self._standalone)
+        elif isinstance(element_or_tree, _ElementTree):
+            return _tostring((<_ElementTree>element_or_tree)._context_node,
+                             self._encoding, self._doctype, self._method,
+                             self._write_declaration, 1, self._pretty_print,
+                             self._with_tail, self._standalone)
+        else:
+            raise TypeError, u"Type '%s' cannot be serialized." % \
+                python._fqtypename(element_or_tree)
+
+    def tostring_many(self, elements, *, bint join=False):
+        u"""tostring_many(self, elements, join=False)
+
+        Serialize each element or ElementTree in an iterable and return a
+        list of the results, as ``tostring()`` would.
+
+        If ``join`` is true, a tuple ``(data, offsets)`` is returned instead,
+        where ``data`` is the concatenation of the results and the result
+        for the i-th element is ``data[offsets[i]:offsets[i+1]]``.
+        """
+        cdef list nodes = []
+        for element_or_tree in elements:
+            if isinstance(element_or_tree, _Element):
+                _assertValidNode(<_Element>element_or_tree)
+                nodes.append(element_or_tree)
+            elif isinstance(element_or_tree, _ElementTree):
+                element = (<_ElementTree>element_or_tree)._context_node
+                if element is None:
+                    raise TypeError, u"ElementTree not initialized, missing root"
+                _assertValidNode(element)
+                nodes.append(element_or_tree)
+            else:
+                raise TypeError, u"Type '%s' cannot be serialized." % \
+                    python._fqtypename(element_or_tree)
+        results = None
+        if _findOutputMethod(self._method) != OUTPUT_METHOD_TEXT:
+            results = self._writeAll(
+                nodes, join and self._encoding is not _unicode)
+        if results is None:
+            # text output or stateful encoding
+            results = [ self.tostring(node) for node in nodes ]
+        elif isinstance(results, tuple):
+            return results
+        if not join:
+            return results
+        offsets = [0]
+        offset = 0
+        for result in results:
+            offset += len(result)
+            offsets.append(offset)
+        return (u'' if self._encoding is _unicode else b'').join(results), offsets
+
+    cdef object _writeAll(self, list nodes, bint join):
+        u"""Serialise all nodes into one output buffer and split the result,
+        or return it as (data, offsets) if 'join' is true.  Returns None if
+        the encoding writes a BOM or other state at the start of each
+        output.
+        """
+        cdef tree.xmlOutputBuffer* c_buffer
+        cdef tree.xmlBuf* c_result_buffer
+        cdef tree.xmlCharEncodingHandler* enchandler
+        cdef _SerialisationTarget* c_targets
+        cdef const_char* c_enc
+        cdef const_xmlChar* c_doctype
+        cdef const_xmlChar* c_content
+        cdef size_t i, count = len(nodes), start
+        cdef int c_method = _findOutputMethod(self._method)
+        cdef bint write_declaration = self._write_declaration
+        cdef bint pretty_print = self._pretty_print
+        cdef bint with_tail = self._with_tail
+        cdef int standalone = self._standalone
+        cdef int error_result
+        if self._encoding is _unicode:
+            c_enc = NULL
+        else:
+            encoding = _utf8(self._encoding)
+            c_enc = _cstr(encoding)
+        if self._doctype is None:
+            c_doctype = NULL
+        else:
+            doctype = _utf8(self._doctype)
+            c_doctype = _xcstr(doctype)
+
+        c_targets = <_SerialisationTarget*>python.PyMem_Malloc(
+            (count or 1) * sizeof(_SerialisationTarget))
+        if c_targets is NULL:
+            raise MemoryError()
+        try:
+            for i, node in enumerate(nodes):
+                if isinstance(node, _ElementTree):
+                    c_targets[i].c_node = \
+                        (<_ElementTree>node)._context_node._c_node
+                    c_targets[i].write_complete_document = 1
+                else:
+                    c_targets[i].c_node = (<_Element>node)._c_node
+                    c_targets[i].write_complete_document = 0
+
+            enchandler = tree.xmlFindCharEncodingHandler(c_enc)
+            if enchandler is NULL and c_enc is not NULL:
+                raise LookupError, u"unknown encoding: '%s'" % self._encoding
+            c_buffer = tree.xmlAllocOutputBuffer(enchandler)
+            if c_buffer is NULL:
+                tree.xmlCharEncCloseFunc(enchandler)
+                raise MemoryError()
+            if c_buffer.conv is not NULL and tree.xmlBufUse(c_buffer.conv):
+                tree.xmlOutputBufferClose(c_buffer)
+                return None
+
+            with nogil:
+                for i in range(count):
+                    _writeNodeToBuffer(
+                        c_buffer, c_targets[i].c_node, c_enc, c_doctype,
+                        c_method, write_declaration,
+                        c_targets[i].write_complete_document,
+                        pretty_print, with_tail, standalone)
+                    tree.xmlOutputBufferFlush(c_buffer)
+                    if c_buffer.error:
+                        break
+                    if c_buffer.conv is not NULL:
+                        c_targets[i].end = tree.xmlBufUse(c_buffer.conv)
+                    else:
+                        c_targets[i].end = tree.xmlBufUse(c_buffer.buffer)
+
+            error_result = c_buffer.error
+            if error_result != xmlerror.XML_ERR_OK:
+                tree.xmlOutputBufferClose(c_buffer)
+                _raiseSerialisationError(error_result)
+
+            try:
+                if c_buffer.conv is not NULL:
+                    c_result_buffer = c_buffer.conv
+                else:
+                    c_result_buffer = c_buffer.buffer
+                c_content = tree.xmlBufContent(c_result_buffer)
+                if join:
+                    offsets = [0]
+                    for i in range(count):
+                        offsets.append(c_targets[i].end)
+                    return <bytes>(<unsigned char*>c_content)[
+                        :c_targets[count-1].end if count else 0], offsets
+                results = []
+                start = 0
+                for i in range(count):
+                    result = <bytes>(<unsigned char*>c_content)[
+                        start:c_targets[i].end]
+                    if self._encoding is _unicode:
+                        result = result.decode('UTF-8')
+                    results.append(result)
+                    start = c_targets[i].end
+            finally:
+                error_result = tree.xmlOutputBufferClose(c_buffer)
+            if error_result < 0:
+                _raiseSerialisationError(error_result)
+        finally:
+            python.PyMem_Free(c_targets)
+        return results
+
+
 cdef _raiseSerialisationError(int error_result):
     if error_result == xmlerror.XML_ERR_NO_MEMORY:
         raise MemoryError()
@@ -365,6 +695,7 @@ cdef void _writeNextSiblings(tree.xmlOutputBuffer* c_buffer, xmlNode* c_node,
 @cython.internal
 cdef class _FilelikeWriter:
     cdef object _filelike
+    cdef object _write_filelike
     cdef object _close_filelike
     cdef _ExceptionContext _exc_context
     cdef _ErrorLog error_log
@@ -374,6 +705,11 @@ cdef class _FilelikeWriter:
                 fileobj=filelike, mode='wb', compresslevel=compression)
             self._close_filelike = filelike.close
         self._filelike = filelike
+        if hasattr(filelike, 'write'):
+            self._write_filelike = filelike.write
+        else:
+            # hashlib style sink
+            self._write_filelike = filelike.update
         if exc_context is None:
             self._exc_context = _ExceptionContext()
         else:
@@ -395,7 +731,7 @@ cdef class _FilelikeWriter:
             if self._filelike is None:
                 raise IOError, u"File is already closed"
             py_buffer = <bytes>c_buffer[:size]
-            self._filelike.write(py_buffer)
+            self._write_filelike(py_buffer)
             return size
         except:
             self._exc_context._store_raised()
@@ -458,6 +794,8 @@ cdef _tofilelike(f, _Element element, encoding, doctype, method,
                 f.write(data)
             finally:
                 f.close()
+        elif isinstance(f, (int, long)):
+            _writeDataToFd(_osFileDescriptor(f, 0), data)
         else:
             f.write(data)
         return
@@ -478,6 +816,7 @@ cdef _tofilelike(f, _Element element, encoding, doctype, method,
         tree.xmlOutputBufferClose(c_buffer)
     if writer is None:
         python.PyEval_RestoreThread(state)
+        _syncFilePosition(f)
     else:
         writer._exc_context._raise_if_stored()
     if error_result != xmlerror.XML_ERR_OK:
@@ -487,6 +826,7 @@ cdef _create_output_buffer(f, const_char* c_enc, int compression,
                            tree.xmlOutputBuffer** c_buffer_ret):
     cdef tree.xmlOutputBuffer* c_buffer
     cdef _FilelikeWriter writer
+    cdef int fd
     enchandler = tree.xmlFindCharEncodingHandler(c_enc)
     if enchandler is NULL:
         raise LookupError(u"unknown encoding: '%s'" %
@@ -499,19 +839,212 @@ cdef _create_output_buffer(f, const_char* c_enc, int compression,
             if c_buffer is NULL:
                 return python.PyErr_SetFromErrno(IOError) # raises IOError
             writer = None
-        elif hasattr(f, 'write'):
-            writer = _FilelikeWriter(f, compression=compression)
-            c_buffer = writer._createOutputBuffer(enchandler)
         else:
-            raise TypeError(
-                u"File or filename expected, got '%s'" %
-                python._fqtypename(f).decode('UTF-8'))
+            fd = _osFileDescriptor(f, compression)
+            if fd >= 0:
+                c_buffer = tree.xmlOutputBufferCreateFd(fd, enchandler)
+                if c_buffer is NULL:
+                    raise MemoryError()
+                writer = None
+            elif hasattr(f, 'write'):
+                writer = _FilelikeWriter(f, compression=compression)
+                c_buffer = writer._createOutputBuffer(enchandler)
+            else:
+                raise TypeError(
+                    u"File or filename expected, got '%s'" %
+                    python._fqtypename(f).decode('UTF-8'))
     except:
         tree.xmlCharEncCloseFunc(enchandler)
         raise
     c_buffer_ret[0] = c_buffer
     return writer
 
+@cython.final
+@cython.internal
+cdef class _BufferWriter:
+    u"""Writes serialised data into writable buffer memory.  Bytearrays
+    are resized in place to the length of the output, other buffers raise
+    a ValueError when they are too small.
+    """
+    cdef object _bytearray
+    cdef Py_buffer _view
+    cdef bint _has_view
+    cdef char* _c_data
+    cdef Py_ssize_t _c_size
+    cdef Py_ssize_t _written
+    cdef _ExceptionContext _exc_context
+    def __cinit__(self, target):
+        self._exc_context = _ExceptionContext()
+        if isinstance(target, bytearray):
+            self._bytearray = target
+        elif python.PyObject_CheckBuffer(target):
+            python.PyObject_GetBuffer(target, &self._view, python.PyBUF_WRITABLE)
+            self._has_view = True
+            self._c_data = <char*>self._view.buf
+            self._c_size = self._view.len
+        else:
+            raise TypeError(
+                u"writable buffer expected, got '%s'" %
+                python._fqtypename(target).decode('UTF-8'))
+
+    def __dealloc__(self):
+        self._release()
+
+    cdef void _release(self):
+        if self._has_view:
+            self._has_view = False
+            python.PyBuffer_Release(&self._view)
+
+    cdef Py_ssize_t _finish(self) except -1:
+        u"""Cut off old bytearray content behind the written data and
+        return the number of bytes written.
+        """
+        if self._bytearray is not None and \
+                len(self._bytearray) > self._written:
+            python.PyByteArray_Resize(self._bytearray, self._written)
+        return self._written
+
+    cdef tree.xmlOutputBuffer* _createOutputBuffer(
+        self, tree.xmlCharEncodingHandler* enchandler) except NULL:
+        cdef tree.xmlOutputBuffer* c_buffer
+        c_buffer = tree.xmlOutputBufferCreateIO(
+            <tree.xmlOutputWriteCallback>_writeBufferWriter, NULL,
+            <python.PyObject*>self, enchandler)
+        if c_buffer is NULL:
+            raise MemoryError()
+        return c_buffer
+
+    cdef int write(self, const_char* c_data, int size):
+        cdef Py_ssize_t end = self._written + size
+        try:
+            if self._bytearray is not None:
+                if end > len(self._bytearray):
+                    python.PyByteArray_Resize(self._bytearray, end)
+                self._c_data = python.PyByteArray_AS_STRING(self._bytearray)
+            elif end > self._c_size:
+                raise ValueError, u"buffer too small for serialised data"
+            cstring_h.memcpy(self._c_data + self._written, c_data, size)
+            self._written = end
+            return size
+        except:
+            self._exc_context._store_raised()
+            return -1
+
+cdef int _writeBufferWriter(void* ctxt, char* c_buffer, int length):
+    return (<_BufferWriter>ctxt).write(c_buffer, length)
+
+cdef Py_ssize_t _tobuffer(target, _Element element, encoding, doctype, method,
+                          bint write_xml_declaration, bint write_complete_document,
+                          bint pretty_print, bint with_tail,
+                          int standalone) except -1:
+    u"""Serialize an element directly into a writable buffer and return the
+    number of bytes written.
+    """
+    cdef _BufferWriter writer
+    cdef tree.xmlOutputBuffer* c_buffer
+    cdef tree.xmlCharEncodingHandler* enchandler
+    cdef const_char* c_enc
+    cdef const_xmlChar* c_doctype
+    cdef int c_method
+    cdef int error_result
+    _assertValidNode(element)
+    if encoding is _unicode:
+        raise ValueError, \
+            u"Serialisation to unicode cannot be written into a buffer"
+    c_method = _findOutputMethod(method)
+    writer = _BufferWriter(target)
+    try:
+        if c_method == OUTPUT_METHOD_TEXT:
+            data = _textToString(element._c_node, encoding, with_tail)
+            writer.write(_cstr(data), len(data))
+            writer._exc_context._raise_if_stored()
+            return writer._finish()
+        if encoding is None:
+            c_enc = NULL
+        else:
+            encoding = _utf8(encoding)
+            c_enc = _cstr(encoding)
+        if doctype is None:
+            c_doctype = NULL
+        else:
+            doctype = _utf8(doctype)
+            c_doctype = _xcstr(doctype)
+        enchandler = tree.xmlFindCharEncodingHandler(c_enc)
+        if enchandler is NULL and c_enc is not NULL:
+            raise LookupError, u"unknown encoding: '%s'" % \
+                encoding.decode('UTF-8')
+        try:
+            c_buffer = writer._createOutputBuffer(enchandler)
+        except:
+            tree.xmlCharEncCloseFunc(enchandler)
+            raise
+
+        _writeNodeToBuffer(c_buffer, element._c_node, c_enc, c_doctype, c_method,
+                           write_xml_declaration, write_complete_document,
+                           pretty_print, with_tail, standalone)
+        error_result = c_buffer.error
+        if error_result == xmlerror.XML_ERR_OK:
+            error_result = tree.xmlOutputBufferClose(c_buffer)
+            if error_result > 0:
+                error_result = xmlerror.XML_ERR_OK
+        else:
+            tree.xmlOutputBufferClose(c_buffer)
+        writer._exc_context._raise_if_stored()
+        if error_result != xmlerror.XML_ERR_OK:
+            _raiseSerialisationError(error_result)
+        return writer._finish()
+    finally:
+        writer._release()
+
+cdef int _osFileDescriptor(f, int compression) except -2:
+    u"""Return the OS file descriptor of an output target that libxml2 can
+    write to without calling back into Python, or -1 for other targets.
+    Data that is pending in the Python level buffer of a file is flushed.
+    """
+    if isinstance(f, (int, long)) and not isinstance(f, bool):
+        if f < 0:
+            raise ValueError, u"invalid file descriptor: %d" % f
+        if compression:
+            raise ValueError, \
+                u"compression is not supported for file descriptors"
+        return f
+    if compression or type(f) not in _OS_FILE_TYPES:
+        return -1
+    f.flush()
+    return f.fileno()
+
+cdef _writeDataToFd(int fd, bytes data):
+    cdef tree.xmlOutputBuffer* c_buffer
+    cdef const_char* c_data = _cstr(data)
+    cdef int c_len = len(data)
+    cdef int error_result
+    c_buffer = tree.xmlOutputBufferCreateFd(fd, NULL)
+    if c_buffer is NULL:
+        raise MemoryError()
+    with nogil:
+        tree.xmlOutputBufferWrite(c_buffer, c_len, c_data)
+        error_result = c_buffer.error
+        if error_result == xmlerror.XML_ERR_OK:
+            error_result = tree.xmlOutputBufferClose(c_buffer)
+            if error_result > 0:
+                error_result = xmlerror.XML_ERR_OK
+        else:
+            tree.xmlOutputBufferClose(c_buffer)
+    if error_result != xmlerror.XML_ERR_OK:
+        _raiseSerialisationError(error_result)
+
+cdef _syncFilePosition(f):
+    u"""Let a Python file object pick up the position of its file
+    descriptor after libxml2 wrote to it directly.
+    """
+    if isinstance(f, (int, long)) or type(f) not in _OS_FILE_TYPES:
+        return
+    try:
+        f.seek(0, 1)
+    except (IOError, OSError, ValueError):
+        # not seekable
+        pass
+
 cdef xmlChar **_convert_ns_prefixes(tree.xmlDict* c_dict, ns_prefixes) except NULL:
     cdef size_t i, num_ns_prefixes = len(ns_prefixes)
     # Need to allocate one extra memory block to handle last NULL entry
@@ -540,7 +1073,7 @@ cdef _tofilelikeC14N(f, _Element element, bint exclusive, bint with_comments,
     cdef char* c_filename
     cdef xmlDoc* c_base_doc
     cdef xmlDoc* c_doc
-    cdef int bytes_count, error = 0
+    cdef int fd, bytes_count, error = 0
 
     c_base_doc = element._c_node.doc
     c_doc = _fakeRootDoc(c_base_doc, element._c_node)
@@ -549,6 +1082,7 @@ cdef _tofilelikeC14N(f, _Element element, bint exclusive, bint with_comments,
             _convert_ns_prefixes(c_doc.dict, inclusive_ns_prefixes)
             if inclusive_ns_prefixes else NULL)
 
+        fd = -1 if _isString(f) else _osFileDescriptor(f, compression)
         if _isString(f):
             filename8 = _encodeFilename(f)
             c_filename = _cstr(filename8)
@@ -556,7 +1090,21 @@ cdef _tofilelikeC14N(f, _Element element, bint exclusive, bint with_comments,
                 error = c14n.xmlC14NDocSave(
                     c_doc, NULL, exclusive, c_inclusive_ns_prefixes,
                     with_comments, c_filename, compression)
-        elif hasattr(f, 'write'):
+        elif fd >= 0:
+            c_buffer = tree.xmlOutputBufferCreateFd(fd, NULL)
+            if c_buffer is NULL:
+                raise MemoryError()
+            with nogil:
+                bytes_count = c14n.xmlC14NDocSaveTo(
+                    c_doc, NULL, exclusive, c_inclusive_ns_prefixes,
+                    with_comments, c_buffer)
+                error = tree.xmlOutputBufferClose(c_buffer)
+            if bytes_count < 0:
+                error = bytes_count
+            _syncFilePosition(f)
+        elif hasattr(f, 'write') or hasattr(f, 'update'):
+            if compression and not hasattr(f, 'write'):
+                raise ValueError, u"compression requires a file-like object"
             writer   = _FilelikeWriter(f, compression=compression)
             c_buffer = writer._createOutputBuffer(NULL)
             with writer.error_log:
@@ -567,7 +1115,7 @@ cdef _tofilelikeC14N(f, _Element element, bint exclusive, bint with_comments,
             if bytes_count < 0:
                 error = bytes_count
         else:
-            raise TypeError(u"File or filename expected, got '%s'" %
+            raise TypeError(u"File, filename or digest expected, got '%s'" %
                             python._fqtypename(f).decode('UTF-8'))
     finally:
         _destroyFakeDoc(c_base_doc, c_doc)
@@ -645,6 +1193,7 @@ cdef class _IncrementalFileWriter:
     cdef object _encoding
     cdef const_char* _c_encoding
     cdef object _target
+    cdef object _output_file
     cdef list _element_stack
     cdef int _status
 
@@ -655,6 +1204,7 @@ cdef class _IncrementalFileWriter:
             encoding = b'ASCII'
         self._encoding = encoding
         self._c_encoding = _cstr(encoding) if encoding is not None else NULL
+        self._output_file = outfile
         self._target = _create_output_buffer(outfile, self._c_encoding, compresslevel, &self._c_out)
 
     def __dealloc__(self):
@@ -837,9 +1387,17 @@ cdef class _IncrementalFileWriter:
             elif iselement(content):
                 if self._status > WRITER_IN_ELEMENT:
                     raise LxmlSyntaxError("cannot append trailing element to complete XML document")
-                _writeNodeToBuffer(self._c_out, (<_Element>content)._c_node,
-                                   self._c_encoding, NULL, OUTPUT_METHOD_XML,
-                                   False, False, pretty_print, with_tail, False)
+                if self._target is None:
+                    # native file output, no Python callbacks
+                    with nogil:
+                        _writeNodeToBuffer(
+                            self._c_out, (<_Element>content)._c_node,
+                            self._c_encoding, NULL, OUTPUT_METHOD_XML,
+                            False, False, pretty_print, with_tail, False)
+                else:
+                    _writeNodeToBuffer(self._c_out, (<_Element>content)._c_node,
+                                       self._c_encoding, NULL, OUTPUT_METHOD_XML,
+                                       False, False, pretty_print, with_tail, False)
                 if (<_Element>content)._c_node.type == tree.XML_ELEMENT_NODE:
                     if not self._element_stack:
                         self._status = WRITER_FINISHED
@@ -847,6 +1405,20 @@ cdef class _IncrementalFileWriter:
                 raise TypeError("got invalid input value of type %s, expected string or Element" % type(content))
             self._handle_error(self._c_out.error)
 
+    def flush(self):
+        """flush(self)
+
+        Write any data that is buffered internally to the output file.
+        """
+        assert self._c_out is not NULL
+        if self._target is None:
+            with nogil:
+                tree.xmlOutputBufferFlush(self._c_out)
+            _syncFilePosition(self._output_file)
+        else:
+            tree.xmlOutputBufferFlush(self._c_out)
+        self._handle_error(self._c_out.error)
+
     cdef _close(self, bint raise_on_error):
         if raise_on_error:
             if self._status < WRITER_IN_ELEMENT:
@@ -861,13 +1433,15 @@ cdef class _IncrementalFileWriter:
         else:
             tree.xmlOutputBufferClose(self._c_out)
         self._c_out = NULL
+        if self._target is None:
+            _syncFilePosition(self._output_file)
         if raise_on_error:
             self._handle_error(error_result)
 
     cdef _handle_error(self, int error_result):
         if error_result != xmlerror.XML_ERR_OK:
-            if self._writer is not None:
-                self._writer._exc_context._raise_if_stored()
+            if self._target is not None:
+                (<_FilelikeWriter>self._target)._exc_context._raise_if_stored()
             _raiseSerialisationError(error_result)
 
 @cython.final
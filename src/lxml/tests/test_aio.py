@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the asyncio front-ends in lxml.aio.
+
+Tests require Python 3.5 or later.
+"""
+
+import unittest
+import asyncio
+import os, sys
+from concurrent.futures import ThreadPoolExecutor
+
+this_dir = os.path.dirname(__file__)
+if this_dir not in sys.path:
+    sys.path.insert(0, this_dir) # needed for Py3
+
+from common_imports import etree, HelperTestCase, _bytes
+
+from lxml import aio
+
+
+class ChunkReader(object):
+    "An asynchronous reader that returns at most one small chunk per call."
+    def __init__(self, data, chunk_size=7):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    async def read(self, size):
+        await asyncio.sleep(0)
+        size = min(size, self.chunk_size)
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+class ChunkWriter(object):
+    "An asynchronous writer that records each write."
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    async def write(self, data):
+        await asyncio.sleep(0)
+        self.chunks.append(data)
+
+    async def close(self):
+        self.closed = True
+
+
+class AsyncioTestCase(HelperTestCase):
+    etree = etree
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_aparse(self):
+        reader = ChunkReader(_bytes('<root><a>test</a><b/></root>'))
+        tree = self.run_async(aio.aparse(reader))
+        self.assertEqual('root', tree.getroot().tag)
+        self.assertEqual('test', tree.find('a').text)
+
+    def test_aparse_parser(self):
+        reader = ChunkReader(_bytes('<html><body><p>test</body></html>'))
+        tree = self.run_async(aio.aparse(reader, etree.HTMLParser()))
+        self.assertEqual('test', tree.find('body/p').text)
+
+    def test_aparse_stream_reader(self):
+        async def parse():
+            reader = asyncio.StreamReader()
+            reader.feed_data(_bytes('<root><a/>'))
+            reader.feed_data(_bytes('</root>'))
+            reader.feed_eof()
+            return await aio.aparse(reader, chunk_size=4)
+        tree = self.run_async(parse())
+        self.assertEqual('a', tree.getroot()[0].tag)
+
+    def test_aparse_executor(self):
+        reader = ChunkReader(_bytes('<root>%s</root>' % ('<a/>' * 100)))
+        executor = ThreadPoolExecutor(2)
+        try:
+            tree = self.run_async(aio.aparse(reader, executor=executor))
+        finally:
+            executor.shutdown()
+        self.assertEqual(100, len(tree.getroot()))
+
+    def test_aparse_error(self):
+        reader = ChunkReader(_bytes('<root><a></root>'))
+        self.assertRaises(etree.XMLSyntaxError,
+                          self.run_async, aio.aparse(reader))
+
+    def test_aparse_concurrent(self):
+        async def parse_all():
+            return await asyncio.gather(*[
+                aio.aparse(ChunkReader(_bytes('<root n="%d"><a/></root>' % i)))
+                for i in range(10) ])
+        trees = self.run_async(parse_all())
+        self.assertEqual([str(i) for i in range(10)],
+                         [tree.getroot().get('n') for tree in trees])
+
+    def test_iterparse(self):
+        async def collect(reader):
+            iterator = aio.iterparse(reader, events=('start', 'end'))
+            events = [(event, element.tag)
+                      async for event, element in iterator]
+            return events, iterator.root
+        events, root = self.run_async(collect(
+            ChunkReader(_bytes('<root><a><b/></a><c/></root>'))))
+        self.assertEqual(
+            [('start', 'root'), ('start', 'a'), ('start', 'b'), ('end', 'b'),
+             ('end', 'a'), ('start', 'c'), ('end', 'c'), ('end', 'root')],
+            events)
+        self.assertEqual('root', root.tag)
+
+    def test_iterparse_tag(self):
+        async def collect(reader):
+            return [element.text async for event, element
+                    in aio.iterparse(reader, tag='a')]
+        self.assertEqual(['1', '2'], self.run_async(collect(
+            ChunkReader(_bytes('<root><a>1</a><b/><c><a>2</a></c></root>')))))
+
+    def test_iterparse_html(self):
+        async def collect(reader):
+            return [element.tag async for event, element
+                    in aio.iterparse(reader, html=True, tag='p')]
+        self.assertEqual(['p', 'p'], self.run_async(collect(
+            ChunkReader(_bytes('<html><body><p>1<p>2</body></html>')))))
+
+    def test_iterparse_error(self):
+        async def collect(reader):
+            return [element async for event, element
+                    in aio.iterparse(reader)]
+        self.assertRaises(etree.XMLSyntaxError, self.run_async, collect(
+            ChunkReader(_bytes('<root><a></b></root>'))))
+
+    def test_xmlfile(self):
+        writer = ChunkWriter()
+        async def write():
+            async with aio.xmlfile(writer, close=True) as xf:
+                xf.write_declaration()
+                with xf.element('root'):
+                    for i in range(3):
+                        xf.write(etree.Element('a', n=str(i)))
+                        await xf.flush()
+        self.run_async(write())
+        self.assertTrue(len(writer.chunks) > 1)
+        self.assertTrue(writer.closed)
+        root = etree.fromstring(_bytes('').join(writer.chunks))
+        self.assertEqual(['0', '1', '2'], [el.get('n') for el in root])
+
+    def test_xmlfile_stream_writer(self):
+        class Transport(asyncio.Transport):
+            def __init__(self):
+                asyncio.Transport.__init__(self)
+                self.data = []
+            def write(self, data):
+                self.data.append(data)
+            def is_closing(self):
+                return False
+            def close(self):
+                pass
+
+        transport = Transport()
+        async def write():
+            protocol = asyncio.StreamReaderProtocol(asyncio.StreamReader())
+            writer = asyncio.StreamWriter(
+                transport, protocol, None, asyncio.get_event_loop())
+            async with aio.xmlfile(writer, encoding='utf-8') as xf:
+                with xf.element('root'):
+                    xf.write('text')
+        self.run_async(write())
+        self.assertEqual(_bytes('<root>text</root>'),
+                         _bytes('').join(transport.data))
+
+    def test_xmlfile_error(self):
+        writer = ChunkWriter()
+        async def write():
+            async with aio.xmlfile(writer) as xf:
+                with xf.element('root'):
+                    await xf.flush()
+                    raise ValueError
+        self.assertRaises(ValueError, self.run_async, write())
+        self.assertEqual(_bytes('<root>'), _bytes('').join(writer.chunks))
+
+
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTests([unittest.makeSuite(AsyncioTestCase)])
+    return suite
+
+if __name__ == '__main__':
+    print('to test use test.py %s' % __file__)
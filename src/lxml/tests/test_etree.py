@@ -16,6 +16,7 @@ import gc
 import operator
 import tempfile
 import gzip
+import hashlib
 
 this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
@@ -65,6 +66,14 @@ class ETreeOnlyTestCase(HelperTestCase):
             # older C-API mechanism
             self.assertTrue(hasattr(self.etree, '_import_c_api'))
 
+    def test_all_names(self):
+        for name in etree.__all__:
+            self.assertTrue(hasattr(etree, name), name)
+        for name in ['XMLPullParser', 'HTMLPullParser', 'parse_all',
+                     'parse_mmap', 'iterparse_records', 'Serializer',
+                     'set_xslt_cache_size', 'parser_context_pool_info']:
+            self.assertTrue(name in etree.__all__, name)
+
     def test_element_names(self):
         Element = self.etree.Element
         el = Element('name')
@@ -549,6 +558,37 @@ class ETreeOnlyTestCase(HelperTestCase):
             _bytes('<a><b><c/></b></a>'),
             tostring(root))
 
+    def test_parser_context_pool(self):
+        fromstring = self.etree.fromstring
+        tostring = self.etree.tostring
+        XMLParser = self.etree.XMLParser
+        pool_info = self.etree.parser_context_pool_info
+        set_pool_size = self.etree.set_parser_context_pool_size
+
+        # start with an empty pool
+        set_pool_size(0)
+        set_pool_size(16)
+
+        xml = _bytes('<a><!--A--><b/></a>')
+        root = fromstring(xml, XMLParser(remove_comments=True))
+        size = pool_info()['size']
+        del root  # releases the parser and its context
+        self.assertEqual(size + 1, pool_info()['size'])
+
+        hits = pool_info()['hits']
+        root = fromstring(xml, XMLParser(remove_comments=True))
+        self.assertEqual(hits + 1, pool_info()['hits'])
+        self.assertEqual(size, pool_info()['size'])
+        self.assertEqual(_bytes('<a><b/></a>'), tostring(root))
+
+        # different configuration
+        root = fromstring(xml, XMLParser())
+        self.assertEqual(hits + 1, pool_info()['hits'])
+        self.assertEqual(_bytes('<a><!--A--><b/></a>'), tostring(root))
+
+        self.assertRaises(self.etree.XMLSyntaxError,
+                          fromstring, _bytes('<a>'), XMLParser(remove_comments=True))
+
     def test_parse_remove_pis(self):
         parse = self.etree.parse
         tostring = self.etree.tostring
@@ -651,6 +691,232 @@ class ETreeOnlyTestCase(HelperTestCase):
         # ET raises ExpatError, lxml raises XMLSyntaxError
         self.assertRaises(self.etree.XMLSyntaxError, list, iterparse(f))
 
+    def test_iterparse_buffer_size(self):
+        iterparse = self.etree.iterparse
+        xml = _bytes('<a><b>%s</b><c/></a>' % ('x' * 100))
+        for f in (BytesIO(xml), SillyFileLike(xml)):
+            events = [ (event, el.tag)
+                       for event, el in iterparse(f, buffer_size=7) ]
+            self.assertEqual(
+                [('end', 'b'), ('end', 'c'), ('end', 'a')], events)
+
+    def test_parse_buffer_size(self):
+        etree = self.etree
+        xml = _bytes('<a><b>%s</b><c/></a>' % ('x' * 100))
+        parser = etree.XMLParser(buffer_size=5)
+        for f in (BytesIO(xml), SillyFileLike(xml)):
+            self.assertEqual(xml, etree.tostring(etree.parse(f, parser)))
+        for f in (BytesIO(xml), SillyFileLike(xml)):
+            self.assertEqual(
+                xml, etree.tostring(etree.parse(f, buffer_size=3)))
+
+    def test_parse_buffer_size_keeps_parser(self):
+        etree = self.etree
+        xml = _bytes('<a><b>%s</b><c/></a>' % ('x' * 100))
+        class RecordingFileLike(SillyFileLike):
+            def __init__(self, xml_data):
+                SillyFileLike.__init__(self, xml_data)
+                self.sizes = []
+            def read(self, amount=None):
+                self.sizes.append(amount)
+                return SillyFileLike.read(self, amount)
+        parser = etree.XMLParser()
+        f = RecordingFileLike(xml)
+        tree = etree.parse(f, parser, buffer_size=3)
+        self.assertTrue(tree.parser is parser)
+        self.assertEqual(3, max(f.sizes))
+
+    def test_parse_readinto_none(self):
+        # readinto() returns None on non-blocking streams without data
+        etree = self.etree
+        xml = _bytes('<a><b>%s</b><c/></a>' % ('x' * 100))
+        class NonBlockingFileLike(object):
+            def __init__(self, data):
+                self._f = BytesIO(data)
+            def readinto(self, buffer):
+                return None
+            def read(self, amount=-1):
+                return self._f.read(amount)
+        self.assertEqual(xml, etree.tostring(
+            etree.parse(NonBlockingFileLike(xml), buffer_size=7)))
+        events = [ el.tag for event, el in etree.iterparse(
+            NonBlockingFileLike(xml), buffer_size=7) ]
+        self.assertEqual(['b', 'c', 'a'], events)
+
+    def test_parser_buffer_size_invalid(self):
+        etree = self.etree
+        self.assertRaises(ValueError, etree.XMLParser, buffer_size=0)
+        self.assertRaises(ValueError, etree.HTMLParser, buffer_size=-1)
+        self.assertRaises(ValueError, etree.parse,
+                          BytesIO(_bytes('<a/>')), buffer_size=0)
+
+    def test_iterparse_discard_processed(self):
+        iterparse = self.etree.iterparse
+        tostring = self.etree.tostring
+        f = BytesIO('<a>A<x/><b><c/></b>1<b/>2<y><b/></y>3<b>t</b>4</a>')
+        iterator = iterparse(f, tag='b', discard='processed')
+        kept = []
+        for event, element in iterator:
+            if kept:
+                self.assertEqual(None, kept[-1].getprevious())
+            kept.append(element)
+        self.assertEqual(_bytes('<a>A<b>t</b>4</a>'), tostring(iterator.root))
+        self.assertEqual(6, iterator.discarded_elements)
+        # removed elements stay intact while they are referenced
+        self.assertEqual(
+            [_bytes('<b><c/></b>1'), _bytes('<b/>2'), _bytes('<b/>'),
+             _bytes('<b>t</b>4')],
+            [ tostring(el) for el in kept ])
+
+    def test_iterparse_read_events_batch(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a><b><c/></b><d/></a>')
+        iterator = iterparse(f, events=('start', 'end'))
+        events = []
+        batch = iterator.read_events_batch(3)
+        while batch:
+            self.assertTrue(len(batch) <= 3)
+            events.extend([ (event, el.tag) for event, el in batch ])
+            batch = iterator.read_events_batch(3)
+        self.assertEqual(
+            [('start', 'a'), ('start', 'b'), ('start', 'c'), ('end', 'c'),
+             ('end', 'b'), ('start', 'd'), ('end', 'd'), ('end', 'a')],
+            events)
+        self.assertEqual('a', iterator.root.tag)
+        self.assertEqual([], iterator.read_events_batch(3))
+
+    def test_iterparse_discard_invalid(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a/>')
+        self.assertRaises(ValueError, iterparse, f, discard='all')
+        self.assertRaises(ValueError, iterparse, f, events=('start',),
+                          discard='processed')
+
+    def test_iterparse_path(self):
+        iterparse = self.etree.iterparse
+        tostring = self.etree.tostring
+        f = BytesIO('<feed><entry type="x"><price>1</price><name/></entry>'
+                    '<entry type="y"><price>2</price></entry>'
+                    '<other><entry type="x"><price>3</price></entry></other>'
+                    '<entry type="x"><price>4</price><price>5</price></entry>'
+                    '</feed>')
+        iterator = iterparse(f, events=('start', 'end'),
+                             path="/feed/entry[@type='x']/price")
+        events = [ (event, el.text) for event, el in iterator ]
+        self.assertEqual(
+            [('start', '1'), ('end', '1'), ('start', '4'), ('end', '4'),
+             ('start', '5'), ('end', '5')],
+            events)
+        self.assertEqual(
+            _bytes('<feed><entry type="x"><price>1</price></entry>'
+                   '<entry type="x"><price>4</price><price>5</price></entry>'
+                   '</feed>'),
+            tostring(iterator.root))
+
+    def test_iterparse_path_descendant(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a><b><c n="1"/></b><c n="2"><b><c n="3"/></b></c>'
+                    '<d><e><b><c n="4"/><c/></b></e></d></a>')
+        self.assertEqual(
+            ['1', '3', '4'],
+            [ el.get('n') for event, el in iterparse(f, path='//b/c[@n]') ])
+        f.seek(0)
+        self.assertEqual(
+            ['1', '3', '4', None],
+            [ el.get('n') for event, el in iterparse(f, path='/a//b/*') ])
+        f.seek(0)
+        self.assertEqual(
+            ['3'],
+            [ el.get('n') for event, el in iterparse(f, path='a/c//c') ])
+        f.seek(0)
+        self.assertEqual(
+            ['1', '3', '2'],
+            [ el.get('n') for event, el
+              in iterparse(f, path="//c[@n != '4']") ])
+
+    def test_iterparse_path_nested_matches(self):
+        iterparse = self.etree.iterparse
+        tostring = self.etree.tostring
+        f = BytesIO('<a><b id="1"><x/><b id="2"><y/></b></b><z/></a>')
+        iterator = iterparse(f, events=('start', 'end'), path='//b')
+        self.assertEqual(
+            [('start', '1'), ('start', '2'), ('end', '2'), ('end', '1')],
+            [ (event, el.get('id')) for event, el in iterator ])
+        self.assertEqual(
+            _bytes('<a><b id="1"><x/><b id="2"><y/></b></b></a>'),
+            tostring(iterator.root))
+
+    def test_iterparse_path_namespaces(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a xmlns="ns" xmlns:o="other"><b o:k="1" k="2"/>'
+                    '<b k="1"/><o:b o:k="1"/></a>')
+        self.assertEqual(
+            ['{ns}b'],
+            [ el.tag for event, el
+              in iterparse(f, path="/{ns}a/{ns}b[@{other}k='1']") ])
+        f.seek(0)
+        self.assertEqual(
+            ['{ns}b', '{other}b'],
+            [ el.tag for event, el
+              in iterparse(f, path="/*/*[@{other}k]") ])
+
+    def test_iterparse_path_text_kept(self):
+        iterparse = self.etree.iterparse
+        tostring = self.etree.tostring
+        f = BytesIO('<a>A<x>X</x>1<b>B</b>2<y/>3<z>Z</z>4</a>')
+        iterator = iterparse(f, path='/a/b')
+        self.assertEqual(['B'], [ el.text for event, el in iterator ])
+        self.assertEqual(_bytes('<a>A<b>B</b>2</a>'), tostring(iterator.root))
+
+    def test_iterparse_path_small_chunks(self):
+        iterparse = self.etree.iterparse
+        tostring = self.etree.tostring
+        data = ''.join([ '<r>%s<v>%d</v>%st</r>' % ('<w/>' * (i % 3), i,
+                                                   '<w><w/></w>' * (i % 2))
+                         for i in range(200) ])
+        f = BytesIO('<a>%s</a>' % data)
+        iterator = iterparse(f, path='/a/r/v', buffer_size=7)
+        values = []
+        for event, el in iterator:
+            values.append(int(el.text))
+            # modifying the tree between parser calls must be safe
+            root = el.getroottree().getroot()
+            del root[:-1]
+        self.assertEqual(list(range(200)), values)
+        self.assertEqual(_bytes('<a><r><v>199</v></r></a>'),
+                         tostring(iterator.root))
+
+    def test_iterparse_path_discard_processed(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a>%s</a>' % ('<e><p>1</p><q/></e><x/>' * 100))
+        iterator = iterparse(f, path='/a/e/p', discard='processed')
+        self.assertEqual(100, len([ el for event, el in iterator ]))
+        self.assertEqual(1, len(iterator.root))
+
+    def test_iterparse_path_html(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<html><body><div class="a"><p>1</p></div>'
+                    '<div><p>2</p></div><P>3</P></body></html>')
+        self.assertEqual(
+            ['1'],
+            [ el.text for event, el
+              in iterparse(f, html=True, path="//div[@class='a']/p") ])
+        f.seek(0)
+        self.assertEqual(
+            ['3'],
+            [ el.text for event, el in iterparse(f, html=True,
+                                                path="/html/body/p") ])
+
+    def test_iterparse_path_invalid(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a/>')
+        for path in ['', '/', 'a//', 'a/b/', 'a[1]', 'a[text()]',
+                     'a/@b', 'a/text()', '../a', 'p:a', 'a[@b=c]']:
+            self.assertRaises(SyntaxError, iterparse, f, path=path)
+        self.assertRaises(ValueError, iterparse, f, tag='a', path='/a')
+        self.assertRaises(ValueError, iterparse, f, path='/a',
+                          dtd_validation=True)
+
     def test_iterparse_strip(self):
         iterparse = self.etree.iterparse
         f = BytesIO("""
@@ -793,6 +1059,123 @@ class ETreeOnlyTestCase(HelperTestCase):
         # FIXME: would be nice to get some errors logged ...
         #self.assertTrue(len(parser.error_log) > 0, "error log is empty")
 
+    def test_pull_parser(self):
+        parser = self.etree.XMLPullParser(events=('start', 'end'))
+        parser.feed('<root><a>te')
+        self.assertEqual([('start', 'root'), ('start', 'a')],
+                         [ (event, el.tag) for event, el in parser.read_events() ])
+        self.assertEqual([], list(parser.read_events()))
+        parser.feed('xt</a><b/></ro')
+        events = list(parser.read_events())
+        self.assertEqual([('end', 'a'), ('start', 'b'), ('end', 'b')],
+                         [ (event, el.tag) for event, el in events ])
+        self.assertEqual('text', events[0][1].text)
+        parser.feed('ot>')
+        root = parser.close()
+        self.assertEqual([('end', 'root')],
+                         [ (event, el.tag) for event, el in parser.read_events() ])
+        self.assertEqual('root', root.tag)
+        self.assertEqual(['a', 'b'], [ el.tag for el in root ])
+
+    def test_pull_parser_tag(self):
+        parser = self.etree.XMLPullParser(tag='b')
+        parser.feed('<root><a/><b>1</b><c><b>2</b></c></root>')
+        self.assertEqual(['1', '2'],
+                         [ el.text for event, el in parser.read_events() ])
+        self.assertEqual('root', parser.close().tag)
+
+    def test_pull_parser_error(self):
+        etree = self.etree
+        parser = etree.XMLPullParser()
+        parser.feed('<root><a/>')
+        self.assertEqual(['a'], [ el.tag for event, el in parser.read_events() ])
+        self.assertRaises(etree.XMLSyntaxError, parser.feed, '</wrong>')
+
+        # the parser can be reused after an error
+        parser.feed('<root/>')
+        self.assertEqual('root', parser.close().tag)
+        self.assertEqual(['root'], [ el.tag for event, el in parser.read_events() ])
+
+    def test_pull_parser_close_error(self):
+        etree = self.etree
+        parser = etree.XMLPullParser(events=('start',))
+        parser.feed('<root><a>')
+        self.assertEqual(['root', 'a'],
+                         [ el.tag for event, el in parser.read_events() ])
+        self.assertRaises(etree.XMLSyntaxError, parser.close)
+
+    def test_pull_parser_target(self):
+        class Target(object):
+            def close(self):
+                return None
+        self.assertRaises(TypeError, self.etree.XMLPullParser, target=Target())
+
+    def test_pull_parser_as_parser(self):
+        etree = self.etree
+        parser = etree.XMLPullParser()
+        root = etree.fromstring('<root><a/></root>', parser)
+        self.assertEqual('a', root[0].tag)
+        self.assertEqual([], list(parser.read_events()))
+
+    def test_html_pull_parser(self):
+        parser = self.etree.HTMLPullParser(
+            events=('start', 'end', 'start-ns'), tag='p')
+        parser.feed('<html><body><p>a</p><div><p>b')
+        self.assertEqual([('start', 'p'), ('end', 'p'), ('start', 'p')],
+                         [ (event, el.tag) for event, el in parser.read_events() ])
+        parser.feed('</p></div></body></html>')
+        root = parser.close()
+        self.assertEqual([('end', 'p')],
+                         [ (event, el.tag) for event, el in parser.read_events() ])
+        self.assertEqual('html', root.tag)
+
+    if sys.version_info >= (2,7):
+        def test_fromstring_buffer(self):
+            etree = self.etree
+            data = _bytes('<root><a>test</a></root>')
+            for source in (bytearray(data), memoryview(data)):
+                root = etree.fromstring(source)
+                self.assertEqual("root", root.tag)
+                self.assertEqual("test", root[0].text)
+
+        def test_parse_buffer(self):
+            etree = self.etree
+            data = bytearray(_bytes('<root><a/></root>'))
+            tree = etree.parse(data)
+            self.assertEqual("a", tree.getroot()[0].tag)
+            self.assertRaises(etree.XMLSyntaxError,
+                              etree.parse, memoryview(data[:-1]))
+
+        def test_feed_parser_buffer(self):
+            parser = self.etree.XMLParser()
+            parser.feed(bytearray(_bytes('<root><a')))
+            parser.feed(memoryview(_bytes('/></root>')))
+            root = parser.close()
+            self.assertEqual("root", root.tag)
+            self.assertEqual("a", root[0].tag)
+
+    def test_parse_mmap(self):
+        etree = self.etree
+        handle, filename = tempfile.mkstemp()
+        try:
+            os.write(handle, _bytes('<root><a/></root>'))
+            tree = etree.parse_mmap(filename)
+            self.assertEqual("a", tree.getroot()[0].tag)
+            self.assertEqual(filename, tree.docinfo.URL)
+        finally:
+            os.close(handle)
+            os.remove(filename)
+
+    def test_parse_mmap_empty(self):
+        etree = self.etree
+        handle, filename = tempfile.mkstemp()
+        try:
+            self.assertRaises(etree.XMLSyntaxError,
+                              etree.parse_mmap, filename)
+        finally:
+            os.close(handle)
+            os.remove(filename)
+
     def test_elementtree_parser_target_type_error(self):
         assertEqual = self.assertEqual
         assertFalse  = self.assertFalse
@@ -1032,6 +1415,22 @@ class ETreeOnlyTestCase(HelperTestCase):
         self.assertEqual(0,
                           len(root))
 
+    def test_iterwalk_read_events_batch(self):
+        iterwalk = self.etree.iterwalk
+        root = self.etree.XML(_bytes('<a><b><c/></b><d/></a>'))
+        iterator = iterwalk(root, events=('start', 'end'))
+        batches = []
+        batch = iterator.read_events_batch(3)
+        while batch:
+            batches.append([ (event, el.tag) for event, el in batch ])
+            batch = iterator.read_events_batch(3)
+        self.assertEqual(
+            [[('start', 'a'), ('start', 'b'), ('start', 'c')],
+             [('end', 'c'), ('end', 'b'), ('start', 'd')],
+             [('end', 'd'), ('end', 'a')]],
+            batches)
+        self.assertRaises(ValueError, iterator.read_events_batch, 0)
+
     def test_iterwalk_attrib_ns(self):
         iterwalk = self.etree.iterwalk
         root = self.etree.XML(_bytes('<a xmlns="ns1"><b><c xmlns="ns2"/></b></a>'))
@@ -2517,6 +2916,82 @@ class ETreeOnlyTestCase(HelperTestCase):
         self.assertRaises(SyntaxError, root.findall, '//')  # absolute path on Element
         self.assertRaises(SyntaxError, root.findall, './//')
 
+    def test_findall_path_cache(self):
+        from lxml import _elementpath
+        XML = self.etree.XML
+        root = XML(_bytes('<a xmlns:x="X"><x:b/><b/><c><x:b/><b/></c></a>'))
+        old_size = _elementpath.cache_info()['maxsize']
+        _elementpath.clear_cache()
+        try:
+            self.assertEqual(len(root.findall(".//b")), 2)
+            self.assertEqual(len(root.findall(".//b")), 2)
+            info = _elementpath.cache_info()
+            self.assertEqual(1, info['misses'])
+            self.assertEqual(1, info['hits'])
+
+            # same path, different namespace mappings
+            self.assertEqual(len(root.findall(".//p:b", {'p': 'X'})), 2)
+            self.assertEqual(len(root.findall(".//p:b", {'p': 'Y'})), 0)
+            self.assertEqual(len(root.findall(".//p:b", {'p': 'X'})), 2)
+            info = _elementpath.cache_info()
+            self.assertEqual(3, info['misses'])
+            self.assertEqual(2, info['hits'])
+            self.assertEqual(3, info['size'])
+
+            _elementpath.set_cache_size(2)
+            info = _elementpath.cache_info()
+            self.assertEqual(2, info['size'])
+            self.assertEqual(1, info['evictions'])
+            # ".//b" was least recently used and got evicted
+            root.findall(".//b")
+            self.assertEqual(4, _elementpath.cache_info()['misses'])
+        finally:
+            _elementpath.set_cache_size(old_size)
+            _elementpath.clear_cache()
+
+    def test_find_same_as_elementpath(self):
+        # simple paths are evaluated in C, make sure they behave exactly
+        # like the generic implementation in _elementpath
+        from lxml import _elementpath
+        XML = self.etree.XML
+        root = XML(_bytes(
+            '<a xmlns:x="X"><b><c/><b><c>t</c><x:c/></b></b><!--c-->'
+            '<x:b><c/></x:b><c><b/><b><c>u</c></b></c><?pi?></a>'))
+        nsmap = {'x': 'X'}
+        paths = ['b', '*', '.', './/c', 'b//c', './/b/c', './/*', '*//*',
+                 './/b//c', 'x:b/c', './/x:*', '{X}b/*', './/{*}c',
+                 'b/', './b/./c', 'b//b//c', 'b/.', 'nothing//c']
+        for el in (root, root[0], root[0][1]):
+            for path in paths:
+                self.assertEqual(
+                    _elementpath.findall(el, path, nsmap),
+                    el.findall(path, nsmap))
+                self.assertEqual(
+                    list(_elementpath.iterfind(el, path, nsmap)),
+                    list(el.iterfind(path, nsmap)))
+                self.assertTrue(
+                    _elementpath.find(el, path, nsmap) is
+                    el.find(path, namespaces=nsmap))
+                self.assertEqual(
+                    _elementpath.findtext(el, path, 'X', nsmap),
+                    el.findtext(path, 'X', nsmap))
+
+    def test_find_does_not_keep_documents(self):
+        # compiled paths are cached globally, but must not keep the
+        # documents alive that they were evaluated on
+        XML = self.etree.XML
+        def count_documents():
+            gc.collect()
+            return len([ obj for obj in gc.get_objects()
+                         if type(obj).__name__ == '_Document' ])
+        count = count_documents()
+        for i in range(5):
+            root = XML(_bytes('<a><b%d/><c><b%d/></c></a>' % (i, i)))
+            self.assertEqual(1, len(root.findall('b%d' % i)))
+            self.assertEqual(2, len(list(root.iterfind('.//b%d' % i))))
+            del root
+        self.assertEqual(count, count_documents())
+
     def test_index(self):
         etree = self.etree
         e = etree.Element('foo')
@@ -3022,6 +3497,156 @@ class ETreeOnlyTestCase(HelperTestCase):
         result = tostring(a, pretty_print=True)
         self.assertEqual(result, _bytes("<a>\n  <b/>\n  <c/>\n</a>\n"))
 
+    def test_tostring_into_bytearray(self):
+        tostring = self.etree.tostring
+        root = self.etree.XML(_bytes('<a><b>%s</b><c/></a>' % ('x' * 20000)))
+        expected = tostring(root)
+
+        buf = bytearray()
+        self.assertEqual(len(expected), tostring(root, into=buf))
+        self.assertEqual(expected, bytes(buf))
+
+        buf = bytearray(_bytes('_' * (len(expected) + 10)))
+        self.assertEqual(len(expected), tostring(root, into=buf))
+        self.assertEqual(expected, bytes(buf))
+
+        self.assertEqual(4, tostring(root[1], into=buf))
+        self.assertEqual(_bytes('<c/>'), bytes(buf))
+
+    def test_tostring_into_options(self):
+        tostring = self.etree.tostring
+        root = self.etree.XML(_bytes('<a>\xc3\xa4<b/>t</a>'))
+        for kwargs in [dict(encoding='UTF-16'), dict(encoding='ISO-8859-1'),
+                       dict(pretty_print=True, xml_declaration=True),
+                       dict(method='html'),
+                       dict(method='text', encoding='UTF-8')]:
+            buf = bytearray()
+            count = tostring(root, into=buf, **kwargs)
+            self.assertEqual(tostring(root, **kwargs), bytes(buf[:count]))
+
+        tree = self.etree.ElementTree(root)
+        buf = bytearray()
+        count = tostring(tree, into=buf, doctype='<!DOCTYPE a>')
+        self.assertEqual(tostring(tree, doctype='<!DOCTYPE a>'), bytes(buf))
+
+    def test_tostring_into_fixed_buffer(self):
+        tostring = self.etree.tostring
+        root = self.etree.XML(_bytes('<a><b/></a>'))
+        buf = bytearray(20)
+        view = memoryview(buf)
+        self.assertEqual(11, tostring(root, into=view[5:]))
+        self.assertEqual(_bytes('<a><b/></a>'), bytes(buf[5:16]))
+        self.assertRaises(ValueError, tostring, root, into=view[:5])
+        del view
+
+    def test_tostring_into_errors(self):
+        tostring = self.etree.tostring
+        root = self.etree.XML(_bytes('<a/>'))
+        self.assertRaises(TypeError, tostring, root, into=object())
+        self.assertRaises((TypeError, BufferError), tostring, root,
+                          into=_bytes('read-only'))
+        self.assertRaises(ValueError, tostring, root, into=bytearray(),
+                          encoding=_unicode)
+        self.assertRaises(ValueError, tostring, root, into=bytearray(),
+                          method='c14n')
+        self.assertRaises(LookupError, tostring, root, into=bytearray(),
+                          encoding='hopefully-unknown')
+
+    def test_write_into(self):
+        tostring = self.etree.tostring
+        tree = self.etree.ElementTree(self.etree.XML(
+            _bytes('<a><b>%s</b></a>' % ('y' * 10000))))
+        buf = bytearray(10)
+        count = tree.write_into(buf, encoding='UTF-8', xml_declaration=True)
+        self.assertEqual(tostring(tree, encoding='UTF-8', xml_declaration=True),
+                         bytes(buf))
+        self.assertEqual(len(buf), count)
+        self.assertRaises(ValueError, tree.write_into, buf, method='c14n')
+        self.assertRaises(AssertionError,
+                          self.etree.ElementTree().write_into, buf)
+
+    def test_tostring_many(self):
+        tostring = self.etree.tostring
+        tostring_many = self.etree.tostring_many
+        root = self.etree.XML(_bytes(
+            '<root xmlns:x="X"><a>1</a>t<x:b y="&#228;"/><c><d/></c></root>'))
+        elements = list(root)
+        self.assertEqual([tostring(el) for el in elements],
+                         tostring_many(elements))
+        self.assertEqual([tostring(el, pretty_print=True, with_tail=False)
+                          for el in elements],
+                         tostring_many(elements, pretty_print=True,
+                                       with_tail=False))
+        self.assertEqual([], tostring_many([]))
+
+    def test_tostring_many_join(self):
+        tostring = self.etree.tostring
+        tostring_many = self.etree.tostring_many
+        root = self.etree.XML(_bytes('<root><a>1</a><b/><c>3</c></root>'))
+        data, offsets = tostring_many(root, join=True)
+        self.assertEqual(_bytes('<a>1</a><b/><c>3</c>'), data)
+        self.assertEqual([0, 8, 12, 20], offsets)
+        self.assertEqual([tostring(el) for el in root],
+                         [data[offsets[i]:offsets[i+1]] for i in range(3)])
+        self.assertEqual((_bytes(''), [0]), tostring_many([], join=True))
+
+    def test_tostring_many_encoding(self):
+        tostring = self.etree.tostring
+        tostring_many = self.etree.tostring_many
+        root = self.etree.XML(_bytes('<root><a>&#228;</a><b>&#8364;</b></root>'))
+        for encoding in ['UTF-8', 'iso-8859-1', 'UTF-16', 'UTF-16LE', 'ascii']:
+            self.assertEqual(
+                [tostring(el, encoding=encoding) for el in root],
+                tostring_many(root, encoding=encoding), encoding)
+        result = tostring_many(root, encoding=_unicode)
+        self.assertEqual([_str('<a>\xe4</a>'), _str('<b>\u20ac</b>')], result)
+        data, offsets = tostring_many(root, encoding=_unicode, join=True)
+        self.assertEqual(_str('<a>\xe4</a><b>\u20ac</b>'), data)
+        self.assertEqual([0, 8, 16], offsets)
+        self.assertEqual(
+            [tostring(el, xml_declaration=True) for el in root],
+            tostring_many(root, xml_declaration=True))
+
+    def test_tostring_many_trees(self):
+        tostring = self.etree.tostring
+        tostring_many = self.etree.tostring_many
+        trees = [self.etree.ElementTree(self.etree.XML(
+            _bytes('<!--c--><a n="%d"/>' % i))) for i in range(3)]
+        self.assertEqual([tostring(tree) for tree in trees],
+                         tostring_many(trees))
+        self.assertEqual([tostring(tree, method='html') for tree in trees],
+                         tostring_many(trees, method='html'))
+        self.assertEqual([tostring(tree, method='text') for tree in trees],
+                         tostring_many(trees, method='text'))
+
+    def test_tostring_many_errors(self):
+        tostring_many = self.etree.tostring_many
+        Element = self.etree.Element
+        self.assertRaises(TypeError, tostring_many, [Element('a'), None])
+        self.assertRaises(LookupError, tostring_many, [Element('a')],
+                          encoding='no-such-encoding')
+        self.assertRaises(ValueError, tostring_many, [Element('a')],
+                          method='c14n')
+        self.assertRaises(ValueError, tostring_many, [Element('a')],
+                          method='no-such-method')
+
+    def test_serializer(self):
+        Serializer = self.etree.Serializer
+        tostring = self.etree.tostring
+        root = self.etree.XML(_bytes('<root><a>1</a><b/></root>'))
+        serializer = Serializer(encoding='UTF-8', xml_declaration=True,
+                                pretty_print=True)
+        self.assertEqual(
+            tostring(root, encoding='UTF-8', xml_declaration=True,
+                     pretty_print=True),
+            serializer.tostring(root))
+        for _ in range(2):
+            self.assertEqual(
+                [tostring(el, encoding='UTF-8', xml_declaration=True,
+                          pretty_print=True) for el in root],
+                serializer.tostring_many(root))
+        self.assertRaises(TypeError, serializer.tostring, None)
+
     def test_tostring_with_tail(self):
         tostring = self.etree.tostring
         Element = self.etree.Element
@@ -3433,6 +4058,83 @@ class ETreeC14NTestCase(HelperTestCase):
         self.assertEqual(_bytes('<a>'+'<b></b>'*200+'</a>'),
                           data)
 
+    def test_c14n_digest_sink(self):
+        tree = self.parse(_bytes(
+            '<a xmlns:x="http://abc" xmlns:y="http://bcd"><x:b>%s</x:b><!--c--></a>'
+            % ('<c/>' * 5000)))
+        for kwargs in [dict(), dict(with_comments=False), dict(exclusive=True),
+                       dict(exclusive=True, inclusive_ns_prefixes=['y'])]:
+            expected = etree.tostring(tree, method='c14n', **kwargs)
+            digest = hashlib.sha256()
+            tree.write_c14n(digest, **kwargs)
+            self.assertEqual(hashlib.sha256(expected).hexdigest(),
+                             digest.hexdigest())
+
+        digest = hashlib.sha1()
+        tree.write(digest, method='c14n')
+        self.assertEqual(hashlib.sha1(etree.tostring(tree, method='c14n')).digest(),
+                         digest.digest())
+
+    def test_c14n_digest_sink_errors(self):
+        tree = self.parse(_bytes('<a/>'))
+        self.assertRaises(ValueError, tree.write_c14n, hashlib.md5(),
+                          compression=9)
+        self.assertRaises(TypeError, tree.write_c14n, object())
+
+    def test_c14n_digest(self):
+        root = etree.XML(_bytes(
+            '<a xmlns:x="http://abc" xmlns:y="http://bcd"><!--c-->'
+            '<x:b y:n="1">%s</x:b><x:b>%s</x:b><c/></a>'
+            % ('<c>t</c>' * 20000, 'text' * 30000)))
+        elements = list(root.iterchildren(etree.Element)) + [
+            root, etree.ElementTree(root)]
+        self.assertEqual(
+            [hashlib.sha256(etree.tostring(el, method='c14n', exclusive=True,
+                                           with_comments=False)).digest()
+             for el in elements],
+            etree.c14n_digest(elements))
+        self.assertEqual(
+            [hashlib.sha1(etree.tostring(el, method='c14n')).digest()
+             for el in elements],
+            etree.c14n_digest(elements, 'sha1', exclusive=False,
+                              with_comments=True))
+        self.assertEqual(
+            [hashlib.md5(etree.tostring(
+                el, method='c14n', exclusive=True, with_comments=False,
+                inclusive_ns_prefixes=['y'])).digest() for el in elements],
+            etree.c14n_digest(elements, hashlib.md5,
+                              inclusive_ns_prefixes=['y']))
+        # the tree is left unchanged
+        self.assertEqual(root, root[0].getparent())
+        self.assertEqual([], etree.c14n_digest([]))
+
+    def test_c14n_digest_errors(self):
+        root = etree.XML(_bytes('<a><b/></a>'))
+        self.assertRaises(ValueError, etree.c14n_digest, [root],
+                          'hopefully-unknown')
+        self.assertRaises(TypeError, etree.c14n_digest, [root, 'b'])
+        self.assertRaises(TypeError, etree.c14n_digest, [etree.Comment('c')])
+
+        class FailingDigest(object):
+            def update(self, data):
+                raise ZeroDivisionError
+            def digest(self):
+                return _bytes('')
+        self.assertRaises(ZeroDivisionError, etree.c14n_digest,
+                          [root], FailingDigest)
+
+    def test_c14n_fd(self):
+        tree = self.parse(_bytes('<a xmlns:x="http://abc"><x:b/></a>'))
+        handle, filename = tempfile.mkstemp()
+        try:
+            tree.write_c14n(handle, exclusive=True)
+            data = read_file(filename, 'rb')
+        finally:
+            os.close(handle)
+            os.remove(filename)
+        self.assertEqual(etree.tostring(tree, method='c14n', exclusive=True),
+                         data)
+
     def test_c14n_with_comments(self):
         tree = self.parse(_bytes('<!--hi--><a><!--ho--><b/></a><!--hu-->'))
         f = BytesIO()
@@ -3662,6 +4364,67 @@ class ETreeWriteTestCase(HelperTestCase):
         self.assertEqual(_bytes('<a>'+'<b/>'*200+'</a>'),
                           data)
 
+    def test_write_file_object(self):
+        tree = self.parse(_bytes('<a><b/></a>'))
+        handle, filename = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            f = open(filename, 'w+b')
+            try:
+                f.write(_bytes('<!--start-->'))
+                tree.write(f)
+                self.assertEqual(len('<!--start--><a><b/></a>'), f.tell())
+                f.write(_bytes('<!--end-->'))
+            finally:
+                f.close()
+            data = read_file(filename, 'rb')
+        finally:
+            os.remove(filename)
+        self.assertEqual(_bytes('<!--start--><a><b/></a><!--end-->'), data)
+
+    def test_write_fd(self):
+        tree = self.parse(_bytes('<a>\xc3\xa4<b/></a>'))
+        handle, filename = tempfile.mkstemp()
+        try:
+            tree.write(handle, encoding='ISO-8859-1', xml_declaration=False)
+            tree.write(handle, method='text', encoding='UTF-8')
+            tree.write(handle, method='c14n')
+            data = read_file(filename, 'rb')
+        finally:
+            os.close(handle)
+            os.remove(filename)
+        self.assertEqual(_bytes('<a>\xe4<b/></a>\xc3\xa4<a>\xc3\xa4<b></b></a>'),
+                         data)
+
+    def test_write_fd_errors(self):
+        tree = self.parse(_bytes('<a/>'))
+        self.assertRaises(ValueError, tree.write, -1)
+        handle, filename = tempfile.mkstemp()
+        try:
+            self.assertRaises(ValueError, tree.write, handle, compression=9)
+        finally:
+            os.close(handle)
+            os.remove(filename)
+
+    def test_write_file_object_gzip(self):
+        tree = self.parse(_bytes('<a>'+'<b/>'*200+'</a>'))
+        handle, filename = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            f = open(filename, 'wb')
+            try:
+                tree.write(f, compression=9)
+            finally:
+                f.close()
+            f = gzip.open(filename, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+        finally:
+            os.remove(filename)
+        self.assertEqual(_bytes('<a>'+'<b/>'*200+'</a>'), data)
+
 class ETreeErrorLogTest(HelperTestCase):
     etree = etree
 
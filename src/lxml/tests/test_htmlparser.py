@@ -274,6 +274,22 @@ class HtmlParserTestCase(HelperTestCase):
              ('end', root[1]), ('end', root)],
             events)
 
+    def test_html_iterparse_tag(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<html><body><p>1<div><p>2</p></div></body></html>')
+
+        iterator = iterparse(f, html=True, tag='p')
+        self.assertEqual(['1', '2'],
+                         [ element.text for event, element in iterator ])
+
+    def test_html_feed_parser_find(self):
+        parser = self.etree.HTMLParser()
+        parser.feed('<html><body><p>test</bo')
+        parser.feed('dy></html>')
+        root = parser.close()
+        self.assertEqual('test', root.find('body/p').text)
+        self.assertEqual(1, len(list(root.iterchildren('body'))))
+
     def test_html_iterparse_file(self):
         iterparse = self.etree.iterparse
         iterator = iterparse(fileInTestDir("shakespeare.html"),
@@ -27,6 +27,13 @@ class _XmlFileTestCaseBase(HelperTestCase):
                 pass
         self.assertXml('<test></test>')
 
+    def test_flush(self):
+        with etree.xmlfile(self._file) as xf:
+            with xf.element('test'):
+                xf.flush()
+                self.assertXml('<test>')
+        self.assertXml('<test></test>')
+
     def test_element_write_text(self):
         with etree.xmlfile(self._file) as xf:
             with xf.element('test'):
@@ -198,6 +205,40 @@ class TempXmlFileTestCase(_XmlFileTestCaseBase):
     def setUp(self):
         self._file = tempfile.NamedTemporaryFile()
 
+class FileXmlFileTestCase(_XmlFileTestCaseBase):
+    def setUp(self):
+        handle, self._filename = tempfile.mkstemp()
+        os.close(handle)
+        self._file = open(self._filename, 'w+b')
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self._filename)
+
+    def test_write_after_flush(self):
+        with etree.xmlfile(self._file) as xf:
+            with xf.element('test'):
+                xf.write('toast')
+                xf.flush()
+                self.assertEqual(len('<test>toast'), self._file.tell())
+        self._file.write('<!--end-->'.encode('ASCII'))
+        self.assertXml('<test>toast</test><!--end-->')
+
+class FileDescriptorXmlFileTestCase(_XmlFileTestCaseBase):
+    def setUp(self):
+        self._file, self._filename = tempfile.mkstemp()
+
+    def tearDown(self):
+        os.close(self._file)
+        os.remove(self._filename)
+
+    def _read_file(self):
+        with open(self._filename, 'rb') as f:
+            return f.read()
+
+    def _parse_file(self):
+        return etree.parse(self._filename)
+
 class SimpleFileLikeXmlFileTestCase(_XmlFileTestCaseBase):
     class SimpleFileLike(object):
         def __init__(self, target):
@@ -221,6 +262,8 @@ def test_suite():
     suite = unittest.TestSuite()
     suite.addTests([unittest.makeSuite(BytesIOXmlFileTestCase),
                     unittest.makeSuite(TempXmlFileTestCase),
+                    unittest.makeSuite(FileXmlFileTestCase),
+                    unittest.makeSuite(FileDescriptorXmlFileTestCase),
                     unittest.makeSuite(SimpleFileLikeXmlFileTestCase),
                     ])
     return suite
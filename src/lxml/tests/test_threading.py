@@ -4,7 +4,7 @@
 Tests for thread usage in lxml.etree.
 """
 
-import unittest, threading, sys, os.path
+import unittest, threading, sys, os.path, tempfile
 
 this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
@@ -286,6 +286,205 @@ class ThreadingTestCase(HelperTestCase):
         for thread in threads:
             thread.join()
 
+    def test_concurrent_xpath(self):
+        XML = self.etree.XML
+        root = XML(_bytes('<root xmlns:x="X">%s</root>' % ''.join(
+            [ '<x:a n="%d"/>' % i for i in range(20) ])))
+        def double(context, value):
+            return value * 2
+        find = self.etree.XPath(
+            'count(p:a[@n < $limit]) + double($limit)',
+            namespaces={'p': 'X'}, extensions={(None, 'double'): double})
+        results = []
+        def testrun():
+            results.extend([ find(root, limit=i % 20) for i in range(500) ])
+        threads = [ threading.Thread(target=testrun)
+                    for _ in range(10) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(5000, len(results))
+        self.assertEqual(
+            sorted([ 3.0 * (i % 20) for i in range(500) ] * 10),
+            sorted(results))
+
+    def test_concurrent_write_files(self):
+        XML = self.etree.XML
+        trees = [ self.etree.ElementTree(XML(_bytes(
+            '<root n="%d">%s</root>' % (n, '<a>test</a>' * 1000))))
+                  for n in range(5) ]
+        files = [ tempfile.mkstemp() for _ in trees ]
+        def write(tree, handle):
+            for _ in range(10):
+                os.lseek(handle, 0, 0)
+                tree.write(handle, encoding='UTF-16')
+        threads = [ threading.Thread(target=write, args=(tree, handle))
+                    for tree, (handle, _) in zip(trees, files) ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results = [ self.etree.parse(filename).getroot()
+                        for _, filename in files ]
+        finally:
+            for handle, filename in files:
+                os.close(handle)
+                os.remove(filename)
+        self.assertEqual([ str(n) for n in range(5) ],
+                         [ root.get('n') for root in results ])
+        self.assertEqual([ 1000 ] * 5, [ len(root) for root in results ])
+
+    def test_concurrent_xmlschema(self):
+        schema = self.etree.XMLSchema(self.etree.XML(_bytes('''
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <xsd:element name="a">
+    <xsd:complexType>
+      <xsd:sequence>
+        <xsd:element name="b" type="xsd:integer" maxOccurs="unbounded"/>
+      </xsd:sequence>
+    </xsd:complexType>
+  </xsd:element>
+</xsd:schema>
+''')))
+        valid = self.etree.XML(_bytes('<a>%s</a>' % ('<b>1</b>' * 100)))
+        invalid = self.etree.XML(_bytes('<a>%s<b>x</b></a>' % ('<b>1</b>' * 100)))
+        results = []
+        def testrun():
+            results.extend([ (schema(valid), schema(invalid))
+                             for _ in range(100) ])
+        threads = [ threading.Thread(target=testrun) for _ in range(5) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([(True, False)] * 500, results)
+
+    def test_concurrent_xslt_from_cache(self):
+        style = self.etree.XML(_bytes('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:param name="p" select="0"/>
+  <xsl:template match="/">
+    <foo><xsl:value-of select="count(//b) + $p" /></foo>
+  </xsl:template>
+</xsl:stylesheet>'''))
+        self.etree.clear_xslt_cache()
+        results = []
+        def testrun():
+            transform = self.etree.XSLT.from_cache(style)
+            root = self.etree.XML(_bytes('<a>%s</a>' % ('<b/>' * 10)))
+            results.extend([ transform(root, p=str(i)).getroot().text
+                             for i in range(100) ])
+        threads = [ threading.Thread(target=testrun) for _ in range(5) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            sorted([ str(10 + i) for i in range(100) ] * 5),
+            sorted(results))
+        self.assertEqual(1, self.etree.xslt_cache_info()['size'])
+
+    def test_parse_all(self):
+        tostring = self.etree.tostring
+        sources = [ BytesIO(_bytes('<root><a>%d</a><b xmlns="test"/></root>' % i))
+                    for i in range(50) ]
+        trees = self.etree.parse_all(sources, workers=4)
+        self.assertEqual(50, len(trees))
+        for i, tree in enumerate(trees):
+            self.assertEqual(str(i), tree.getroot()[0].text)
+
+        # documents from different threads can be merged
+        root = trees[0].getroot()
+        for tree in trees[1:]:
+            root.append(tree.getroot()[0])
+        self.assertEqual(
+            _bytes('<root><a>0</a><b xmlns="test"/>%s</root>' % ''.join(
+                [ '<a>%d</a>' % i for i in range(1, 50) ])),
+            tostring(root))
+
+    def test_parse_all_error(self):
+        sources = [ BytesIO(_bytes('<root/>')),
+                    BytesIO(_bytes('<root>')),
+                    BytesIO(_bytes('<root/>')) ]
+        self.assertRaises(self.etree.XMLSyntaxError,
+                          self.etree.parse_all, sources, workers=2)
+
+    def test_parse_all_parser(self):
+        parser = self.etree.XMLParser(remove_comments=True)
+        sources = [ BytesIO(_bytes('<root><!--c--><a/></root>'))
+                    for _ in range(10) ]
+        for tree in self.etree.parse_all(sources, parser, workers=3):
+            self.assertEqual(1, len(tree.getroot()))
+        self.assertRaises(ValueError, self.etree.parse_all,
+                          sources, parser, workers=0)
+
+    def test_parse_all_parser_copy_error(self):
+        class NoCopyParser(self.etree.XMLParser):
+            def __init__(self, required):
+                super(NoCopyParser, self).__init__()
+        sources = [ BytesIO(_bytes('<root/>')) for _ in range(10) ]
+        self.assertRaises(TypeError, self.etree.parse_all,
+                          sources, NoCopyParser(1), workers=3)
+
+    def _build_records_doc(self, count):
+        return _bytes(
+            '<?xml version="1.0"?>\n'
+            '<!DOCTYPE root [ <!ENTITY e "e>"> ]>\n'
+            '<root xmlns:db="urn:db" attr="a>b"><db:header/>%s<db:recordset/></root>' %
+            ''.join([ '<db:record id="%d"><a>&e;</a></db:record>\n' % i
+                      for i in range(count) ]))
+
+    def test_iterparse_records(self):
+        data = self._build_records_doc(500)
+        records = list(self.etree.iterparse_records(
+            BytesIO(data), 'db:record', workers=4, shard_size=1000))
+        self.assertEqual([ str(i) for i in range(500) ],
+                         [ el.get('id') for el in records ])
+        self.assertEqual('{urn:db}record', records[0].tag)
+        self.assertEqual('root', records[-1].getparent().tag)
+        self.assertEqual('e>', records[-1][0].text)
+
+    def test_iterparse_records_unordered(self):
+        data = self._build_records_doc(500)
+        ids = [ int(el.get('id')) for el in self.etree.iterparse_records(
+            BytesIO(data), 'db:record', workers=4, ordered=False,
+            shard_size=1000) ]
+        ids.sort()
+        self.assertEqual(list(range(500)), ids)
+
+    def test_iterparse_records_error(self):
+        data = self._build_records_doc(500).replace(
+            _bytes('id="250"'), _bytes('id=250'))
+        self.assertRaises(
+            self.etree.XMLSyntaxError, list,
+            self.etree.iterparse_records(
+                BytesIO(data), 'db:record', workers=2, shard_size=1000))
+        self.assertRaises(ValueError, self.etree.iterparse_records,
+                          BytesIO(data), '{urn:db}record')
+
+    def test_iterparse_records_parser_copy_error(self):
+        class NoCopyParser(self.etree.XMLParser):
+            def __init__(self, required):
+                super(NoCopyParser, self).__init__()
+        data = self._build_records_doc(100)
+        self.assertRaises(
+            TypeError, list,
+            self.etree.iterparse_records(
+                BytesIO(data), 'db:record', NoCopyParser(1), workers=2,
+                shard_size=500))
+
+    def test_iterparse_records_close(self):
+        data = self._build_records_doc(500)
+        records = self.etree.iterparse_records(
+            BytesIO(data), 'db:record', workers=2, shard_size=1000)
+        self.assertEqual('0', next(records).get('id'))
+        records.close()
+        self.assertEqual([], list(records))
+        records.close()
+
 
 class ThreadPipelineTestCase(HelperTestCase):
     """Threading tests based on a thread worker pipeline.
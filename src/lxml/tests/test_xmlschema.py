@@ -5,12 +5,13 @@ Test cases related to XML Schema parsing and validation
 """
 
 import unittest, sys, os.path
+import tempfile
 
 this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
     sys.path.insert(0, this_dir) # needed for Py3
 
-from common_imports import etree, BytesIO, HelperTestCase, fileInTestDir
+from common_imports import etree, BytesIO, HelperTestCase, fileInTestDir, _bytes
 from common_imports import doctest, make_doctest
 
 class ETreeXMLSchemaTestCase(HelperTestCase):
@@ -272,6 +273,133 @@ class ETreeXMLSchemaTestCase(HelperTestCase):
         self.assertTrue(tree_valid.xmlschema(schema))
         self.assertTrue(not tree_invalid.xmlschema(schema))
 
+    def _simple_schema(self, **kwargs):
+        return etree.XMLSchema(self.parse('''
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <xsd:element name="a" type="AType"/>
+  <xsd:complexType name="AType">
+    <xsd:sequence>
+      <xsd:element name="b" type="BType" maxOccurs="unbounded"/>
+    </xsd:sequence>
+  </xsd:complexType>
+  <xsd:complexType name="BType">
+    <xsd:attribute name="n" type="xsd:integer" default="0" />
+  </xsd:complexType>
+</xsd:schema>
+'''), **kwargs)
+
+    def test_xmlschema_reuse(self):
+        schema = self._simple_schema()
+        for _ in range(3):
+            self.assertTrue(schema(self.parse('<a><b n="1"/></a>')))
+            self.assertTrue(not schema(self.parse('<a><b n="x"/></a>')))
+            self.assertTrue(not schema(self.parse('<a><c/></a>')))
+            self.assertTrue(schema(self.parse('<a><b/><b/></a>')))
+
+    def test_xmlschema_validate_many(self):
+        schema = self._simple_schema()
+        docs = [ self.parse(xml) for xml in (
+            '<a><b n="1"/></a>', '<a><c/></a>', '<a><b n="x"/><b/></a>',
+            '<a><b/></a>') * 10 ]
+        for workers in (None, 1, 4):
+            results = schema.validate_many(docs, workers=workers)
+            self.assertEqual([True, False, False, True] * 10,
+                             [ valid for valid, log in results ])
+            self.assertEqual([0, 1, 1, 0] * 10,
+                             [ len(log) for valid, log in results ])
+            self.assertTrue('n' in results[2][1][0].message)
+        self.assertEqual(0, len(schema.error_log))
+        self.assertEqual([], schema.validate_many([]))
+
+    def test_xmlschema_validate_many_elements(self):
+        schema = self._simple_schema(attribute_defaults=True)
+        root = etree.XML('<x><a><b/></a><a><b n="2"/></a><a><c/></a></x>')
+        results = schema.validate_many(list(root) + [etree.XML('<a><b/></a>')],
+                                       workers=2)
+        self.assertEqual([True, True, False, True],
+                         [ valid for valid, log in results ])
+        self.assertEqual('0', root[0][0].get('n'))
+        self.assertEqual('2', root[1][0].get('n'))
+
+    def test_xmlschema_validate_many_errors(self):
+        schema = self._simple_schema()
+        self.assertRaises(ValueError, schema.validate_many,
+                          [self.parse('<a><b/></a>')], workers=0)
+        self.assertRaises(TypeError, schema.validate_many, ['<a/>'])
+
+    def test_xmlschema_validate_stream(self):
+        schema = self._simple_schema()
+        valid, log = schema.validate_stream(
+            BytesIO(_bytes('<a>%s</a>' % ('<b n="1"/>' * 1000))))
+        self.assertTrue(valid)
+        self.assertEqual(0, len(log))
+
+        valid, log = schema.validate_stream(
+            BytesIO(_bytes('<a><b n="1"/><b n="x"/><c/></a>')))
+        self.assertFalse(valid)
+        self.assertTrue(len(log) >= 2)
+        self.assertTrue('n' in log[0].message)
+        self.assertEqual(0, len(schema.error_log))
+
+    def test_xmlschema_validate_stream_errors_once(self):
+        schema = self._simple_schema()
+        valid, log = schema.validate_stream(BytesIO(_bytes('<a><c/></a>')))
+        self.assertFalse(valid)
+        self.assertEqual(1, len(log))
+        self.assertEqual(etree.ErrorDomains.SCHEMASV, log[0].domain)
+
+        valid, log = schema.validate_stream(BytesIO(_bytes('<a><c/><b')))
+        self.assertFalse(valid)
+        messages = [(entry.domain, entry.message) for entry in log]
+        self.assertEqual(len(set(messages)), len(messages))
+
+    def test_xmlschema_validate_stream_no_network(self):
+        schema = self._simple_schema()
+        for url in ['http://localhost:1/doc.xml', 'ftp://localhost:1/doc.xml']:
+            self.assertRaises(IOError, schema.validate_stream, url)
+
+    def test_xmlschema_validate_stream_not_well_formed(self):
+        schema = self._simple_schema()
+        valid, log = schema.validate_stream(BytesIO(_bytes('<a><b></a>')))
+        self.assertFalse(valid)
+        self.assertTrue(len(log) > 0)
+        self.assertEqual(etree.ErrorDomains.PARSER, log[0].domain)
+
+    def test_xmlschema_validate_stream_file(self):
+        schema = self._simple_schema()
+        handle, filename = tempfile.mkstemp()
+        try:
+            os.write(handle, _bytes('<a><b/><b n="2"/></a>'))
+            self.assertEqual(True, schema.validate_stream(filename)[0])
+            f = open(filename, 'rb')
+            try:
+                self.assertEqual(True, schema.validate_stream(f)[0])
+            finally:
+                f.close()
+            fd = os.open(filename, os.O_RDONLY)
+            try:
+                self.assertEqual(True, schema.validate_stream(fd)[0])
+                # the descriptor was not closed
+                os.fstat(fd)
+            finally:
+                os.close(fd)
+        finally:
+            os.close(handle)
+            os.remove(filename)
+
+    def test_xmlschema_validate_stream_errors(self):
+        schema = self._simple_schema()
+        self.assertRaises(IOError, schema.validate_stream,
+                          fileInTestDir('does-not-exist.xml'))
+        self.assertRaises(ValueError, schema.validate_stream, -1)
+        self.assertRaises(TypeError, schema.validate_stream, None)
+
+        class BrokenFile(object):
+            def read(self, size):
+                raise ZeroDivisionError
+        self.assertRaises(ZeroDivisionError, schema.validate_stream,
+                          BrokenFile())
+
 
 class ETreeXMLSchemaResolversTestCase(HelperTestCase):
     resolver_schema_int = BytesIO("""\
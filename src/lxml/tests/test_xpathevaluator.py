@@ -520,6 +520,105 @@ class ETreeXPathTestCase(HelperTestCase):
         self.assertRaises(LocalException, e, "foo(., $value)", value=0)
 
 
+    def test_xpath_recursive_extension(self):
+        root = etree.XML(_bytes('<a><b><c/></b></a>'))
+        def depth(context, nodes):
+            children = nodes[0].getchildren()
+            if not children:
+                return 0
+            return 1 + find(children[0])
+        find = etree.XPath('depth(.)', extensions={(None, 'depth'): depth})
+        self.assertEqual(2, find(root))
+
+    def test_xpath_recursive_prefixed_extension(self):
+        root = etree.XML(_bytes('<a><b><c><d/></c></b></a>'))
+        def depth(context, nodes):
+            children = nodes[0].getchildren()
+            if not children:
+                return 0
+            return 1 + find(children[0])
+        find = etree.XPath('f:depth(.)', namespaces={'f': 'F'},
+                           extensions={('F', 'depth'): depth})
+        for i in range(3):
+            self.assertEqual(3, find(root))
+
+    def test_xpath_recursive_extension_error_log(self):
+        root = etree.XML(_bytes('<a><b/></a>'))
+        def inner(context, nodes):
+            if nodes[0].tag == 'b':
+                return 0
+            # recursive call without the variable => evaluation error
+            try:
+                find(nodes[0][0])
+            except etree.XPathEvalError:
+                return -1
+            return 1
+        find = etree.XPath('inner(.) + $x', extensions={(None, 'inner'): inner})
+        self.assertEqual(-1, find(root, x=0))
+        self.assertTrue([ entry for entry in find.error_log
+                          if 'Undefined variable' in entry.message ])
+
+    def test_xpath_cache(self):
+        root = etree.XML(_bytes('<a><b>1</b><b>2</b></a>'))
+        etree.clear_xpath_cache()
+        self.assertEqual(['1', '2'], root.xpath('b/text()'))
+        self.assertEqual(['1', '2'], root.getroottree().xpath('b/text()'))
+        self.assertEqual(2.0, root.xpath('count(b)'))
+        info = etree.xpath_cache_info()
+        self.assertEqual(2, info['misses'])
+        self.assertEqual(1, info['hits'])
+        self.assertEqual(2, info['size'])
+
+        etree.clear_xpath_cache()
+        info = etree.xpath_cache_info()
+        self.assertEqual(0, info['size'])
+        self.assertEqual(0, info['hits'])
+
+    def test_xpath_cache_namespaces(self):
+        root = etree.XML(_bytes('<a xmlns:x="X" xmlns:y="Y"><x:b/><y:b/></a>'))
+        etree.clear_xpath_cache()
+        self.assertEqual('{X}b', root.xpath('p:b', namespaces={'p': 'X'})[0].tag)
+        self.assertEqual('{Y}b', root.xpath('p:b', namespaces={'p': 'Y'})[0].tag)
+        self.assertEqual(2, etree.xpath_cache_info()['misses'])
+
+    def test_xpath_cache_prefixed_function(self):
+        root = etree.XML(_bytes('<a><b>x1</b><b>y2</b></a>'))
+        etree.clear_xpath_cache()
+        namespaces = {'re': 'http://exslt.org/regular-expressions'}
+        for i in range(3):
+            self.assertEqual(
+                ['x1'], root.xpath('b[re:test(., "^x")]/text()',
+                                   namespaces=namespaces))
+        self.assertEqual(0, etree.xpath_cache_info()['size'])
+
+    def test_xpath_cache_size(self):
+        root = etree.XML(_bytes('<a><b/></a>'))
+        maxsize = etree.xpath_cache_info()['maxsize']
+        etree.clear_xpath_cache()
+        try:
+            etree.set_xpath_cache_size(2)
+            for path in ('b', 'b[1]', 'b[2]', 'b'):
+                root.xpath(path)
+            info = etree.xpath_cache_info()
+            self.assertEqual(2, info['size'])
+            self.assertEqual(2, info['evictions'])
+            self.assertEqual(0, info['hits'])
+
+            etree.set_xpath_cache_size(0)
+            self.assertEqual(0, etree.xpath_cache_info()['size'])
+            self.assertEqual(1, len(root.xpath('b')))
+            self.assertEqual(0, etree.xpath_cache_info()['size'])
+            self.assertRaises(ValueError, etree.set_xpath_cache_size, -1)
+        finally:
+            etree.set_xpath_cache_size(maxsize)
+            etree.clear_xpath_cache()
+
+    def test_xpath_cache_error(self):
+        root = etree.XML(_bytes('<a/>'))
+        for i in range(2):
+            self.assertRaises(etree.XPathEvalError, root.xpath, 'b[')
+
+
 class ETreeXPathClassTestCase(HelperTestCase):
     "Tests for the XPath class"
     def test_xpath_compile_doc(self):
@@ -566,6 +665,218 @@ class ETreeXPathClassTestCase(HelperTestCase):
     def test_xpath_elementtree_error(self):
         self.assertRaises(ValueError, etree.XPath('*'), etree.ElementTree())
 
+    def test_xpath_evaluate_many(self):
+        root = etree.XML(_bytes('<a><b n="1"><c/></b><b n="2"><c/><c/></b></a>'))
+        expr = etree.XPath("c")
+        r = expr.evaluate_many(root)
+        self.assertEqual([1, 2], [len(result) for result in r])
+        self.assertEqual(['c', 'c', 'c'], [el.tag for el in r[0] + r[1]])
+
+    def test_xpath_evaluate_many_flatten(self):
+        root = etree.XML(_bytes('<a><b><c/></b><b><c/><c/></b><d/></a>'))
+        r = etree.XPath("c").evaluate_many(root, flatten=True)
+        self.assertEqual(3, len(r))
+        self.assertEqual([root[0], root[1], root[1]],
+                         [el.getparent() for el in r])
+
+    def test_xpath_evaluate_many_scalar(self):
+        root = etree.XML(_bytes('<a><b n="1"/><b n="2"/></a>'))
+        self.assertEqual([2.0, 4.0],
+                         etree.XPath("@n * 2").evaluate_many(root))
+        self.assertEqual([True, False],
+                         etree.XPath("@n = $n").evaluate_many(root, n=1))
+
+    def test_xpath_evaluate_many_smart_strings(self):
+        root = etree.XML(_bytes('<a><b>1</b><b>2</b></a>'))
+        expr = etree.XPath("string(.)")
+        r = expr.evaluate_many(root)
+        self.assertEqual(['1', '2'], r)
+        self.assertTrue(hasattr(r[0], 'getparent'))
+
+        r = expr.evaluate_many(root, smart_strings=False)
+        self.assertEqual(['1', '2'], r)
+        self.assertFalse(hasattr(r[0], 'getparent'))
+        self.assertTrue(hasattr(expr(root[0]), 'getparent'))
+
+    def test_xpath_evaluate_many_documents(self):
+        trees = [etree.ElementTree(etree.XML(_bytes('<a><b/>%s</a>' % ('<c/>' * i))))
+                 for i in range(3)]
+        expr = etree.XPath("/a/*")
+        r = expr.evaluate_many(trees)
+        self.assertEqual([1, 2, 3], [len(result) for result in r])
+        for tree, result in zip(trees, r):
+            self.assertEqual(tree.getroot(), result[0].getparent())
+
+    def test_xpath_iter(self):
+        root = etree.XML(_bytes('<a><b>1</b><c/><b>2</b></a>'))
+        expr = etree.XPath("b | b/text() | c/@x")
+        it = expr.iter(root)
+        self.assertEqual(root[0], next(it))
+        self.assertEqual('1', next(it))
+        self.assertEqual([root[2], '2'], list(it))
+        self.assertEqual([], list(it))
+        self.assertEqual(expr(root), list(expr.iter(root)))
+
+    def test_xpath_iter_smart_strings(self):
+        root = etree.XML(_bytes('<a><b x="1"/></a>'))
+        result = list(etree.XPath("b/@x").iter(root))
+        self.assertEqual(['1'], result)
+        self.assertEqual(root[0], result[0].getparent())
+        result = list(etree.XPath("b/@x", smart_strings=False).iter(root))
+        self.assertFalse(hasattr(result[0], 'getparent'))
+
+    def test_xpath_iter_keeps_document(self):
+        it = etree.XPath("//b").iter(etree.XML(_bytes('<a><b/><b/></a>')))
+        self.assertEqual(['b', 'b'], [el.tag for el in it])
+
+    def test_xpath_iter_partial(self):
+        root = etree.XML(_bytes('<a>%s</a>' % ('<b/>' * 100)))
+        it = etree.XPath("b").iter(root)
+        self.assertEqual(root[0], next(it))
+        del it
+
+    def test_xpath_iter_extension(self):
+        def make(context):
+            return etree.XML(_bytes('<x><y/></x>'))
+        expr = etree.XPath("make()/y", extensions={(None, 'make'): make})
+        self.assertEqual(['y'], [el.tag for el in expr.iter(etree.XML('<a/>'))])
+
+    def test_xpath_iter_not_node_set(self):
+        root = etree.XML(_bytes('<a><b/></a>'))
+        self.assertRaises(etree.XPathResultError,
+                          etree.XPath("count(b)").iter, root)
+        self.assertRaises(etree.XPathResultError,
+                          etree.XPath("count(b)").count, root)
+        self.assertRaises(etree.XPathEvalError,
+                          etree.XPath("$undefined").iter, root)
+
+    def test_xpath_count_exists(self):
+        root = etree.XML(_bytes('<a xmlns:x="X"><b y="1">t</b><b/>tail<!--c--></a>'))
+        for path in ["b", "*", "node()", "//text()", "//@*", "/", "namespace::*",
+                     "/a/b[1]/@y", "nothing"]:
+            expr = etree.XPath(path)
+            self.assertEqual(len(expr(root)), expr.count(root), path)
+            self.assertEqual(bool(expr(root)), expr.exists(root), path)
+
+    def test_xpath_strings(self):
+        root = etree.XML(_bytes('<a><b x="1">t<c>u</c></b><b x="2"/>tail</a>'))
+        r = etree.XPath("b").strings(root)
+        self.assertEqual(['tu', ''], r)
+        self.assertEqual(['1', '2'], etree.XPath("b/@x").strings(root))
+        r = etree.XPath("//text()").strings(root)
+        self.assertEqual(['t', 'u', 'tail'], r)
+        self.assertFalse(hasattr(r[0], 'getparent'))
+        self.assertEqual([], etree.XPath("nothing").strings(root))
+
+    def test_xpath_strings_scalar(self):
+        root = etree.XML(_bytes('<a><b/><b/></a>'))
+        self.assertEqual(['2'], etree.XPath("count(b)").strings(root))
+        self.assertEqual(['true'], etree.XPath("b = ''").strings(root))
+        self.assertEqual(['ab'], etree.XPath("concat('a', $v)").strings(root, v='b'))
+
+    def test_xpath_numbers(self):
+        import array
+        root = etree.XML(_bytes(
+            '<a><p>1.5</p><p> 2 </p><p>x</p><p n="-4"/></a>'))
+        r = etree.XPath("p/text()").numbers(root)
+        self.assertTrue(isinstance(r, array.array))
+        self.assertEqual('d', r.typecode)
+        self.assertEqual(3, len(r))
+        self.assertEqual([1.5, 2.0], list(r[:2]))
+        self.assertTrue(r[2] != r[2]) # NaN
+        self.assertEqual([-4.0], list(etree.XPath("p/@n").numbers(root)))
+        self.assertEqual([4.0], list(etree.XPath("count(p)").numbers(root)))
+        self.assertEqual(0, len(etree.XPath("nothing").numbers(root)))
+
+    def test_xpath_numbers_buffer(self):
+        root = etree.XML(_bytes('<a>%s</a>' % ''.join(
+            ['<p>%d</p>' % i for i in range(100)])))
+        r = etree.XPath("p").numbers(root)
+        view = memoryview(r)
+        self.assertEqual(100, len(view))
+        self.assertEqual(99.0, view[99])
+
+    def test_xpath_typed_extension(self):
+        def make(context):
+            return etree.XML(_bytes('<x><y>1</y><y>2</y></x>'))
+        expr = etree.XPath("make()/y", extensions={(None, 'make'): make})
+        root = etree.XML('<a/>')
+        self.assertEqual(['1', '2'], expr.strings(root))
+        self.assertEqual([1.0, 2.0], list(expr.numbers(root)))
+
+    def test_element_xpath_iter(self):
+        root = etree.XML(_bytes('<a xmlns:x="X"><x:b/><b/></a>'))
+        self.assertEqual([root[0]], list(root.xpath_iter(
+            "p:b", namespaces={'p': 'X'})))
+        self.assertEqual([root[1]], list(root.xpath_iter("b[$n]", n=1)))
+        tree = etree.ElementTree(root)
+        self.assertEqual([root[1]], list(tree.xpath_iter("/a/b")))
+
+    def test_xpath_iter_removed_nodes(self):
+        root = etree.XML(_bytes('<a><b>1</b><b>2<c/></b><b>3</b></a>'))
+        it = root.xpath_iter("//b/text()")
+        self.assertEqual('1', next(it))
+        root.clear()
+        self.assertRaises(RuntimeError, list, it)
+
+        root = etree.XML(_bytes('<a><b/><b><c/></b><b x="1"/></a>'))
+        it = etree.XPath("//b | //c").iter(root)
+        self.assertEqual('b', next(it).tag)
+        del root[1]
+        self.assertRaises(RuntimeError, next, it)
+
+    def test_xpath_iter_modify_elements(self):
+        root = etree.XML(_bytes('<a><b>1</b><b x="2"><c/></b><b>3</b></a>'))
+        result = []
+        for el in etree.XPath("//b | //c").iter(root):
+            el.text = el.tag
+            el.attrib.clear()
+            result.append(el.tag)
+            if el.tag == 'c':
+                root.append(el)
+        self.assertEqual(['b', 'b', 'c', 'b'], result)
+        self.assertEqual(['b', 'b', 'b', 'c'], [el.tag for el in root])
+
+    def test_xpath_iter_first_result_lazy(self):
+        created = []
+        class CountingElement(etree.ElementBase):
+            def _init(self):
+                created.append(self.tag)
+        lookup = etree.ElementDefaultClassLookup(element=CountingElement)
+        parser = etree.XMLParser()
+        parser.set_element_class_lookup(lookup)
+        root = etree.XML(_bytes('<a>%s</a>' % ('<b/>' * 100)), parser)
+        del created[:]
+        it = etree.XPath("b").iter(root)
+        self.assertEqual('b', next(it).tag)
+        self.assertEqual(['b'], created)
+
+    def test_tree_xpath_iter_subelement_root(self):
+        root = etree.XML(_bytes('<a><b><c/><c/></b><c/></a>'))
+        tree = etree.ElementTree(root[0])
+        for path in ["/*", "//c", "/b/c", "*", "/a"]:
+            self.assertEqual(tree.xpath(path), list(tree.xpath_iter(path)),
+                             path)
+        self.assertRaises(etree.XPathResultError, tree.xpath_iter, "count(*)")
+
+    def test_element_xpath_iter_cached(self):
+        root = etree.XML(_bytes('<a><b/></a>'))
+        etree.clear_xpath_cache()
+        self.assertEqual([root[0]], list(root.xpath_iter("b")))
+        self.assertEqual([root[0]], list(root.xpath_iter("b")))
+        self.assertEqual(1, etree.xpath_cache_info()['hits'])
+        self.assertRaises(etree.XPathResultError, root.xpath_iter, "count(b)")
+
+    def test_xpath_evaluate_many_empty(self):
+        self.assertEqual([], etree.XPath("*").evaluate_many([]))
+
+    def test_xpath_evaluate_many_error(self):
+        root = etree.XML(_bytes('<a><b/></a>'))
+        expr = etree.XPath("$undefined")
+        self.assertRaises(etree.XPathEvalError, expr.evaluate_many, root)
+        self.assertRaises(TypeError, etree.XPath("*").evaluate_many, [root, 1])
+        self.assertEqual([[]], etree.XPath("*").evaluate_many(root))
+
 
 class ETreeXPathExsltTestCase(HelperTestCase):
     "Tests for the EXSLT support in XPath (requires libxslt 1.1.25+)"
@@ -5,6 +5,7 @@ Test cases related to XSLT processing
 """
 
 import unittest, copy, sys, os.path
+import tempfile
 
 this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
@@ -964,6 +965,123 @@ class ETreeXSLTTestCase(HelperTestCase):
 
         pi.set("href", "TEST")
         self.assertEqual("TEST", pi.get("href"))
+    def test_xslt_from_cache(self):
+        tree = self.parse('<a><b>B</b><c>C</c></a>')
+        style = """\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:template match="/">
+    <foo><xsl:value-of select="/a/b/text()" /></foo>
+  </xsl:template>
+</xsl:stylesheet>"""
+        etree.clear_xslt_cache()
+        transform1 = etree.XSLT.from_cache(self.parse(style))
+        transform2 = etree.XSLT.from_cache(self.parse(style).getroot())
+        self.assertFalse(transform1 is transform2)
+        info = etree.xslt_cache_info()
+        self.assertEqual(1, info['misses'])
+        self.assertEqual(1, info['hits'])
+        self.assertEqual(1, info['size'])
+
+        etree.clear_xslt_cache()
+        self.assertEqual(0, etree.xslt_cache_info()['size'])
+        for transform in (transform1, transform2, copy.copy(transform1)):
+            self.assertEqual('B', transform(tree).getroot().text)
+        del transform1
+        self.assertEqual('B', transform2(tree).getroot().text)
+
+    def test_xslt_from_cache_options(self):
+        tree = self.parse('<a><b>B</b></a>')
+        style = self.parse("""\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:myns="testns">
+  <xsl:template match="/">
+    <foo><xsl:message>M</xsl:message><xsl:value-of select="myns:f(/a/b)"/></foo>
+  </xsl:template>
+</xsl:stylesheet>""")
+        etree.clear_xslt_cache()
+        lower = etree.XSLT.from_cache(style, extensions={
+            ('testns', 'f'): lambda context, nodes: nodes[0].text.lower()})
+        upper = etree.XSLT.from_cache(style, extensions={
+            ('testns', 'f'): lambda context, nodes: nodes[0].text.upper()})
+        self.assertEqual('b', lower(tree).getroot().text)
+        self.assertEqual(1, len(lower.error_log))
+        self.assertEqual(0, len(upper.error_log))
+        self.assertEqual('B', upper(tree).getroot().text)
+        self.assertEqual(1, etree.xslt_cache_info()['hits'])
+
+    def test_xslt_from_cache_file(self):
+        etree.clear_xslt_cache()
+        tree = self.parse('<a/>')
+        for i in range(2):
+            transform = etree.XSLT.from_cache(fileInTestDir('test1.xslt'))
+            self.assertTrue('Foo' in str(transform(tree)))
+        self.assertEqual(1, etree.xslt_cache_info()['hits'])
+
+        handle, filename = tempfile.mkstemp()
+        try:
+            os.write(handle, _bytes("""\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:template match="/"><foo/></xsl:template>
+</xsl:stylesheet>"""))
+            os.close(handle)
+            handle = None
+            transform = etree.XSLT.from_cache(filename)
+            self.assertEqual('foo', transform(tree).getroot().tag)
+
+            f = open(filename, 'wb')
+            try:
+                f.write(_bytes("""\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:template match="/"><changed/></xsl:template>
+</xsl:stylesheet>"""))
+            finally:
+                f.close()
+            transform = etree.XSLT.from_cache(filename)
+            self.assertEqual('changed', transform(tree).getroot().tag)
+            self.assertEqual(3, etree.xslt_cache_info()['misses'])
+        finally:
+            if handle is not None:
+                os.close(handle)
+            os.remove(filename)
+
+    def test_xslt_from_cache_size(self):
+        maxsize = etree.xslt_cache_info()['maxsize']
+        etree.clear_xslt_cache()
+        try:
+            etree.set_xslt_cache_size(2)
+            for name in ('a', 'b', 'c', 'a'):
+                etree.XSLT.from_cache(self.parse("""\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:template match="/"><%s/></xsl:template>
+</xsl:stylesheet>""" % name))
+            info = etree.xslt_cache_info()
+            self.assertEqual(2, info['size'])
+            self.assertEqual(2, info['evictions'])
+            self.assertEqual(0, info['hits'])
+            self.assertRaises(ValueError, etree.set_xslt_cache_size, -1)
+        finally:
+            etree.set_xslt_cache_size(maxsize)
+            etree.clear_xslt_cache()
+
+    def test_xslt_from_cache_error(self):
+        style = self.parse("""\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:stylesheet />
+</xsl:stylesheet>""")
+        etree.clear_xslt_cache()
+        for i in range(2):
+            self.assertRaises(etree.XSLTParseError,
+                              etree.XSLT.from_cache, style)
+        self.assertEqual(0, etree.xslt_cache_info()['size'])
+        self.assertRaises(IOError, etree.XSLT.from_cache,
+                          fileInTestDir('does-not-exist.xslt'))
+
 
 class ETreeEXSLTTestCase(HelperTestCase):
     """EXSLT tests"""
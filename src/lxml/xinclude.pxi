@@ -35,6 +35,8 @@ cdef class XInclude:
         cdef int result
         _assertValidNode(node)
         assert self._error_log is not None, "XPath evaluator not initialised"
+        # XInclude processing can free nodes of the tree
+        _noteRemovedNodes(node._doc._c_doc, 1)
         self._error_log.connect()
         __GLOBAL_PARSER_CONTEXT.pushImpliedContextFromParser(
             node._doc._parser)
@@ -23,6 +23,19 @@ cdef XPath _check_for_default_attributes = XPath(
     u"boolean(//xs:attribute[@default or @fixed][1])",
     namespaces={u'xs': u'http://www.w3.org/2001/XMLSchema'})
 
+# maximum number of unused validation contexts that an XMLSchema keeps
+DEF _MAX_SPARE_VALID_CONTEXTS = 16
+
+@cython.final
+@cython.internal
+cdef class _XMLSchemaValidContext:
+    u"""A libxml2 validation context that is reused by an XMLSchema.
+    """
+    cdef xmlschema.xmlSchemaValidCtxt* _c_ctxt
+    def __dealloc__(self):
+        if self._c_ctxt is not NULL:
+            xmlschema.xmlSchemaFreeValidCtxt(self._c_ctxt)
+
 cdef class XMLSchema(_Validator):
     u"""XMLSchema(self, etree=None, file=None)
     Turn a document into an XML Schema validator.
@@ -32,14 +45,20 @@ cdef class XMLSchema(_Validator):
 
     Passing the ``attribute_defaults`` boolean option will make the
     schema insert default/fixed attributes into validated documents.
+
+    Validation contexts are kept in a pool and reused, so that threads
+    that validate against the same schema do not need to set up a new
+    context for each document.
     """
     cdef xmlschema.xmlSchema* _c_schema
     cdef bint _has_default_attributes
     cdef bint _add_attribute_defaults
+    cdef list _spare_valid_contexts
     def __cinit__(self):
         self._c_schema = NULL
         self._has_default_attributes = True # play safe
         self._add_attribute_defaults = False
+        self._spare_valid_contexts = []
 
     def __init__(self, etree=None, *, file=None, attribute_defaults=False):
         cdef _Document doc
@@ -110,6 +129,9 @@ cdef class XMLSchema(_Validator):
                                        self._has_default_attributes
 
     def __dealloc__(self):
+        # free the validation contexts before the schema they refer to
+        if self._spare_valid_contexts is not None:
+            del self._spare_valid_contexts[:]
         xmlschema.xmlSchemaFree(self._c_schema)
 
     def __call__(self, etree):
@@ -119,34 +141,15 @@ cdef class XMLSchema(_Validator):
 
         Returns true if document is valid, false if not.
         """
-        cdef xmlschema.xmlSchemaValidCtxt* valid_ctxt
         cdef _Document doc
         cdef _Element root_node
-        cdef xmlDoc* c_doc
         cdef int ret
 
         assert self._c_schema is not NULL, "Schema instance not initialised"
         doc = _documentOrRaise(etree)
         root_node = _rootNodeOrRaise(etree)
 
-        valid_ctxt = xmlschema.xmlSchemaNewValidCtxt(self._c_schema)
-        if valid_ctxt is NULL:
-            raise MemoryError()
-
-        if self._add_attribute_defaults:
-            xmlschema.xmlSchemaSetValidOptions(
-                valid_ctxt, xmlschema.XML_SCHEMA_VAL_VC_I_CREATE)
-
-        xmlschema.xmlSchemaSetValidStructuredErrors(
-            valid_ctxt, _receiveError, <void*>self._error_log)
-
-        c_doc = _fakeRootDoc(doc._c_doc, root_node._c_node)
-        with nogil:
-            ret = xmlschema.xmlSchemaValidateDoc(valid_ctxt, c_doc)
-        _destroyFakeDoc(doc._c_doc, c_doc)
-
-        xmlschema.xmlSchemaFreeValidCtxt(valid_ctxt)
-
+        ret = self._validate(doc, root_node, self._error_log)
         if ret == -1:
             raise XMLSchemaValidateError(
                 u"Internal error in XML Schema validation.",
@@ -156,6 +159,156 @@ cdef class XMLSchema(_Validator):
         else:
             return False
 
+    def validate_many(self, docs, *, workers=None):
+        u"""validate_many(self, docs, workers=None)
+
+        Validate a sequence of documents or elements and return a list of
+        ``(valid, error_log)`` tuples in the same order.
+
+        The ``workers`` argument sets the number of threads that are used.
+        It defaults to the number of CPUs.  The validation itself runs
+        without the GIL.  Each document is validated with its own error
+        log, the ``error_log`` of the schema is not changed.
+
+        Several entries that belong to the same document are validated
+        sequentially in the calling thread, as validation may modify the
+        document (e.g. when adding attribute defaults).
+        """
+        cdef _XMLSchemaBatchValidation batch
+        cdef Py_ssize_t c_workers
+        assert self._c_schema is not NULL, "Schema instance not initialised"
+        batch = _XMLSchemaBatchValidation(self, list(docs))
+        if workers is None:
+            c_workers = _defaultParseWorkers()
+        else:
+            c_workers = workers
+            if c_workers < 1:
+                raise ValueError, u"number of workers must be at least 1"
+        if len(batch._docs) < c_workers:
+            c_workers = len(batch._docs)
+        if c_workers <= 1 or not config.ENABLE_THREADING or \
+                len(set(batch._docs)) < len(batch._docs):
+            c_workers = 1
+        return batch.run(c_workers)
+
+    def validate_stream(self, source, *, bint no_network=True):
+        u"""validate_stream(self, source, no_network=True)
+
+        Validate a document while reading it from a file, without
+        building a tree.  Returns a ``(valid, error_log)`` tuple.
+
+        The source can be a filename or URL, an OS level file descriptor
+        (which is not closed) or a file-like object.  As for the parsers,
+        URLs that require network access are rejected unless
+        ``no_network`` is set to False.  Only the currently
+        open elements are kept in memory, so this can be used for
+        documents that are too large to be parsed as a whole.  Documents
+        that are not well-formed are reported as invalid, with the
+        syntax errors in the error log.
+
+        Like ``validate_many()``, this does not change the ``error_log``
+        of the schema.
+        """
+        cdef _XMLSchemaValidContext context
+        cdef _FileReaderContext file_context = None
+        cdef _ExceptionContext exc_context
+        cdef _ErrorLog error_log
+        cdef xmlparser.xmlParserInputBuffer* c_buffer
+        cdef xmlparser.xmlSAXHandler c_sax
+        cdef int ret
+        assert self._c_schema is not NULL, "Schema instance not initialised"
+        if _isString(source):
+            filename = _encodeFilename(source)
+            c_filename = _cstr(filename)
+            if no_network and not _isFilePath(<const_xmlChar*>c_filename) \
+                    and filename[:5].lower() != b'file:':
+                raise IOError, \
+                    u"Network access prevented for '%s' (no_network=True)" % source
+            with nogil:
+                c_buffer = xmlparser.xmlParserInputBufferCreateFilename(
+                    c_filename, 0)
+            if c_buffer is NULL:
+                raise IOError, u"Error reading file '%s'" % source
+        elif isinstance(source, (int, long)) and not isinstance(source, bool):
+            if source < 0:
+                raise ValueError, u"invalid file descriptor %d" % source
+            c_buffer = xmlparser.xmlParserInputBufferCreateFd(source, 0)
+            if c_buffer is NULL:
+                raise MemoryError()
+            # the file descriptor belongs to the caller
+            c_buffer.closecallback = NULL
+        elif hasattr(source, u'read'):
+            exc_context = _ExceptionContext()
+            file_context = _FileReaderContext(
+                source, exc_context, _getFilenameForFile(source))
+            c_buffer = file_context._createParserInputBuffer()
+            if c_buffer is NULL:
+                raise MemoryError()
+        else:
+            raise TypeError, \
+                u"cannot validate from '%s'" % python._fqtypename(source)
+
+        # a SAX handler without callbacks keeps the parser from building
+        # a tree, the schema plugs its own callbacks in front of it
+        cstring_h.memset(&c_sax, 0, sizeof(c_sax))
+        c_sax.initialized = xmlparser.XML_SAX2_MAGIC
+
+        error_log = _ErrorLog()
+        context = self._acquireValidContext()
+        xmlschema.xmlSchemaSetValidStructuredErrors(
+            context._c_ctxt, _receiveError, <void*>error_log)
+        # validation errors only go to the handler of the valid context,
+        # syntax errors go to the thread's structured error handler
+        error_log.connect()
+        with nogil:
+            ret = xmlschema.xmlSchemaValidateStream(
+                context._c_ctxt, c_buffer, 0, &c_sax, NULL)
+        error_log.disconnect()
+        self._releaseValidContext(context)
+
+        if file_context is not None:
+            file_context._exc_context._raise_if_stored()
+        # libxml2 also returns -1 for documents that are not well-formed
+        if ret == -1 and not error_log:
+            raise XMLSchemaValidateError(
+                u"Internal error in XML Schema validation.",
+                error_log.copy())
+        return (ret == 0, error_log.copy())
+
+    cdef int _validate(self, _Document doc, _Element root_node,
+                       _BaseErrorLog error_log) except -2:
+        cdef _XMLSchemaValidContext context
+        cdef xmlDoc* c_doc
+        cdef int ret
+        context = self._acquireValidContext()
+        xmlschema.xmlSchemaSetValidStructuredErrors(
+            context._c_ctxt, _receiveError, <void*>error_log)
+        c_doc = _fakeRootDoc(doc._c_doc, root_node._c_node)
+        with nogil:
+            ret = xmlschema.xmlSchemaValidateDoc(context._c_ctxt, c_doc)
+        _destroyFakeDoc(doc._c_doc, c_doc)
+        self._releaseValidContext(context)
+        return ret
+
+    cdef _XMLSchemaValidContext _acquireValidContext(self):
+        cdef _XMLSchemaValidContext context
+        # no need to lock, the GIL protects the pool
+        if self._spare_valid_contexts:
+            return self._spare_valid_contexts.pop()
+        context = _XMLSchemaValidContext.__new__(_XMLSchemaValidContext)
+        context._c_ctxt = xmlschema.xmlSchemaNewValidCtxt(self._c_schema)
+        if context._c_ctxt is NULL:
+            raise MemoryError()
+        if self._add_attribute_defaults:
+            xmlschema.xmlSchemaSetValidOptions(
+                context._c_ctxt, xmlschema.XML_SCHEMA_VAL_VC_I_CREATE)
+        return context
+
+    cdef void _releaseValidContext(self, _XMLSchemaValidContext context):
+        xmlschema.xmlSchemaSetValidStructuredErrors(context._c_ctxt, NULL, NULL)
+        if len(self._spare_valid_contexts) < _MAX_SPARE_VALID_CONTEXTS:
+            self._spare_valid_contexts.append(context)
+
     cdef _ParserSchemaValidationContext _newSaxValidator(
             self, bint add_default_attributes):
         cdef _ParserSchemaValidationContext context
@@ -165,6 +318,74 @@ cdef class XMLSchema(_Validator):
             add_default_attributes or self._add_attribute_defaults))
         return context
 
+@cython.final
+@cython.internal
+cdef class _XMLSchemaBatchValidation:
+    u"""Validates a list of documents in a set of worker threads.
+    """
+    cdef XMLSchema _schema
+    cdef list _docs
+    cdef list _root_nodes
+    cdef list _results
+    cdef list _errors
+    cdef object _indices
+    cdef _ListErrorLog _empty_error_log
+
+    def __cinit__(self, XMLSchema schema not None, list docs not None):
+        self._schema = schema
+        self._docs = []
+        self._root_nodes = []
+        for etree in docs:
+            self._docs.append(_documentOrRaise(etree))
+            self._root_nodes.append(_rootNodeOrRaise(etree))
+        self._results = [None] * len(docs)
+        self._errors = [None] * len(docs)
+        # iterating over a range is atomic under the GIL
+        self._indices = iter(range(len(docs)))
+        # shared by all documents that did not produce any messages
+        self._empty_error_log = _ListErrorLog([], None, None)
+
+    def _run_worker(self):
+        cdef _ErrorLog error_log = _ErrorLog()
+        cdef _BaseErrorLog result_log
+        cdef _ExceptionContext exc_context
+        cdef int ret
+        for i in self._indices:
+            try:
+                ret = self._schema._validate(
+                    self._docs[i], self._root_nodes[i], error_log)
+                if error_log._entries:
+                    result_log = error_log.copy()
+                    error_log.clear()
+                else:
+                    result_log = self._empty_error_log
+                if ret == -1:
+                    raise XMLSchemaValidateError(
+                        u"Internal error in XML Schema validation.",
+                        result_log)
+                self._results[i] = (ret == 0, result_log)
+            except:
+                exc_context = _ExceptionContext()
+                exc_context._store_raised()
+                self._errors[i] = exc_context
+
+    cdef list run(self, Py_ssize_t workers):
+        cdef _ExceptionContext exc_context
+        if workers <= 1:
+            self._run_worker()
+        else:
+            from threading import Thread
+            threads = [ Thread(target=self._run_worker)
+                        for _ in range(workers) ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        for exc_context in self._errors:
+            if exc_context is not None:
+                exc_context._raise_if_stored()
+        return self._results
+
 @cython.final
 @cython.internal
 cdef class _ParserSchemaValidationContext:
@@ -124,6 +124,63 @@ if _LIBXML_VERSION_INT == 20627:
 else:
     _XPATH_VERSION_WARNING_REQUIRED = 0
 
+################################################################################
+# cache of compiled XPath expressions, used by the XPath evaluators
+
+@cython.final
+@cython.internal
+cdef class _XPathCompiledExpression:
+    u"""Owns a compiled expression.  Evaluations and XPath objects keep a
+    reference to it, so that it is not freed while it is still in use,
+    e.g. when it gets evicted from the cache in the meantime.
+    """
+    cdef xpath.xmlXPathCompExpr* _c_xpath
+
+    def __cinit__(self):
+        self._c_xpath = NULL
+
+    def __dealloc__(self):
+        if self._c_xpath is not NULL:
+            xpath.xmlXPathFreeCompExpr(self._c_xpath)
+
+cdef _LRUCache __XPATH_CACHE
+__XPATH_CACHE = _LRUCache(100)
+
+# libxml2 stores the namespace URI of a prefixed function call in the
+# compiled expression when it first evaluates it.  The URI belongs to the
+# XPath context of that evaluation, so these expressions cannot be shared.
+cdef object _find_prefixed_function_call
+_find_prefixed_function_call = re.compile(
+    b'[^\\s:()\\[\\]/|,=<>!*+@$-][^\\s:()\\[\\]/|,=<>!*+@$]*:'
+    b'[^\\s:()\\[\\]/|,=<>!*+@$]+\\s*\\(').search
+
+def set_xpath_cache_size(size):
+    u"""set_xpath_cache_size(size)
+
+    Set the maximum number of compiled expressions that the ``xpath()``
+    methods and XPath evaluators keep for reuse.  A size of 0 disables
+    caching.
+    """
+    if size < 0:
+        raise ValueError, u"cache size must not be negative"
+    __XPATH_CACHE.resize(size)
+
+def xpath_cache_info():
+    u"""xpath_cache_info()
+
+    Return a dict with the current "hits", "misses", "evictions", "size"
+    and "maxsize" of the XPath expression cache.
+    """
+    return __XPATH_CACHE.info()
+
+def clear_xpath_cache():
+    u"""clear_xpath_cache()
+
+    Discard all cached XPath expressions and reset the statistics.
+    """
+    __XPATH_CACHE.clear()
+
+
 cdef class _XPathEvaluatorBase:
     cdef xpath.xmlXPathContext* _xpathCtxt
     cdef _XPathContext _context
@@ -200,11 +257,41 @@ cdef class _XPathEvaluatorBase:
                 raise XPathError, u"XPath evaluator locking failed"
         return 0
 
+    @cython.final
+    cdef bint _try_lock(self):
+        if config.ENABLE_THREADING and self._eval_lock != NULL:
+            return python.PyThread_acquire_lock(
+                self._eval_lock, python.NOWAIT_LOCK)
+        return 1
+
     @cython.final
     cdef void _unlock(self):
         if config.ENABLE_THREADING and self._eval_lock != NULL:
             python.PyThread_release_lock(self._eval_lock)
 
+    cdef _XPathCompiledExpression _compile_cached(self, bytes path):
+        u"""Look up the compiled expression in the global cache or compile
+        it in the current context.  Expressions are shared between
+        evaluators with the same namespaces and extension functions.
+        """
+        cdef _XPathCompiledExpression entry
+        namespaces = self._context._namespaces
+        extensions = self._context._extensions
+        key = (path,
+               tuple(namespaces) if namespaces else None,
+               frozenset(extensions) if extensions else None)
+        entry = <_XPathCompiledExpression>__XPATH_CACHE.get(key)
+        if entry is not None:
+            return entry
+        entry = _XPathCompiledExpression()
+        entry._c_xpath = xpath.xmlXPathCtxtCompile(
+            self._xpathCtxt, _xcstr(path))
+        if entry._c_xpath is NULL:
+            self._raise_eval_error()
+        if _find_prefixed_function_call(_replace_strings(b'', path)) is None:
+            __XPATH_CACHE.put(key, entry)
+        return entry
+
     cdef _raise_parse_error(self):
         cdef _BaseErrorLog entries
         entries = self._error_log.filter_types(_XPATH_SYNTAX_ERRORS)
@@ -229,7 +316,9 @@ cdef class _XPathEvaluatorBase:
                 u"Error in xpath expression"),
                              self._error_log)
 
-    cdef object _handle_result(self, xpath.xmlXPathObject* xpathObj, _Document doc):
+    cdef int _check_result(self, xpath.xmlXPathObject* xpathObj) except -1:
+        u"""Raise the exception of a failed evaluation and free the result.
+        """
         if self._context._exc._has_raised():
             if xpathObj is not NULL:
                 _freeXPathObject(xpathObj)
@@ -240,7 +329,10 @@ cdef class _XPathEvaluatorBase:
         if xpathObj is NULL:
             self._context._release_temp_refs()
             self._raise_eval_error()
+        return 0
 
+    cdef object _handle_result(self, xpath.xmlXPathObject* xpathObj, _Document doc):
+        self._check_result(xpathObj)
         try:
             result = _unwrapXPathObject(xpathObj, doc, self._context)
         finally:
@@ -305,6 +397,7 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
         against the ElementTree as returned by getroottree().
         """
         cdef xpath.xmlXPathObject*  xpathObj
+        cdef _XPathCompiledExpression compiled
         cdef _Document doc
         assert self._xpathCtxt is not NULL, "XPath context not initialised"
         path = _utf8(_path)
@@ -315,10 +408,10 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
         try:
             self._context.register_context(doc)
             self._context.registerVariables(_variables)
-            c_path = _xcstr(path)
+            compiled = self._compile_cached(path)
             with nogil:
-                xpathObj = xpath.xmlXPathEvalExpression(
-                    c_path, self._xpathCtxt)
+                xpathObj = xpath.xmlXPathCompiledEval(
+                    compiled._c_xpath, self._xpathCtxt)
             result = self._handle_result(xpathObj, doc)
         finally:
             self._context.unregister_context()
@@ -326,6 +419,41 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
 
         return result
 
+    cdef object _iter(self, _path, dict variables):
+        u"""Evaluate an expression like __call__() and return an iterator
+        over the node-set result.
+        """
+        cdef xpath.xmlXPathObject*  xpathObj
+        cdef _XPathCompiledExpression compiled
+        cdef _Document doc
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        path = _utf8(_path)
+        doc = self._element._doc
+
+        self._lock()
+        self._xpathCtxt.node = self._element._c_node
+        try:
+            self._context.register_context(doc)
+            self._context.registerVariables(variables)
+            compiled = self._compile_cached(path)
+            with nogil:
+                xpathObj = xpath.xmlXPathCompiledEval(
+                    compiled._c_xpath, self._xpathCtxt)
+            self._check_node_set_result(xpathObj)
+            return _newXPathResultIterator(xpathObj, doc, self._context)
+        finally:
+            self._context.unregister_context()
+            self._unlock()
+
+    cdef int _check_node_set_result(self, xpath.xmlXPathObject* xpathObj) except -1:
+        self._check_result(xpathObj)
+        if xpathObj.type != xpath.XPATH_NODESET and \
+                xpathObj.type != xpath.XPATH_XSLT_TREE:
+            _freeXPathObject(xpathObj)
+            self._context._release_temp_refs()
+            raise XPathResultError, u"XPath result is not a node-set"
+        return 0
+
 
 cdef class XPathDocumentEvaluator(XPathElementEvaluator):
     u"""XPathDocumentEvaluator(self, etree, namespaces=None, extensions=None, regexp=True, smart_strings=True)
@@ -353,6 +481,7 @@ cdef class XPathDocumentEvaluator(XPathElementEvaluator):
         are currently not supported for variables.
         """
         cdef xpath.xmlXPathObject*  xpathObj
+        cdef _XPathCompiledExpression compiled
         cdef xmlDoc* c_doc
         cdef _Document doc
         assert self._xpathCtxt is not NULL, "XPath context not initialised"
@@ -365,12 +494,12 @@ cdef class XPathDocumentEvaluator(XPathElementEvaluator):
             c_doc = _fakeRootDoc(doc._c_doc, self._element._c_node)
             try:
                 self._context.registerVariables(_variables)
-                c_path = _xcstr(path)
+                compiled = self._compile_cached(path)
                 with nogil:
                     self._xpathCtxt.doc  = c_doc
                     self._xpathCtxt.node = tree.xmlDocGetRootElement(c_doc)
-                    xpathObj = xpath.xmlXPathEvalExpression(
-                        c_path, self._xpathCtxt)
+                    xpathObj = xpath.xmlXPathCompiledEval(
+                        compiled._c_xpath, self._xpathCtxt)
                 result = self._handle_result(xpathObj, doc)
             finally:
                 _destroyFakeDoc(doc._c_doc, c_doc)
@@ -380,6 +509,42 @@ cdef class XPathDocumentEvaluator(XPathElementEvaluator):
 
         return result
 
+    cdef object _iter(self, _path, dict variables):
+        u"""Evaluate an expression like __call__() and return an iterator
+        over the node-set result.
+        """
+        cdef xpath.xmlXPathObject*  xpathObj
+        cdef _XPathCompiledExpression compiled
+        cdef xmlDoc* c_doc
+        cdef _Document doc
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        path = _utf8(_path)
+        doc = self._element._doc
+
+        self._lock()
+        try:
+            self._context.register_context(doc)
+            c_doc = _fakeRootDoc(doc._c_doc, self._element._c_node)
+            try:
+                self._context.registerVariables(variables)
+                compiled = self._compile_cached(path)
+                with nogil:
+                    self._xpathCtxt.doc  = c_doc
+                    self._xpathCtxt.node = tree.xmlDocGetRootElement(c_doc)
+                    xpathObj = xpath.xmlXPathCompiledEval(
+                        compiled._c_xpath, self._xpathCtxt)
+                self._check_node_set_result(xpathObj)
+                if c_doc is doc._c_doc:
+                    return _newXPathResultIterator(
+                        xpathObj, doc, self._context)
+                # the temporary root document only lives during this call
+                return iter(self._handle_result(xpathObj, doc))
+            finally:
+                _destroyFakeDoc(doc._c_doc, c_doc)
+                self._context.unregister_context()
+        finally:
+            self._unlock()
+
 
 def XPathEvaluator(etree_or_element, *, namespaces=None, extensions=None,
                    regexp=True, smart_strings=True):
@@ -417,11 +582,15 @@ cdef class XPath(_XPathEvaluatorBase):
     boolean keyword (defaults to True).  Smart strings will be
     returned for string results unless you pass
     ``smart_strings=False``.
+
+    XPath objects can be shared between threads.  Concurrent calls do not
+    wait for each other but evaluate the compiled expression in separate
+    XPath contexts.  Errors of all calls end up in the ``error_log``.
     """
-    cdef xpath.xmlXPathCompExpr* _xpath
+    cdef _XPathCompiledExpression _compiled
     cdef bytes _path
-    def __cinit__(self):
-        self._xpath = NULL
+    cdef list _spare_evaluators
+    cdef bint _share_compiled
 
     def __init__(self, path, *, namespaces=None, extensions=None,
                  regexp=True, smart_strings=True):
@@ -429,17 +598,23 @@ cdef class XPath(_XPathEvaluatorBase):
         _XPathEvaluatorBase.__init__(self, namespaces, extensions,
                                      regexp, smart_strings)
         self._path = _utf8(path)
+        self._spare_evaluators = []
         xpathCtxt = xpath.xmlXPathNewContext(NULL)
         if xpathCtxt is NULL:
             raise MemoryError()
         self.set_context(xpathCtxt)
-        self._xpath = xpath.xmlXPathCtxtCompile(xpathCtxt, _xcstr(self._path))
-        if self._xpath is NULL:
+        self._compiled = _XPathCompiledExpression()
+        self._compiled._c_xpath = xpath.xmlXPathCtxtCompile(
+            xpathCtxt, _xcstr(self._path))
+        if self._compiled._c_xpath is NULL:
             self._raise_parse_error()
+        # see _find_prefixed_function_call
+        self._share_compiled = _find_prefixed_function_call(
+            _replace_strings(b'', self._path)) is None
 
     def __call__(self, _etree_or_element, **_variables):
         u"__call__(self, _etree_or_element, **_variables)"
-        cdef xpath.xmlXPathObject*  xpathObj
+        cdef XPath evaluator
         cdef _Document document
         cdef _Element element
 
@@ -447,36 +622,456 @@ cdef class XPath(_XPathEvaluatorBase):
         document = _documentOrRaise(_etree_or_element)
         element  = _rootNodeOrRaise(_etree_or_element)
 
-        self._lock()
+        evaluator = self._acquire_evaluator()
+        try:
+            return evaluator._evaluate(document, element, _variables)
+        finally:
+            self._release_evaluator(evaluator)
+
+    def evaluate_many(self, elements, *, flatten=False, smart_strings=None,
+                      **_variables):
+        u"""evaluate_many(self, elements, *, flatten=False, smart_strings=None, **_variables)
+
+        Evaluate the expression against each Element or ElementTree in
+        an iterable and return a list of the results in the same order.
+
+        This is equivalent to ``[xpath(el, **_variables) for el in elements]``
+        but sets up the XPath context and the variables only once.
+
+        If ``flatten`` is true, the node-set results are concatenated into
+        a single list instead.  Passing ``smart_strings`` overrides the
+        setting of the XPath object for this call, e.g. to return plain
+        strings.
+        """
+        cdef XPath evaluator
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        evaluator = self._acquire_evaluator()
+        try:
+            return evaluator._evaluate_many(
+                elements, _variables, flatten, smart_strings)
+        finally:
+            self._release_evaluator(evaluator)
+
+    def iter(self, _etree_or_element, **_variables):
+        u"""iter(self, _etree_or_element, **_variables)
+
+        Evaluate the expression and return an iterator over the node-set
+        result.  The Elements and strings are created one at a time while
+        iterating, so that the first results are available without
+        building the complete result list.
+
+        Elements can be changed and moved inside of the document while
+        iterating.  If nodes get removed from it, the iterator raises a
+        ``RuntimeError`` on the next step, as pending nodes may no longer
+        exist.  This includes replaced text and removed attributes if the
+        result contains text or attribute nodes.
+
+        Raises an ``XPathResultError`` if the result is not a node-set.
+        """
+        cdef XPath evaluator
+        cdef xpath.xmlXPathObject* xpathObj
+        cdef _Document document
+        cdef _Element element
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        document = _documentOrRaise(_etree_or_element)
+        element  = _rootNodeOrRaise(_etree_or_element)
+
+        evaluator = self._acquire_evaluator()
+        try:
+            xpathObj = evaluator._evaluate_node_set(
+                document, element, _variables)
+            return _newXPathResultIterator(
+                xpathObj, document, evaluator._context)
+        finally:
+            self._release_evaluator(evaluator)
+
+    def count(self, _etree_or_element, **_variables):
+        u"""count(self, _etree_or_element, **_variables)
+
+        Evaluate the expression and return the number of items in the
+        node-set result, without creating Elements or strings for them.
+
+        Raises an ``XPathResultError`` if the result is not a node-set.
+        """
+        return self._count(_etree_or_element, _variables, 0)
+
+    def exists(self, _etree_or_element, **_variables):
+        u"""exists(self, _etree_or_element, **_variables)
+
+        Evaluate the expression and return True if the node-set result is
+        not empty, without creating Elements or strings for it.
+
+        Raises an ``XPathResultError`` if the result is not a node-set.
+        """
+        return self._count(_etree_or_element, _variables, 1) > 0
+
+    def strings(self, _etree_or_element, **_variables):
+        u"""strings(self, _etree_or_element, **_variables)
+
+        Evaluate the expression and return the XPath string values of the
+        nodes in a node-set result as a list of plain strings.  Other
+        results are converted to a list of one string.
+
+        This does not create Elements or smart strings for the nodes.
+        """
+        return self._evaluate_cast(_etree_or_element, _variables, 0)
+
+    def numbers(self, _etree_or_element, **_variables):
+        u"""numbers(self, _etree_or_element, **_variables)
+
+        Evaluate the expression and return the XPath number values of the
+        nodes in a node-set result as an ``array.array('d')``.  Values that
+        are not numbers become NaN.  Other results are converted to an
+        array of one number.
+
+        The array supports the buffer protocol, e.g. for
+        ``numpy.frombuffer()``.
+        """
+        return self._evaluate_cast(_etree_or_element, _variables, 1)
+
+    cdef object _evaluate_cast(self, _etree_or_element, dict variables,
+                               bint to_numbers):
+        cdef XPath evaluator
+        cdef xpath.xmlXPathObject* xpathObj
+        cdef _Document document
+        cdef _Element element
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        document = _documentOrRaise(_etree_or_element)
+        element  = _rootNodeOrRaise(_etree_or_element)
+
+        evaluator = self._acquire_evaluator()
+        try:
+            xpathObj = evaluator._evaluate_object(document, element, variables)
+            try:
+                if to_numbers:
+                    return _castXPathResultToNumbers(xpathObj)
+                else:
+                    return _castXPathResultToStrings(xpathObj)
+            finally:
+                _freeXPathObject(xpathObj)
+                evaluator._context._release_temp_refs()
+        finally:
+            self._release_evaluator(evaluator)
+
+    cdef Py_ssize_t _count(self, _etree_or_element, dict variables,
+                           Py_ssize_t limit) except -1:
+        cdef XPath evaluator
+        cdef xpath.xmlXPathObject* xpathObj
+        cdef _Document document
+        cdef _Element element
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        document = _documentOrRaise(_etree_or_element)
+        element  = _rootNodeOrRaise(_etree_or_element)
+
+        evaluator = self._acquire_evaluator()
+        try:
+            xpathObj = evaluator._evaluate_node_set(document, element, variables)
+            try:
+                return _countNodeSetResult(xpathObj, limit)
+            finally:
+                _freeXPathObject(xpathObj)
+                evaluator._context._release_temp_refs()
+        finally:
+            self._release_evaluator(evaluator)
+
+    cdef XPath _acquire_evaluator(self):
+        u"""Return this object if its context is free, otherwise a spare
+        evaluator.  Must be passed to _release_evaluator() after use.
+        """
+        if self._try_lock():
+            return self
+        # the context is in use by another thread (or by an extension
+        # function that calls us recursively) => use a spare context
+        # instead of waiting for it
+        if self._spare_evaluators:
+            return self._spare_evaluators.pop()
+        return self._new_spare_evaluator()
+
+    cdef _release_evaluator(self, XPath evaluator):
+        if evaluator is self:
+            self._unlock()
+            return
+        if evaluator._error_log._entries:
+            for entry in evaluator._error_log._entries:
+                self._error_log.receive(entry)
+            evaluator._error_log.clear()
+        self._spare_evaluators.append(evaluator)
+
+    cdef _evaluate(self, _Document document, _Element element, dict variables):
+        cdef xpath.xmlXPathObject*  xpathObj
         self._xpathCtxt.doc  = document._c_doc
         self._xpathCtxt.node = element._c_node
-
         try:
             self._context.register_context(document)
-            self._context.registerVariables(_variables)
+            self._context.registerVariables(variables)
             with nogil:
                 xpathObj = xpath.xmlXPathCompiledEval(
-                    self._xpath, self._xpathCtxt)
+                    self._compiled._c_xpath, self._xpathCtxt)
             result = self._handle_result(xpathObj, document)
         finally:
             self._context.unregister_context()
-            self._unlock()
         return result
 
+    cdef xpath.xmlXPathObject* _evaluate_object(
+            self, _Document document, _Element element,
+            dict variables) except NULL:
+        u"""Evaluate the expression and return the raw result.  The caller
+        must free it and release the temporary references of the context.
+        """
+        cdef xpath.xmlXPathObject*  xpathObj
+        self._xpathCtxt.doc  = document._c_doc
+        self._xpathCtxt.node = element._c_node
+        try:
+            self._context.register_context(document)
+            self._context.registerVariables(variables)
+            with nogil:
+                xpathObj = xpath.xmlXPathCompiledEval(
+                    self._compiled._c_xpath, self._xpathCtxt)
+            self._check_result(xpathObj)
+        finally:
+            self._context.unregister_context()
+        return xpathObj
+
+    cdef xpath.xmlXPathObject* _evaluate_node_set(
+            self, _Document document, _Element element,
+            dict variables) except NULL:
+        u"""Like _evaluate_object() but only accepts node-set results.
+        """
+        cdef xpath.xmlXPathObject*  xpathObj
+        xpathObj = self._evaluate_object(document, element, variables)
+        if xpathObj.type != xpath.XPATH_NODESET and \
+                xpathObj.type != xpath.XPATH_XSLT_TREE:
+            _freeXPathObject(xpathObj)
+            self._context._release_temp_refs()
+            raise XPathResultError, u"XPath result is not a node-set"
+        return xpathObj
+
+    cdef list _evaluate_many(self, elements, dict variables, bint flatten,
+                             smart_strings):
+        cdef xpath.xmlXPathObject*  xpathObj
+        cdef _Document document
+        cdef _Element element
+        cdef list results = []
+        cdef bint build_smart_strings = self._context._build_smart_strings
+        registered = False
+        try:
+            if smart_strings is not None:
+                self._context._build_smart_strings = bool(smart_strings)
+            for item in elements:
+                document = _documentOrRaise(item)
+                element  = _rootNodeOrRaise(item)
+                if not registered:
+                    self._context.register_context(document)
+                    self._context.registerVariables(variables)
+                    registered = True
+                elif document is not self._context._doc:
+                    self._context._register_context(document)
+                self._xpathCtxt.doc  = document._c_doc
+                self._xpathCtxt.node = element._c_node
+                with nogil:
+                    xpathObj = xpath.xmlXPathCompiledEval(
+                        self._compiled._c_xpath, self._xpathCtxt)
+                result = self._handle_result(xpathObj, document)
+                if flatten and isinstance(result, list):
+                    results.extend(<list>result)
+                else:
+                    results.append(result)
+        finally:
+            self._context._build_smart_strings = build_smart_strings
+            if registered:
+                self._context.unregister_context()
+        return results
+
+    cdef XPath _new_spare_evaluator(self):
+        u"""Create an evaluator with its own XPath context that shares the
+        compiled expression, namespaces and extension functions.  Expressions
+        that call prefixed functions are compiled again for the new context.
+        """
+        cdef XPath evaluator = XPath.__new__(XPath)
+        cdef xpath.xmlXPathContext* xpathCtxt
+        _XPathEvaluatorBase.__init__(
+            evaluator, self._context._namespaces, None, False,
+            self._context._build_smart_strings)
+        if self._context._extensions is not None:
+            evaluator._context._extensions = self._context._extensions.copy()
+        evaluator._path = self._path
+        evaluator._share_compiled = self._share_compiled
+        xpathCtxt = xpath.xmlXPathNewContext(NULL)
+        if xpathCtxt is NULL:
+            raise MemoryError()
+        evaluator.set_context(xpathCtxt)
+        if self._share_compiled:
+            evaluator._compiled = self._compiled
+        else:
+            evaluator._compiled = _XPathCompiledExpression()
+            evaluator._compiled._c_xpath = xpath.xmlXPathCtxtCompile(
+                xpathCtxt, _xcstr(self._path))
+            if evaluator._compiled._c_xpath is NULL:
+                evaluator._raise_parse_error()
+        return evaluator
+
     property path:
         u"""The literal XPath expression.
         """
         def __get__(self):
             return self._path.decode(u'UTF-8')
 
-    def __dealloc__(self):
-        if self._xpath is not NULL:
-            xpath.xmlXPathFreeCompExpr(self._xpath)
-
     def __repr__(self):
         return self.path
 
 
+cdef _XPathResultIterator _newXPathResultIterator(
+        xpath.xmlXPathObject* xpathObj, _Document doc,
+        _BaseContext context):
+    u"""Create an iterator that takes over a node-set result and the
+    temporary references of the evaluation context.
+    """
+    cdef _XPathResultIterator iterator
+    iterator = _XPathResultIterator.__new__(_XPathResultIterator)
+    iterator._xpathObj = xpathObj
+    iterator._doc = doc
+    iterator._context = context._copy_result_context()
+    iterator._trackRemovedNodes()
+    return iterator
+
+@cython.final
+@cython.internal
+cdef class _XPathResultIterator:
+    u"""Iterator over a node-set result that creates the Python objects for
+    the nodes one at a time.  The node-set is freed when the iterator is
+    exhausted or garbage collected.
+
+    The node-set holds plain pointers into the document, so the iterator
+    raises a RuntimeError instead of unpacking nodes when nodes were
+    removed from the document in the meantime.  Removed text and
+    attribute nodes only count if the node-set contains such nodes.
+    """
+    cdef xpath.xmlXPathObject* _xpathObj
+    cdef _Document _doc
+    cdef _BaseContext _context
+    cdef list _pending
+    cdef int _index
+    cdef _RemovedNodesCounter _removed
+    cdef size_t _c_doc_address
+    cdef Py_ssize_t _removed_elements
+    cdef Py_ssize_t _removed_other
+    cdef bint _check_other
+
+    def __cinit__(self):
+        self._xpathObj = NULL
+        self._index = 0
+        self._pending = []
+
+    def __dealloc__(self):
+        if self._xpathObj is not NULL:
+            _freeXPathObject(self._xpathObj)
+        if self._removed is not None:
+            _untrackRemovedNodes(self._c_doc_address, self._removed)
+
+    def __iter__(self):
+        return self
+
+    cdef int _trackRemovedNodes(self) except -1:
+        cdef xpath.xmlNodeSet* c_node_set = self._xpathObj.nodesetval
+        cdef xmlNode* c_node
+        cdef int i
+        if c_node_set is NULL or c_node_set.nodeNr == 0:
+            return 0
+        for i in range(c_node_set.nodeNr):
+            c_node = c_node_set.nodeTab[i]
+            # namespace entries share the 'type' field, but not 'doc'
+            if c_node.type == tree.XML_TEXT_NODE or \
+                    c_node.type == tree.XML_CDATA_SECTION_NODE or \
+                    c_node.type == tree.XML_ATTRIBUTE_NODE:
+                if c_node.doc is self._doc._c_doc:
+                    self._check_other = True
+                    break
+        self._c_doc_address = <size_t>self._doc._c_doc
+        self._removed = _trackRemovedNodes(self._doc)
+        self._removed_elements = self._removed._elements
+        self._removed_other = self._removed._other
+        return 0
+
+    cdef int _free(self) except -1:
+        _freeXPathObject(self._xpathObj)
+        self._xpathObj = NULL
+        self._context._release_temp_refs()
+        if self._removed is not None:
+            _untrackRemovedNodes(self._c_doc_address, self._removed)
+            self._removed = None
+        return 0
+
+    def __next__(self):
+        cdef xpath.xmlNodeSet* c_node_set
+        while not self._pending:
+            if self._xpathObj is NULL:
+                raise StopIteration
+            c_node_set = self._xpathObj.nodesetval
+            if c_node_set is NULL or self._index >= c_node_set.nodeNr:
+                self._free()
+                raise StopIteration
+            if self._removed is not None and (
+                    self._removed._elements != self._removed_elements or
+                    self._check_other and
+                    self._removed._other != self._removed_other):
+                raise RuntimeError, \
+                    u"nodes were removed from the tree during XPath iteration"
+            _unpackNodeSetEntry(
+                self._pending, c_node_set.nodeTab[self._index],
+                self._doc, self._context,
+                self._xpathObj.type == xpath.XPATH_XSLT_TREE)
+            self._index += 1
+            # result tree fragments can unpack into multiple entries
+            self._pending.reverse()
+        return self._pending.pop()
+
+
+cdef list _castXPathResultToStrings(xpath.xmlXPathObject* xpathObj):
+    cdef xmlChar* c_value
+    cdef list result = []
+    cdef int i
+    if xpathObj.type != xpath.XPATH_NODESET and \
+            xpathObj.type != xpath.XPATH_XSLT_TREE:
+        c_value = xpath.xmlXPathCastToString(xpathObj)
+        if c_value is NULL:
+            raise MemoryError()
+        try:
+            result.append(funicode(c_value))
+        finally:
+            tree.xmlFree(c_value)
+    elif xpathObj.nodesetval is not NULL:
+        for i in range(xpathObj.nodesetval.nodeNr):
+            c_value = xpath.xmlXPathCastNodeToString(
+                xpathObj.nodesetval.nodeTab[i])
+            if c_value is NULL:
+                raise MemoryError()
+            try:
+                result.append(funicode(c_value))
+            finally:
+                tree.xmlFree(c_value)
+    return result
+
+cdef object _castXPathResultToNumbers(xpath.xmlXPathObject* xpathObj):
+    cdef xpath.xmlNodeSet* c_node_set = NULL
+    cdef double* c_values
+    cdef int i, count = 1
+    if xpathObj.type == xpath.XPATH_NODESET or \
+            xpathObj.type == xpath.XPATH_XSLT_TREE:
+        c_node_set = xpathObj.nodesetval
+        count = c_node_set.nodeNr if c_node_set is not NULL else 0
+    data = python.PyBytes_FromStringAndSize(NULL, count * sizeof(double))
+    c_values = <double*>_cstr(data)
+    if xpathObj.type != xpath.XPATH_NODESET and \
+            xpathObj.type != xpath.XPATH_XSLT_TREE:
+        c_values[0] = xpath.xmlXPathCastToNumber(xpathObj)
+    else:
+        with nogil:
+            for i in range(count):
+                c_values[i] = xpath.xmlXPathCastNodeToNumber(
+                    c_node_set.nodeTab[i])
+    return array.array('d', data)
+
+
 cdef object _replace_strings
 cdef object _find_namespaces
 _replace_strings = re.compile(b'("[^"]*")|(\'[^\']*\')').sub
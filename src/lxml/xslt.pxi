@@ -359,6 +359,7 @@ cdef class XSLT:
     cdef _XSLTResolverContext _xslt_resolver_context
     cdef XSLTAccessControl _access_control
     cdef _ErrorLog _error_log
+    cdef XSLT _shared_style
 
     def __cinit__(self):
         self._c_style = NULL
@@ -416,6 +417,9 @@ cdef class XSLT:
         self._context = _XSLTContext(None, extensions, self._error_log, regexp, True)
 
     def __dealloc__(self):
+        if self._shared_style is not None:
+            # the compiled stylesheet belongs to the cached XSLT object
+            return
         if self._xslt_resolver_context is not None and \
                self._xslt_resolver_context._c_style_doc is not NULL:
             tree.xmlFreeDoc(self._xslt_resolver_context._c_style_doc)
@@ -462,6 +466,55 @@ cdef class XSLT:
             raise ValueError("cannot set a maximum stylesheet traversal depth < 0")
         xslt.xsltMaxDepth = max_depth
 
+    @staticmethod
+    def from_cache(xslt_input, *, extensions=None, regexp=True,
+                   access_control=None):
+        u"""from_cache(xslt_input, extensions=None, regexp=True, access_control=None)
+
+        Return an XSLT object for a stylesheet, reusing the compiled
+        stylesheet from an earlier call if possible.
+
+        The input can be a filename or URL, or a tree or Element.  Local
+        files are looked up by path, modification time and size, so that
+        changed files are compiled again.  Other URLs are looked up by
+        URL only.  Trees are looked up by their serialised content and
+        their base URL.  Imports and includes are resolved when the
+        stylesheet is compiled for the first time.
+
+        Each call returns a new XSLT object with its own error log,
+        extensions and access control.  The objects share the compiled
+        stylesheet, which can be used from several threads at a time.
+
+        See ``xslt_cache_info()``, ``set_xslt_cache_size()`` and
+        ``clear_xslt_cache()`` for controlling the cache.
+        """
+        cdef XSLT stylesheet
+        cdef _Document doc
+        cdef _Element root_node
+        if _isString(xslt_input):
+            try:
+                stat = os_stat(xslt_input)
+            except (OSError, IOError):
+                key = (u'url', xslt_input)
+            else:
+                key = (u'file', os_path_abspath(xslt_input),
+                       stat.st_mtime, stat.st_size)
+        else:
+            doc = _documentOrRaise(xslt_input)
+            root_node = _rootNodeOrRaise(xslt_input)
+            data = _tostring(root_node, None, None, u'xml', 0, 0, 0, 0, -1)
+            key = (u'tree', hashlib.sha1(data).digest(),
+                   _decodeFilename(doc._c_doc.URL)
+                   if doc._c_doc.URL is not NULL else None)
+
+        stylesheet = __XSLT_CACHE.get(key)
+        if stylesheet is None:
+            if _isString(xslt_input):
+                xslt_input = _parseDocument(xslt_input, None, None)
+            stylesheet = XSLT(xslt_input)
+            __XSLT_CACHE.put(key, stylesheet)
+        return _newSharedXSLT(stylesheet, extensions, regexp, access_control)
+
     def apply(self, _input, *, profile_run=False, **kw):
         u"""apply(self, _input,  profile_run=False, **kw)
         
@@ -691,6 +744,55 @@ cdef XSLT _copyXSLT(XSLT stylesheet):
 
     return new_xslt
 
+cdef XSLT _newSharedXSLT(XSLT stylesheet, extensions, regexp,
+                         access_control):
+    cdef XSLT new_xslt
+    assert stylesheet._c_style is not NULL, "XSLT stylesheet not initialised"
+    if stylesheet._shared_style is not None:
+        stylesheet = stylesheet._shared_style
+    new_xslt = XSLT.__new__(XSLT)
+    new_xslt._access_control = access_control
+    new_xslt._error_log = _ErrorLog()
+    new_xslt._context = _XSLTContext(
+        None, extensions, new_xslt._error_log, regexp, True)
+    new_xslt._xslt_resolver_context = stylesheet._xslt_resolver_context._copy()
+    new_xslt._c_style = stylesheet._c_style
+    new_xslt._shared_style = stylesheet
+    return new_xslt
+
+################################################################################
+# cache of compiled stylesheets, used by XSLT.from_cache()
+
+cdef _LRUCache __XSLT_CACHE
+__XSLT_CACHE = _LRUCache(20)
+
+def set_xslt_cache_size(size):
+    u"""set_xslt_cache_size(size)
+
+    Set the maximum number of compiled stylesheets that
+    ``XSLT.from_cache()`` keeps for reuse.  A size of 0 disables caching.
+    """
+    if size < 0:
+        raise ValueError, u"cache size must not be negative"
+    __XSLT_CACHE.resize(size)
+
+def xslt_cache_info():
+    u"""xslt_cache_info()
+
+    Return a dict with the current "hits", "misses", "evictions", "size"
+    and "maxsize" of the XSLT stylesheet cache.
+    """
+    return __XSLT_CACHE.info()
+
+def clear_xslt_cache():
+    u"""clear_xslt_cache()
+
+    Discard all cached stylesheets and reset the statistics.  XSLT objects
+    that were returned by ``XSLT.from_cache()`` remain usable.
+    """
+    __XSLT_CACHE.clear()
+
+
 @cython.final
 cdef class _XSLTResultTree(_ElementTree):
     cdef XSLT _xslt
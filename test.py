@@ -574,6 +574,12 @@ def main(argv):
             test_file for test_file in test_files
             if 'test_http_io.py' not in test_file]
 
+    if sys.version_info[:2] < (3,5):
+        # exclude tests that require asyncio and the async syntax
+        test_files = [
+            test_file for test_file in test_files
+            if 'test_aio.py' not in test_file]
+
     if cfg.list_tests or cfg.run_tests:
         test_cases = get_test_cases(test_files, cfg, tracer=tracer)
     if cfg.list_hooks or cfg.run_tests: